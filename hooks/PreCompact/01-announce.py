@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 # /// script
-# requires-python = ">=3.10"
+# requires-python = ">=3.11,<3.13"
 # dependencies = [
 #     "kokoro-onnx",
-#     "soundfile",
+#     "numpy",
+#     "openai",
+#     "requests",
+#     "sounddevice",
 # ]
 # ///
 """
@@ -11,14 +14,15 @@ PreCompact Announce Hook - Claude Code TTS
 
 Announces context compaction with dramatic voice.
 Uses Kokoro TTS with fallback to macOS say (Zarvox voice).
+
+When the TTS daemon is running it speaks the announcement as a system
+cue, mixed over any reply that is still playing.
 """
 
 import json
 import sys
-import os
+import time
 import random
-import subprocess
-import tempfile
 from pathlib import Path
 
 # Add utils to path
@@ -26,6 +30,9 @@ HOOKS_DIR = Path(__file__).parents[1]
 UTILS_DIR = HOOKS_DIR / "utils"
 sys.path.insert(0, str(UTILS_DIR))
 
+import capabilities
+import tts_metrics
+
 # Dramatic compaction announcements
 ANNOUNCEMENTS = [
     "Context overflow detected. Initiating memory compaction.",
@@ -41,22 +48,25 @@ ANNOUNCEMENTS = [
 def speak_with_kokoro(text: str, voice: str = "bm_george") -> bool:
     """Try to speak using Kokoro TTS. Returns True on success."""
     try:
-        import soundfile as sf
+        import tts_daemon
+        spoke = tts_daemon.speak("system", text, "kokoro", hook="pre_compact",
+                                 voice={"kokoro_voice": voice, "speed": 1.1})
+        if spoke is not None:
+            return spoke
+    except Exception:
+        pass
+    if not capabilities.usable("kokoro"):
+        return False
+    try:
         import kokoro_tts
+        import audio_output
 
-        kokoro = kokoro_tts.get_kokoro()
-        if not kokoro:
+        result = kokoro_tts.create(text, voice=voice, speed=1.1)
+        if result is None:
             return False
+        samples, sample_rate = result
 
-        samples, sample_rate = kokoro.create(text, voice=voice, speed=1.1)
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, samples, sample_rate)
-            temp_path = f.name
-
-        subprocess.run(["afplay", temp_path], check=True, capture_output=True)
-        os.remove(temp_path)
-        return True
+        return audio_output.play_pcm(samples, sample_rate)
     except Exception:
         return False
 
@@ -64,17 +74,27 @@ def speak_with_kokoro(text: str, voice: str = "bm_george") -> bool:
 def speak_with_macos(text: str) -> bool:
     """Fallback to macOS say command with Zarvox voice."""
     try:
-        subprocess.run(
-            ["say", "-v", "Zarvox", "-r", "200", text],
-            check=True,
-            capture_output=True
-        )
-        return True
+        import macos_say
+        # 200 wpm
+        return macos_say.speak(text, "Zarvox", 200 / 175)
+    except Exception:
+        return False
+
+
+def speak_with_espeak(text: str) -> bool:
+    """Fallback to espeak-ng off macOS (already robotic enough)."""
+    try:
+        import espeak_tts
+        # 200 wpm
+        return espeak_tts.speak(text, "en-gb", 200 / 175)
     except Exception:
         return False
 
 
 def main():
+    hook_start = time.perf_counter()
+    tts_metrics.set_context(hook="pre_compact")
+
     # Check TTS mode - if off, exit silently
     try:
         from session_state import get_tts_mode
@@ -89,7 +109,8 @@ def main():
     try:
         config_path = HOOKS_DIR / "tts_config.json"
         if config_path.exists():
-            config = json.loads(config_path.read_text())
+            with tts_metrics.timed("config_load"):
+                config = json.loads(config_path.read_text())
             hook_config = config.get("hooks", {}).get("pre_compact", {})
 
             # Check if enabled
@@ -111,9 +132,14 @@ def main():
     # Select random announcement
     announcement = random.choice(announcements)
 
-    # Try Kokoro first, fall back to macOS
+    # Try Kokoro first, fall back to macOS say (espeak-ng elsewhere)
     if not speak_with_kokoro(announcement):
-        speak_with_macos(announcement)
+        if sys.platform == "darwin":
+            speak_with_macos(announcement)
+        else:
+            speak_with_espeak(announcement)
+    tts_metrics.record("hook", (time.perf_counter() - hook_start) * 1000,
+                       text_len=len(announcement))
 
     # Output success JSON
     print(json.dumps({
@@ -123,4 +149,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import hook_profiler
+    hook_profiler.run(main, "pre_compact")
@@ -1,16 +1,30 @@
 # /// script
-# requires-python = ">=3.11"
+# requires-python = ">=3.11,<3.13"
 # dependencies = [
 #     "kokoro-onnx",
-#     "soundfile",
+#     "numpy",
+#     "openai",
 #     "requests",
+#     "sounddevice",
 # ]
 # ///
 """
 SessionStart Hook - Claude Code TTS Initialization
 
-Shows dialog to select TTS provider on session start.
-Saves selection for use by other hooks throughout the session.
+Picks the session's TTS provider without blocking session start:
+1. resume/clear/compact keep the mode the session already had
+2. otherwise the mode remembered for this project or directory
+3. otherwise session.default_mode, and the selection dialog opens in a
+   detached process; the answer is applied to session state when it
+   comes in and remembered for the project (session.remember_choice)
+
+Without a dialog (Linux without zenity/kdialog) the user is pointed to
+the terminal selector, utils/tts_dialog.py select. The announcement is
+spoken by the detached process too.
+
+A new session also takes the capability snapshot (capabilities.py) that
+later hooks use instead of probing keys, models and binaries again; the
+detached process probes, so the hook itself never pays for it.
 
 Providers:
 - Kokoro: Local neural TTS (free, fast, 82M parameters)
@@ -20,7 +34,9 @@ Providers:
 """
 
 import json
+import os
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 
@@ -29,6 +45,8 @@ HOOKS_DIR = Path(__file__).parent.parent
 UTILS_DIR = HOOKS_DIR / "utils"
 sys.path.insert(0, str(UTILS_DIR))
 
+import tts_metrics
+
 DEBUG_LOG = Path("/tmp/claude-tts-debug.log")
 
 
@@ -49,6 +67,26 @@ def load_config() -> dict:
     return {}
 
 
+def choose_mode(input_data: dict, session_config: dict) -> tuple:
+    """Pick the mode to start with, without asking.
+
+    Returns:
+        (mode, origin) with origin "resumed", "remembered" or "default"
+    """
+    from session_state import TTS_MODES, get_remembered_mode, get_session_state
+
+    state = get_session_state()
+    session_id = input_data.get("session_id")
+    if (input_data.get("source", "startup") != "startup" and session_id
+            and state.get("session_id") == str(session_id) and state.get("tts_mode") in TTS_MODES):
+        return state["tts_mode"], "resumed"
+    if session_config.get("remember_choice", "project") != "off":
+        mode = get_remembered_mode(input_data.get("cwd") or os.getcwd())
+        if mode:
+            return mode, "remembered"
+    return session_config.get("default_mode", "off"), "default"
+
+
 def get_context_message(tts_mode: str, config: dict) -> str:
     """Get context message for Claude based on TTS mode."""
     voices = config.get("voices", {}).get("assistant", {})
@@ -75,55 +113,78 @@ Speak summaries only. No code/paths in TTS."""
     return "TTS MODE: OFF. Work silently."
 
 
-def main():
+def main(config: dict = None, config_load_ms: float = 0.0):
     """Execute session start sequence."""
     log_debug("=== SESSION START HOOK TRIGGERED ===")
+    # The hook's run includes loading the config, done before main() when passed in
+    hook_start = time.perf_counter() - config_load_ms / 1000
+    tts_metrics.set_context(hook="session_start")
 
     try:
-        # Load config
-        config = load_config()
+        try:
+            input_data = json.loads(sys.stdin.read() or "{}")
+        except json.JSONDecodeError:
+            input_data = {}
+
+        # Load config (run as a hook, it was loaded for the profiler switch)
+        if config is None:
+            with tts_metrics.timed("config_load"):
+                config = load_config()
+        else:
+            tts_metrics.record("config_load", config_load_ms)
         session_config = config.get("session", {})
 
         # Import utilities
-        from tts_dialog import select_tts_mode
-        from session_state import save_tts_mode, save_session_start
+        from session_state import save_session_start, save_tts_mode, set_session_id
+        import tts_dialog
 
-        # Show TTS mode selection dialog
-        if session_config.get("show_dialog", True):
-            tts_mode = select_tts_mode(
-                timeout=session_config.get("dialog_timeout", 15),
-                default=session_config.get("default_mode", "off"),
-                log_file=DEBUG_LOG
-            )
-        else:
-            tts_mode = session_config.get("default_mode", "off")
+        session_id = input_data.get("session_id")
+        set_session_id(session_id)
+        if session_id:
+            tts_metrics.set_context(session=str(session_id))
+        cwd = input_data.get("cwd") or os.getcwd()
 
-        # Save to session state
+        # Apply a mode right away; asking happens in the background
+        tts_mode, origin = choose_mode(input_data, session_config)
         save_tts_mode(tts_mode)
-        save_session_start()
-
-        log_debug(f"TTS mode selected: {tts_mode}")
-
-        # Optional: Speak announcement if TTS enabled
-        if tts_mode != "off":
-            hooks_config = config.get("hooks", {}).get("session_start", {})
-            if hooks_config.get("speak_announcement", True):
-                try:
-                    from tts_router import speak
-                    announcement = f"TTS enabled. Using {tts_mode} mode."
-                    speak("system", announcement, mode=tts_mode)
-                except Exception as e:
-                    log_debug(f"Announcement failed: {e}")
+        if origin != "resumed":
+            save_session_start()
+        log_debug(f"TTS mode {tts_mode} ({origin})")
+
+        ask = origin == "default" and session_config.get("show_dialog", True)
+        hooks_config = config.get("hooks", {}).get("session_start", {})
+        announce = origin != "resumed" and hooks_config.get("speak_announcement", True)
+        system_message = None
+        if ask and not tts_dialog.dialog_available():
+            ask = False
+            system_message = (f"TTS mode: {tts_mode}. Choose a provider with: "
+                              f"python3 {UTILS_DIR / 'tts_dialog.py'} select")
+        # New sessions probe providers, players and keys in the background;
+        # later hooks read the snapshot (or build it if they get there first)
+        probe = origin != "resumed"
+        if ask or probe or (announce and tts_mode != "off"):
+            tts_dialog.select_async(
+                session_id, cwd, dialog=ask, mode=tts_mode,
+                timeout=session_config.get("dialog_timeout", 15),
+                scope=session_config.get("remember_choice", "project"),
+                announce=announce, probe=probe,
+            )
 
         # Build output
         context_text = get_context_message(tts_mode, config)
+        if ask:
+            context_text += "\nThe user is still choosing a TTS provider; the mode may change."
         output = {
             "hookSpecificOutput": {
                 "hookEventName": "SessionStart",
                 "additionalContext": context_text
             }
         }
+        if system_message:
+            output["systemMessage"] = system_message
 
+        tts_metrics.record("hook", (time.perf_counter() - hook_start) * 1000,
+                           provider=tts_mode, origin=origin)
         log_debug("=== SESSION START HOOK COMPLETED ===")
         print(json.dumps(output))
 
@@ -133,4 +194,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import hook_profiler
+    # Loaded before profiling starts, since it holds the switch
+    load_start = time.perf_counter()
+    config = load_config()
+    config_load_ms = (time.perf_counter() - load_start) * 1000
+    hook_profiler.run(lambda: main(config, config_load_ms), "session_start", config)
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 # /// script
-# requires-python = ">=3.10,<3.13"
+# requires-python = ">=3.11,<3.13"
 # dependencies = [
 #     "kokoro-onnx",
-#     "soundfile",
+#     "numpy",
 #     "openai",
 #     "requests",
+#     "sounddevice",
 # ]
 # ///
 """
@@ -20,14 +21,26 @@ TTS Modes:
 
 Flow:
 1. Read Claude's last response from transcript.
-2. Clean text for natural speech.
-3. Speak via configured TTS engine.
+2. With speech_mode "summary", keep only its gist (speech_summary).
+3. Clean text for natural speech.
+4. Speak via the TTS daemon if running, else the configured TTS engine.
+
+Speech is registered with playback_registry, so submitting the next
+prompt cuts it off (barge-in), and recorded in speech_history for
+replay with scripts/tts-replay.py.
+
+With watcher.enabled, transcript_watcher has been speaking the reply
+while it was written; this hook only waits for it to take the last
+lines, and speaks whatever it did not take (it never speaks text twice).
+
+Providers the capability snapshot marks unusable (no API key, no Kokoro
+models) are skipped without importing them.
 """
 
 import json
 import os
-import re
 import sys
+import time
 from pathlib import Path
 
 # Add utils to path
@@ -35,159 +48,9 @@ HOOKS_DIR = Path(__file__).parent.parent
 UTILS_DIR = HOOKS_DIR / "utils"
 sys.path.insert(0, str(UTILS_DIR))
 
-
-def _shorten_path(match: re.Match) -> str:
-    """Convert file path to speakable short form.
-
-    /Users/nick/.claude/hooks/tts_config.json
-    -> "tts config dot json in the hooks folder"
-    """
-    path = match.group(0)
-    parts = [p for p in path.split('/') if p]
-    if len(parts) >= 2:
-        filename = parts[-1]
-        folder = parts[-2]
-        # Make extension speakable
-        filename = re.sub(r'\.([a-z]+)$', r' dot \1', filename)
-        # Replace underscores and hyphens with spaces
-        filename = filename.replace('_', ' ').replace('-', ' ')
-        folder = folder.replace('_', ' ').replace('-', ' ')
-        return f"{filename} in the {folder} folder"
-    elif len(parts) == 1:
-        filename = parts[0]
-        filename = re.sub(r'\.([a-z]+)$', r' dot \1', filename)
-        return filename.replace('_', ' ').replace('-', ' ')
-    return ""
-
-
-def _shorten_url(match: re.Match) -> str:
-    """Convert URL to speakable short form.
-
-    https://github.com/anthropics/claude-code/issues
-    -> "github dot com"
-    """
-    url = match.group(0)
-    domain_match = re.search(r'https?://([^/]+)', url)
-    if domain_match:
-        domain = domain_match.group(1)
-        domain = re.sub(r'^www\.', '', domain)
-        # Make dots speakable
-        domain = domain.replace('.', ' dot ')
-        return domain
-    return "a link"
-
-
-def _clean_inline_code(match: re.Match) -> str:
-    """Clean inline code for speech."""
-    code = match.group(1)
-    return code.replace('_', ' ')
-
-
-def clean_text_for_speech(text: str) -> str:
-    """Clean text for natural speech output.
-
-    Converts technical elements to speakable form.
-    """
-    # Convert file extensions to speakable form
-    text = re.sub(r'\.([a-zA-Z]{1,5})\b', r' dot \1', text)
-
-    # Make decimal numbers speakable
-    text = re.sub(r'(\d+)\.(\d+)', r'\1 point \2', text)
-
-    # Convert tilde to "home" for home directory paths
-    text = re.sub(r'~/', 'home slash ', text)
-
-    # Convert path slashes to spaces
-    text = re.sub(r'([a-zA-Z0-9])/([a-zA-Z0-9])', r'\1 \2', text)
-
-    # Convert leading dots to "dot " for hidden files
-    text = re.sub(r'(?<![a-zA-Z0-9])\.([a-zA-Z])', r'dot \1', text)
-
-    # Convert hyphens in names to spaces
-    text = re.sub(r'([a-zA-Z0-9])-([a-zA-Z0-9])', r'\1 \2', text)
-
-    # Convert em/en dashes to commas
-    text = re.sub(r'\s*[—–]\s*', ', ', text)
-
-    # Convert arrows to "to"
-    text = re.sub(r'\s*→\s*', ' to ', text)
-    text = re.sub(r'\s*->\s*', ' to ', text)
-
-    # Expand data size abbreviations
-    text = re.sub(r'\b(\d+(?:\s+point\s+\d+)?)\s*KB\b', r'\1 kilobytes', text, flags=re.IGNORECASE)
-    text = re.sub(r'\b(\d+(?:\s+point\s+\d+)?)\s*MB\b', r'\1 megabytes', text, flags=re.IGNORECASE)
-    text = re.sub(r'\b(\d+(?:\s+point\s+\d+)?)\s*GB\b', r'\1 gigabytes', text, flags=re.IGNORECASE)
-    text = re.sub(r'\b(\d+(?:\s+point\s+\d+)?)\s*TB\b', r'\1 terabytes', text, flags=re.IGNORECASE)
-
-    # Convert comma-separated numbers to words
-    def _number_to_words(match: re.Match) -> str:
-        num_str = match.group(0).replace(',', '')
-        try:
-            num = int(num_str)
-            if num == 0:
-                return "zero"
-
-            ones = ["", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
-                    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
-                    "seventeen", "eighteen", "nineteen"]
-            tens = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
-
-            def _under_hundred(n):
-                if n < 20:
-                    return ones[n]
-                elif n < 100:
-                    return tens[n // 10] + (" " + ones[n % 10] if n % 10 else "")
-                return ""
-
-            def _under_thousand(n):
-                if n < 100:
-                    return _under_hundred(n)
-                return ones[n // 100] + " hundred" + (" and " + _under_hundred(n % 100) if n % 100 else "")
-
-            parts = []
-            if num >= 1000000:
-                parts.append(_under_thousand(num // 1000000) + " million")
-                num %= 1000000
-            if num >= 1000:
-                parts.append(_under_thousand(num // 1000) + " thousand")
-                num %= 1000
-            if num > 0:
-                if parts and num < 100:
-                    parts.append("and " + _under_hundred(num))
-                else:
-                    parts.append(_under_thousand(num))
-
-            return " ".join(parts)
-        except ValueError:
-            return match.group(0)
-
-    text = re.sub(r'\b\d{1,3}(?:,\d{3})+\b', _number_to_words, text)
-
-    # Replace code blocks with announcement
-    text = re.sub(r'```[\s\S]*?```', ' Code block omitted. ', text)
-    # Clean inline code
-    text = re.sub(r'`([^`]+)`', _clean_inline_code, text)
-    # Replace file paths with shortened speakable form
-    text = re.sub(r'/[a-zA-Z0-9\-_.\/]+(?:\.[a-z]+)?', _shorten_path, text)
-    # Replace URLs with shortened speakable form
-    text = re.sub(r'https?://\S+', _shorten_url, text)
-    # Remove markdown bold/italic but keep text
-    text = re.sub(r'\*+([^*]+)\*+', r'\1', text)
-    # Remove markdown headers
-    text = re.sub(r'^#+\s*', '', text, flags=re.MULTILINE)
-    # Remove markdown links but keep text
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-    # Remove list dashes at start of lines
-    text = re.sub(r'(?m)^\s*[-*]\s+', '', text)
-    # Remove table formatting
-    text = re.sub(r'\|[^\n]+\|', '', text)
-    text = re.sub(r'[-|]+\n', '', text)
-    # Clean up multiple spaces
-    text = re.sub(r' +', ' ', text)
-    # Clean up multiple newlines
-    text = re.sub(r'\n\s*\n+', '\n', text)
-
-    return text.strip()
+import capabilities
+import tts_metrics
+from text_normalizer import clean_text_for_speech
 
 
 def load_config() -> dict:
@@ -209,13 +72,38 @@ def get_voice_config(config: dict) -> dict:
         "voice_id": voice_config.get("elevenlabs_voice_id"),
         "openai_voice": voice_config.get("openai_voice", "onyx"),
         "macos_voice": voice_config.get("macos_voice", "Samantha"),
+        "espeak_voice": voice_config.get("espeak_voice", "en-us"),
         "speed": voice_config.get("speed", 1.0),
         "volume": voice_config.get("volume", 1.0),
     }
 
 
+def speak_fallback(text: str, voice_config: dict) -> bool:
+    """Speak text with the local fallback: macOS say, or espeak-ng off macOS."""
+    try:
+        if sys.platform == "darwin":
+            import macos_say
+            return macos_say.speak(
+                text,
+                voice_config.get("macos_voice", "Samantha"),
+                voice_config.get("speed", 1.0),
+                volume=voice_config.get("volume", 1.0)
+            )
+        import espeak_tts
+        return espeak_tts.speak(
+            text,
+            voice=voice_config.get("espeak_voice", "en-us"),
+            speed=voice_config.get("speed", 1.0),
+            volume=voice_config.get("volume", 1.0)
+        )
+    except Exception:
+        return False
+
+
 def speak_kokoro(text: str, voice_config: dict) -> bool:
-    """Speak text using Kokoro with macOS fallback."""
+    """Speak text using Kokoro with local fallback."""
+    if not capabilities.usable("kokoro"):
+        return speak_fallback(text, voice_config)
     try:
         import kokoro_tts
         success = kokoro_tts.speak(
@@ -229,20 +117,13 @@ def speak_kokoro(text: str, voice_config: dict) -> bool:
     except Exception:
         pass
 
-    # Fallback to macOS
-    try:
-        import macos_say
-        return macos_say.speak(
-            text,
-            voice_config.get("macos_voice", "Samantha"),
-            voice_config.get("speed", 1.0)
-        )
-    except Exception:
-        return False
+    return speak_fallback(text, voice_config)
 
 
 def speak_elevenlabs(text: str, voice_config: dict) -> bool:
-    """Speak text using ElevenLabs with macOS fallback."""
+    """Speak text using ElevenLabs with Kokoro (rate limited) or local fallback."""
+    if not capabilities.usable("elevenlabs"):
+        return speak_fallback(text, voice_config)
     try:
         import elevenlabs_tts
         if voice_config.get("voice_id"):
@@ -250,48 +131,44 @@ def speak_elevenlabs(text: str, voice_config: dict) -> bool:
                 text,
                 voice_config.get("voice_id"),
                 speed=voice_config.get("speed", 1.0),
+                volume=voice_config.get("volume", 1.0),
             )
             if success:
                 return True
     except Exception:
         pass
 
-    # Fallback to macOS
-    try:
-        import macos_say
-        return macos_say.speak(
-            text,
-            voice_config.get("macos_voice", "Samantha"),
-            voice_config.get("speed", 1.0)
-        )
-    except Exception:
-        return False
+    # Over the rate limit: local Kokoro (then the local fallback) instead
+    import rate_limiter
+    if rate_limiter.overflow_mode("elevenlabs") == "kokoro":
+        return speak_kokoro(text, voice_config)
+
+    return speak_fallback(text, voice_config)
 
 
 def speak_openai(text: str, voice_config: dict) -> bool:
-    """Speak text using OpenAI TTS with macOS fallback."""
+    """Speak text using OpenAI TTS with Kokoro (rate limited) or local fallback."""
+    if not capabilities.usable("openai"):
+        return speak_fallback(text, voice_config)
     try:
         import openai_tts
         success = openai_tts.speak(
             text,
             voice=voice_config.get("openai_voice", "onyx"),
-            speed=voice_config.get("speed", 1.0)
+            speed=voice_config.get("speed", 1.0),
+            volume=voice_config.get("volume", 1.0)
         )
         if success:
             return True
     except Exception:
         pass
 
-    # Fallback to macOS
-    try:
-        import macos_say
-        return macos_say.speak(
-            text,
-            voice_config.get("macos_voice", "Samantha"),
-            voice_config.get("speed", 1.0)
-        )
-    except Exception:
-        return False
+    # Over the rate limit: local Kokoro (then the local fallback) instead
+    import rate_limiter
+    if rate_limiter.overflow_mode("openai") == "kokoro":
+        return speak_kokoro(text, voice_config)
+
+    return speak_fallback(text, voice_config)
 
 
 def extract_last_response(transcript_path: str) -> str:
@@ -328,10 +205,18 @@ def extract_last_response(transcript_path: str) -> str:
         return ""
 
 
-def main():
+def main(config: dict = None, config_load_ms: float = 0.0):
     """Handle stop event - extract Claude's response and speak it."""
-    # Load config
-    config = load_config()
+    # The hook's run includes loading the config, done before main() when passed in
+    hook_start = time.perf_counter() - config_load_ms / 1000
+    tts_metrics.set_context(hook="stop")
+
+    # Load config (run as a hook, it was loaded for the profiler switch)
+    if config is None:
+        with tts_metrics.timed("config_load"):
+            config = load_config()
+    else:
+        tts_metrics.record("config_load", config_load_ms)
     hook_config = config.get("hooks", {}).get("stop", {})
 
     # Check if Stop hook is enabled
@@ -351,6 +236,10 @@ def main():
         input_data = json.loads(sys.stdin.read())
     except json.JSONDecodeError:
         input_data = {}
+    if input_data.get("session_id"):
+        from session_state import set_session_id
+        set_session_id(input_data["session_id"])
+        tts_metrics.set_context(session=str(input_data["session_id"]))
 
     # Silent mode - exit early
     if tts_mode == "off":
@@ -374,18 +263,75 @@ def main():
     if transcript_path:
         transcript_path = os.path.expanduser(transcript_path)
 
-    # Extract Claude's last response
-    last_response = extract_last_response(transcript_path)
+    # Live mode: hand the end of the reply to the watcher
+    unclaimed = None
+    if transcript_path and input_data.get("session_id"):
+        import transcript_watcher
+        if transcript_watcher.enabled():
+            session = str(input_data["session_id"])
+            with tts_metrics.timed("watch_flush") as stage:
+                stage["handed_off"] = transcript_watcher.finish(session, transcript_path)
+            if stage["handed_off"]:
+                print(json.dumps({"status": "success", "spoke": "watcher"}))
+                return
+            unclaimed = transcript_watcher.claim(session, transcript_path)
+
+    # Extract Claude's last response (or what the watcher left)
+    with tts_metrics.timed("transcript_read") as stage:
+        if unclaimed is None:
+            last_response = extract_last_response(transcript_path)
+        else:
+            last_response = "\n\n".join(text for kind, text in unclaimed if kind == "text")
+        stage["text_len"] = len(last_response)
 
     if not last_response:
         print(json.dumps({"status": "success", "reason": "no_response"}))
         return
 
+    # Summary mode: only the gist of a long reply goes to the provider
+    # (not with the watcher, which speaks blocks in full as they land)
+    if unclaimed is None and hook_config.get("speech_mode", "full") == "summary":
+        import speech_summary
+        with tts_metrics.timed("summarize") as stage:
+            stage["text_len"] = len(last_response)
+            summary = speech_summary.summarize(
+                last_response, hook_config.get("summary_max_chars", speech_summary.DEFAULT_MAX_CHARS))
+            # Never trade a reply for silence
+            if summary.strip():
+                last_response = summary
+            stage["summary_len"] = len(last_response)
+
     # Clean and speak the response
-    text_to_speak = clean_text_for_speech(last_response)
-    result = speak(text_to_speak)
+    with tts_metrics.timed("text_clean") as stage:
+        text_to_speak = clean_text_for_speech(last_response)
+        stage["text_len"] = len(text_to_speak)
+    if not text_to_speak.strip():
+        print(json.dumps({"status": "success", "reason": "nothing_to_speak"}))
+        return
+    # Prefer the warm daemon; fall back to speaking in-process
+    result = None
+    try:
+        import tts_daemon
+        result = tts_daemon.speak("assistant", text_to_speak, tts_mode, hook="stop")
+    except Exception:
+        pass
+    if result is None:
+        # Registered so the next prompt can cut this reply off (barge-in)
+        import playback_registry
+        import speech_history
+        with playback_registry.utterance(text_to_speak):
+            # Stored per turn for scripts/tts-replay.py
+            with speech_history.recording(text_to_speak, provider=tts_mode):
+                result = speak(text_to_speak)
+    tts_metrics.record("hook", (time.perf_counter() - hook_start) * 1000,
+                       provider=tts_mode, text_len=len(text_to_speak))
     print(json.dumps({"status": "success", "spoke": result}))
 
 
 if __name__ == "__main__":
-    main()
+    import hook_profiler
+    # Loaded before profiling starts, since it holds the switch
+    load_start = time.perf_counter()
+    config = load_config()
+    config_load_ms = (time.perf_counter() - load_start) * 1000
+    hook_profiler.run(lambda: main(config, config_load_ms), "stop", config)
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 # /// script
-# requires-python = ">=3.10,<3.13"
+# requires-python = ">=3.11,<3.13"
 # dependencies = [
 #     "kokoro-onnx",
-#     "soundfile",
 #     "numpy",
+#     "openai",
+#     "requests",
+#     "sounddevice",
 # ]
 # ///
 """
@@ -15,12 +17,17 @@ Configuration via tts_config.json:
 - hooks.user_prompt_submit.enabled: Enable/disable this hook
 - hooks.user_prompt_submit.phrases: List of acknowledgment phrases
 - voices.system: Voice configuration for acknowledgments
+
+First cancels any reply still being spoken for this session (barge-in,
+see barge_in in tts_config.json), then warms up the TTS daemon for the
+session's mode (non-blocking), so the Stop hook finds the model loaded
+or the connection open. With watcher.enabled, also makes sure the
+session's transcript watcher is running, so the reply is spoken while
+it is written.
 """
 import json
-import os
 import sys
-import tempfile
-import subprocess
+import time
 import random
 from pathlib import Path
 
@@ -29,6 +36,10 @@ HOOKS_DIR = Path(__file__).parents[1]
 UTILS_DIR = HOOKS_DIR / "utils"
 sys.path.insert(0, str(UTILS_DIR))
 
+import capabilities
+import playback_registry
+import tts_metrics
+
 # Default phrases if not configured
 DEFAULT_PHRASES = [
     "Roger.", "Copy.", "On it.", "Understood.", "Working on it.",
@@ -49,11 +60,20 @@ def load_config():
     return {}
 
 
-def speak_macos(phrase: str, voice: str = "Samantha"):
+def speak_macos(phrase: str, voice: str = "Samantha", volume: float = 0.8):
     """Speak using macOS native TTS."""
     try:
-        subprocess.run(["say", "-v", voice, phrase], check=True, capture_output=True)
-        return True
+        import macos_say
+        return macos_say.speak(phrase, voice, volume=volume)
+    except Exception:
+        return False
+
+
+def speak_espeak(phrase: str, voice: str = "en-us", speed: float = 1.2, volume: float = 0.8):
+    """Speak using espeak-ng (local fallback off macOS)."""
+    try:
+        import espeak_tts
+        return espeak_tts.speak(phrase, voice=voice, speed=speed, volume=volume)
     except Exception:
         return False
 
@@ -62,29 +82,32 @@ def speak_kokoro(phrase: str, voice: str = "af_sky", speed: float = 1.2, volume:
     """Speak using Kokoro local TTS."""
     try:
         import kokoro_tts
-        import soundfile as sf
-        import numpy as np
+        import audio_output
 
-        kokoro = kokoro_tts.get_kokoro()
-        if not kokoro:
+        result = kokoro_tts.create(phrase, voice=voice, speed=speed)
+        if result is None:
             return False
+        samples, sample_rate = result
 
-        samples, sample_rate = kokoro.create(phrase, voice=voice, speed=speed)
-        # Apply volume adjustment
-        samples = samples * volume
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, samples, sample_rate)
-            temp_path = f.name
-
-        subprocess.run(["afplay", temp_path], check=True, capture_output=True)
-        os.remove(temp_path)
-        return True
+        return audio_output.play_pcm(samples, sample_rate, volume=volume)
     except Exception:
         return False
 
 
-def main():
+def main(config: dict = None, config_load_ms: float = 0.0):
+    # The hook's run includes loading the config, done before main() when passed in
+    hook_start = time.perf_counter() - config_load_ms / 1000
+    tts_metrics.set_context(hook="user_prompt_submit")
+
+    try:
+        input_data = json.loads(sys.stdin.read() or "{}")
+    except json.JSONDecodeError:
+        input_data = {}
+    if input_data.get("session_id"):
+        from session_state import set_session_id
+        set_session_id(input_data["session_id"])
+        tts_metrics.set_context(session=str(input_data["session_id"]))
+
     # Check TTS mode
     try:
         from session_state import get_tts_mode
@@ -102,8 +125,33 @@ def main():
         }))
         return
 
-    # Load config
-    config = load_config()
+    # Barge-in: the user moved on, so stop the previous reply first
+    try:
+        with tts_metrics.timed("barge_in") as stage:
+            stage["cancelled"] = playback_registry.request_cancel()
+    except Exception as e:
+        print(f"Barge-in failed: {e}", file=sys.stderr)
+
+    # Live mode: speak the reply as it lands in the transcript
+    try:
+        import transcript_watcher
+        transcript_watcher.ensure_running(input_data.get("session_id"), input_data.get("transcript_path"))
+    except Exception as e:
+        print(f"Transcript watcher failed: {e}", file=sys.stderr)
+
+    # Warm up for the Stop hook while Claude is thinking (non-blocking)
+    try:
+        import tts_daemon
+        tts_daemon.warmup(mode)
+    except Exception:
+        tts_daemon = None
+
+    # Load config (run as a hook, it was loaded for the profiler switch)
+    if config is None:
+        with tts_metrics.timed("config_load"):
+            config = load_config()
+    else:
+        tts_metrics.record("config_load", config_load_ms)
     hook_config = config.get("hooks", {}).get("user_prompt_submit", {})
 
     # Check if hook is enabled
@@ -117,19 +165,32 @@ def main():
     voice_config = config.get("voices", {}).get("system", {})
     kokoro_voice = voice_config.get("kokoro_voice", "af_nicole")
     speed = voice_config.get("speed", 1.2)
+    volume = voice_config.get("volume", 0.8)
     macos_voice = voice_config.get("macos_voice", "Samantha")
+    espeak_voice = voice_config.get("espeak_voice", "en-us")
 
     # Select random phrase
     phrase = random.choice(phrases) if phrases else "Acknowledged."
 
     # Speak using appropriate provider
     spoke = False
-    if mode == "kokoro":
-        spoke = speak_kokoro(phrase, voice=kokoro_voice, speed=speed)
-
-    # Fallback to macOS
-    if not spoke:
-        speak_macos(phrase, voice=macos_voice)
+    handled = None
+    if mode == "kokoro" and tts_daemon:
+        # The daemon has the phrase pre-rendered and falls back to local TTS itself
+        handled = tts_daemon.speak("system", phrase, mode, hook="user_prompt_submit")
+        spoke = handled is not None
+
+    if handled is None:
+        with playback_registry.utterance(phrase):
+            if mode == "kokoro" and capabilities.usable("kokoro"):
+                spoke = speak_kokoro(phrase, voice=kokoro_voice, speed=speed, volume=volume)
+            # Fallback to macOS say (espeak-ng elsewhere)
+            if not spoke and sys.platform == "darwin":
+                speak_macos(phrase, voice=macos_voice, volume=volume)
+            elif not spoke:
+                speak_espeak(phrase, voice=espeak_voice, speed=speed, volume=volume)
+    tts_metrics.record("hook", (time.perf_counter() - hook_start) * 1000,
+                       provider=mode, text_len=len(phrase))
 
     # Output success
     print(json.dumps({
@@ -142,4 +203,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import hook_profiler
+    # Loaded before profiling starts, since it holds the switch
+    load_start = time.perf_counter()
+    config = load_config()
+    config_load_ms = (time.perf_counter() - load_start) * 1000
+    hook_profiler.run(lambda: main(config, config_load_ms), "user_prompt_submit", config)
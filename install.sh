@@ -57,59 +57,70 @@ if [ -f "$HOOKS_DIR/tts_config.json" ]; then
 fi
 cp "$SCRIPT_DIR/config/tts_config.json" "$HOOKS_DIR/"
 
+# Build the shared hook runtime
+# One locked environment for all hooks, so each hook event starts the
+# interpreter directly instead of `uv run` resolving the PEP 723 metadata.
+RUNTIME_DIR="$HOOKS_DIR/.venv"
+RUNTIME_PYTHON="3.12"
+RUNTIME_LOCK="$HOOKS_DIR/hook-requirements.lock"
+echo -e "${BLUE}Building hook runtime (Python $RUNTIME_PYTHON)...${NC}"
+if uv venv --quiet --allow-existing --python "$RUNTIME_PYTHON" "$RUNTIME_DIR" \
+    && uv pip compile --quiet --python-version "$RUNTIME_PYTHON" \
+        "$SCRIPT_DIR/config/hook-requirements.txt" -o "$RUNTIME_LOCK" \
+    && uv pip sync --quiet --compile-bytecode --python "$RUNTIME_DIR/bin/python" "$RUNTIME_LOCK"; then
+    "$RUNTIME_DIR/bin/python" -m compileall -q "$HOOKS_DIR/utils"
+    HOOK_RUNNER="\$HOME/.claude/hooks/.venv/bin/python"
+    echo -e "${GREEN}  Hook runtime ready: $RUNTIME_DIR${NC}"
+else
+    HOOK_RUNNER="uv run"
+    echo -e "${YELLOW}  Could not build the hook runtime; hooks will use 'uv run'${NC}"
+fi
+
 # Update settings.local.json
 echo -e "${BLUE}Updating Claude Code settings...${NC}"
 
-if [ -f "$SETTINGS_FILE" ]; then
-    echo -e "${YELLOW}  settings.local.json exists, merging hooks...${NC}"
-
-    # Create a Python script to merge JSON
-    python3 << 'PYTHON_SCRIPT'
+# Existing TTS hook entries are replaced, so reinstalling switches their runner
+python3 - "$SCRIPT_DIR" "$HOOK_RUNNER" << 'PYTHON_SCRIPT'
 import json
 import sys
 from pathlib import Path
 
 settings_file = Path.home() / ".claude" / "settings.local.json"
-template_file = Path(sys.argv[1] if len(sys.argv) > 1 else ".") / "config" / "settings.local.json.template"
+template_file = Path(sys.argv[1]) / "config" / "settings.local.json.template"
+runner = sys.argv[2]
+template_runner = "$HOME/.claude/hooks/.venv/bin/python"
+# Installed hook paths; other hooks, even with similar file names, are kept
+tts_hooks = ["hooks/SessionStart/01-tts-init.py", "hooks/UserPromptSubmit/01-acknowledge.py",
+             "hooks/Stop/01-tts-response.py", "hooks/PreCompact/01-announce.py"]
 
 # Load existing settings
-with open(settings_file) as f:
-    settings = json.load(f)
+settings = {}
+if settings_file.exists():
+    with open(settings_file) as f:
+        settings = json.load(f)
 
 # Load template hooks
 with open(template_file) as f:
     template = json.load(f)
 
 # Merge hooks
-if "hooks" not in settings:
-    settings["hooks"] = {}
-
+settings.setdefault("hooks", {})
 for hook_name, hook_config in template.get("hooks", {}).items():
-    if hook_name not in settings["hooks"]:
-        settings["hooks"][hook_name] = hook_config
-    else:
-        # Check if this hook is already installed
-        existing = settings["hooks"][hook_name]
-        new_commands = [h.get("command", "") for h in hook_config]
-        existing_commands = [h.get("command", "") for h in existing]
-
-        for i, cmd in enumerate(new_commands):
-            if cmd not in existing_commands:
-                existing.append(hook_config[i])
-
-        settings["hooks"][hook_name] = existing
+    existing = [
+        h for h in settings["hooks"].get(hook_name, [])
+        if not any(path in h.get("command", "") for path in tts_hooks)
+    ]
+    for hook in hook_config:
+        existing.append({**hook, "command": hook["command"].replace(template_runner, runner)})
+    settings["hooks"][hook_name] = existing
 
 # Write updated settings
 with open(settings_file, "w") as f:
     json.dump(settings, f, indent=2)
     f.write("\n")
 
-print("  Settings merged successfully")
+print(f"  Hooks run with: {runner}")
 PYTHON_SCRIPT
-else
-    echo -e "${GREEN}  Creating new settings.local.json...${NC}"
-    cp "$SCRIPT_DIR/config/settings.local.json.template" "$SETTINGS_FILE"
-fi
 
 # Make scripts executable
 chmod +x "$HOOKS_DIR/SessionStart/"*.py
@@ -129,6 +140,9 @@ echo "  ~/.claude/hooks/Stop/01-tts-response.py"
 echo "  ~/.claude/hooks/PreCompact/01-announce.py"
 echo "  ~/.claude/hooks/utils/*.py"
 echo "  ~/.claude/hooks/tts_config.json"
+echo "  ~/.claude/hooks/.venv (hook runtime)"
+echo ""
+echo "Compare hook startup with: python3 $SCRIPT_DIR/scripts/bench-hook-startup.py"
 echo ""
 
 # Optional: Install Kokoro models
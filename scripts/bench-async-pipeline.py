@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compare the blocking and asyncio speech pipelines against the mock server.
+
+Speaks the same reply through tts_router.speak() (one request, played
+when complete) and tts_router.speak_async() (one request per sentence
+chunk, later chunks downloading while earlier ones play), then several
+sessions at once: sequential speak() calls vs one asyncio.gather().
+
+Audio goes to the realtime sink, so playback takes as long as on a
+device; the capture timeline gives the time to the first buffer.
+
+Reports per run:
+- time to first audio (run start to the first buffer reaching the sink)
+- wall time
+- buffers played
+
+Usage:
+    python3 scripts/bench-async-pipeline.py [--mode elevenlabs] [--sessions 4]
+    python3 scripts/bench-async-pipeline.py --mock-args "--first-byte-ms 400 --throughput-kbps 256"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+REPLY = ("The build is green again. I fixed the import cycle in the router and "
+         "moved the shared helpers into their own module. Next, I will update the "
+         "documentation and add a note to the changelog. The release notes mention "
+         "the new asynchronous pipeline, and the benchmark numbers are in the report. "
+         "Let me know if you want me to open the pull request now.")
+
+
+def start_mock(mock_args: str, log_path: Path):
+    """Start the mock cloud server on a free port; returns (process, base_url)."""
+    cmd = [sys.executable, str(REPO_DIR / "scripts" / "mock-tts-server.py"), "--port", "0",
+           *shlex.split(mock_args)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=open(log_path, "w"), text=True)
+    match = re.search(r"http://\S+", proc.stdout.readline())
+    if not match:
+        proc.kill()
+        raise RuntimeError("Mock server failed to start")
+    return proc, match.group(0)
+
+
+def measure(name: str, capture: Path, run) -> dict:
+    """Run one pipeline and read its buffers back from the timeline."""
+    import audio_sink
+
+    started = time.time()
+    ok = run()
+    wall = time.time() - started
+    entries = [e for e in audio_sink.read_timeline(capture) if e["ts"] >= started]
+    return {
+        "run": name,
+        "ok": bool(ok),
+        "first_audio_ms": round((entries[0]["ts"] - started) * 1000) if entries else None,
+        "wall_ms": round(wall * 1000),
+        "buffers": len(entries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blocking vs asyncio speech pipeline")
+    parser.add_argument("--mode", default="elevenlabs", choices=["elevenlabs", "openai", "kokoro"])
+    parser.add_argument("--sessions", type=int, default=3, help="Concurrent sessions in the second run")
+    parser.add_argument("--prefetch", type=int, default=1, help="Chunks synthesized ahead of playback")
+    parser.add_argument("--mock-args", default="--first-byte-ms 300 --seconds-per-char 0.01 --throughput-kbps 1000",
+                        help="Extra args for mock-tts-server.py (cloud modes)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="tts-async-bench-"))
+    capture = root / "capture"
+    os.environ.update(CLAUDE_TTS_SINK="realtime", CLAUDE_TTS_CAPTURE_DIR=str(capture),
+                      CLAUDE_TTS_STATE_FILE=str(root / "state.json"),
+                      CLAUDE_TTS_PLAYBACK_REGISTRY=str(root / "playback.json"),
+                      CLAUDE_TTS_RATE_LIMITS=str(root / "ratelimit.json"),
+                      CLAUDE_TTS_METRICS="0")
+    mock = None
+    if args.mode != "kokoro":
+        mock, base_url = start_mock(args.mock_args, root / "mock.log")
+        os.environ.update(ELEVENLABS_BASE_URL=base_url, ELEVENLABS_API_KEY="mock",
+                          OPENAI_BASE_URL=f"{base_url}/v1", OPENAI_API_KEY="mock")
+
+    # After the environment is set: these read it at import
+    sys.path.insert(0, str(REPO_DIR / "utils"))
+    import capabilities
+    import playback_registry
+    import tts_router
+
+    def speak(session: str) -> bool:
+        with playback_registry.utterance(REPLY, session=session):
+            return tts_router.speak("assistant", REPLY, mode=args.mode)
+
+    async def speak_all(sessions: list) -> bool:
+        results = await asyncio.gather(*(
+            tts_router.speak_async("assistant", REPLY, mode=args.mode, session=session,
+                                   prefetch=args.prefetch)
+            for session in sessions
+        ))
+        return all(results)
+
+    sessions = [f"bench-{i}" for i in range(args.sessions)]
+    try:
+        capabilities.refresh()
+        results = [
+            measure("blocking", capture, lambda: speak("bench")),
+            measure("async", capture, lambda: asyncio.run(speak_all(["bench"]))),
+            measure(f"blocking x{args.sessions}", capture, lambda: all(speak(s) for s in sessions)),
+            measure(f"async x{args.sessions}", capture, lambda: asyncio.run(speak_all(sessions))),
+        ]
+    finally:
+        if mock is not None:
+            mock.kill()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"mode {args.mode}, {len(REPLY)} chars, prefetch {args.prefetch}\n")
+        print(f"  {'run':<14} {'ok':<4} {'1st audio':>9} {'wall':>7} {'bufs':>5}")
+        for r in results:
+            first = r["first_audio_ms"] if r["first_audio_ms"] is not None else "-"
+            print(f"  {r['run']:<14} {'yes' if r['ok'] else 'NO':<4} {first:>9} {r['wall_ms']:>7} {r['buffers']:>5}")
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
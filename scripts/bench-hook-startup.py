@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.11"
+# dependencies = []
+# ///
+"""
+Benchmark hook startup: `uv run` vs the pre-resolved hook runtime.
+
+Runs every installed hook the way Claude Code does, once per runner:
+- uv run: resolves and verifies the hook's PEP 723 environment per call
+- runtime: ~/.claude/hooks/.venv/bin/python, built by install.sh
+
+Hooks run with TTS off (an isolated session state file, no daemon, no
+metrics), so the wall time is interpreter start, dependency resolution
+and imports, i.e. the overhead added to every hook event.
+
+Usage: python3 scripts/bench-hook-startup.py [--runs 10] [--hooks-dir ~/.claude/hooks]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOOKS = {
+    "SessionStart": "SessionStart/01-tts-init.py",
+    "UserPromptSubmit": "UserPromptSubmit/01-acknowledge.py",
+    "Stop": "Stop/01-tts-response.py",
+    "PreCompact": "PreCompact/01-announce.py",
+}
+SESSION_ID = "bench-hook-startup"
+
+
+def run_hook(cmd: list, payload: dict, env: dict) -> float:
+    """Wall time of one hook invocation in ms (raises if it fails)."""
+    start = time.perf_counter()
+    subprocess.run(cmd, input=json.dumps(payload), text=True, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(cmd: list, payload: dict, env: dict, runs: int) -> list:
+    run_hook(cmd, payload, env)  # Warm the OS and uv caches
+    return [run_hook(cmd, payload, env) for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hook startup: uv run vs hook runtime")
+    parser.add_argument("--runs", type=int, default=10, help="Invocations per hook and runner")
+    parser.add_argument("--hooks-dir", type=Path, default=Path.home() / ".claude" / "hooks")
+    args = parser.parse_args()
+
+    runtime = args.hooks_dir / ".venv" / "bin" / "python"
+    runners = {}
+    if shutil.which("uv"):
+        runners["uv run"] = ["uv", "run", "--quiet"]
+    if runtime.exists():
+        runners["runtime"] = [str(runtime)]
+    if not runners:
+        sys.exit("Neither uv nor the hook runtime is available (run install.sh)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state = Path(tmp) / "state.json"
+        env = dict(os.environ, CLAUDE_TTS_STATE_FILE=str(state), CLAUDE_TTS_DAEMON="0",
+                   CLAUDE_TTS_METRICS="0", CLAUDE_TTS_PROJECT_MODES=str(Path(tmp) / "modes.json"),
+                   CLAUDE_TTS_PLAYBACK_REGISTRY=str(Path(tmp) / "registry.json"))
+        transcript = Path(tmp) / "transcript.jsonl"
+        transcript.write_text("")
+        # A resumed session in mode off: no dialog, no speech
+        payload = {"session_id": SESSION_ID, "cwd": tmp, "source": "resume",
+                   "transcript_path": str(transcript), "prompt": "hello"}
+
+        print(f"{args.runs} runs per hook, wall ms\n")
+        print(f"  {'hook':<18} {'runner':<8} {'p50':>8} {'p90':>8} {'min':>8}")
+        saved = {}
+        for name, relative in HOOKS.items():
+            hook = args.hooks_dir / relative
+            if not hook.exists():
+                print(f"  {name:<18} not installed")
+                continue
+            p50 = {}
+            for runner, prefix in runners.items():
+                state.write_text(json.dumps({"tts_mode": "off", "session_id": SESSION_ID}))
+                times = sorted(measure(prefix + [str(hook)], payload, env, args.runs))
+                p50[runner] = statistics.median(times)
+                p90 = times[min(len(times) - 1, int(len(times) * 0.9))]
+                print(f"  {name:<18} {runner:<8} {p50[runner]:>8.0f} {p90:>8.0f} {times[0]:>8.0f}")
+            if len(p50) == 2:
+                saved[name] = p50["uv run"] - p50["runtime"]
+
+    if saved:
+        print("\nSaved per hook event (p50):")
+        for name, ms in saved.items():
+            print(f"  {name:<18} {ms:>8.0f} ms")
+        print(f"  {'per turn':<18} {saved.get('UserPromptSubmit', 0) + saved.get('Stop', 0):>8.0f} ms"
+              "  (UserPromptSubmit + Stop)")
+
+
+if __name__ == "__main__":
+    main()
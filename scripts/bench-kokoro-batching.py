@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10,<3.13"
+# dependencies = [
+#     "kokoro-onnx",
+# ]
+# ///
+"""
+Compare batched and unbatched Kokoro inference throughput.
+
+Runs the same sentence chunks:
+- unbatched: one ONNX call per chunk (the pre-batching path)
+- batched: padded calls of each --sizes batch size
+- concurrent: --threads callers submitting one chunk at a time, once
+  serialized behind a lock and once through the daemon's coalescing
+  collector (kokoro_batch) with --window-ms
+
+Throughput is audio seconds produced per wall-clock second (higher is
+better). The batch probe runs first; if the model does not accept a
+batch, only the unbatched numbers are reported.
+
+Usage: uv run scripts/bench-kokoro-batching.py [--runs 3] [--sizes 2,4,8] [--threads 4]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add utils to path
+UTILS_DIR = Path(__file__).parent.parent / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+# Also check installed location
+INSTALLED_UTILS = Path.home() / ".claude" / "hooks" / "utils"
+if INSTALLED_UTILS.exists():
+    sys.path.insert(0, str(INSTALLED_UTILS))
+
+SENTENCES = [
+    "I updated the configuration loader.",
+    "All twelve tests pass now.",
+    "The remaining warning comes from a deprecated option in the build script.",
+    "We can remove it in a follow-up change.",
+    "Got it.",
+    "The cache hit rate went from forty to ninety two percent after the change.",
+    "Let me know if you want me to refactor the fallback chain as well.",
+    "Done.",
+]
+SAMPLE_RATE = 24000
+
+
+def best_of(runs: int, fn) -> float:
+    """Best wall time of fn() over runs."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name: str, seconds: float, audio_s: float, baseline: float = None) -> None:
+    speedup = f"{baseline / seconds:>7.2f}x" if baseline else f"{'':>8}"
+    print(f"  {name:<28} {seconds * 1000:>9.0f} ms {audio_s / seconds:>9.1f} {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kokoro batched vs unbatched throughput")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--sizes", default="2,4,8", help="Batch sizes to try")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent callers")
+    parser.add_argument("--window-ms", type=float, default=8, help="Coalescing window")
+    parser.add_argument("--voice", default="bf_emma")
+    args = parser.parse_args()
+
+    import kokoro_batch
+    import kokoro_tts
+
+    kokoro = kokoro_tts.get_kokoro()
+    if kokoro is None:
+        sys.exit("Kokoro unavailable (install kokoro-onnx and run scripts/setup-kokoro.sh)")
+    style = kokoro_tts.get_voice_style(args.voice)
+    lang = kokoro_tts.voice_lang(args.voice)
+    items = [(kokoro_tts.phonemize(s, lang), style, 1.0) for s in SENTENCES]
+
+    # Warm up allocations, then check whether the model batches at all
+    kokoro_batch.run_one(kokoro, items[0])
+    kokoro_batch.PROBE_FILE = Path("/dev/null")
+    supported = kokoro_batch.supports_batching(kokoro, style, probe=True)
+    print(f"Batched inference: {'supported' if supported else 'NOT supported by this model'}")
+
+    audio_s = sum(len(kokoro_batch.run_one(kokoro, item)) for item in items) / SAMPLE_RATE
+    print(f"{len(items)} chunks, {audio_s:.1f} s of audio, best of {args.runs}\n")
+    print(f"  {'':<28} {'wall':>12} {'audio s/s':>9} {'speedup':>8}")
+
+    unbatched = best_of(args.runs, lambda: [kokoro_batch.run_one(kokoro, item) for item in items])
+    report("unbatched", unbatched, audio_s)
+
+    if supported:
+        for size in (int(s) for s in args.sizes.split(",")):
+            def batched():
+                for start in range(0, len(items), size):
+                    kokoro_batch.run_batch(kokoro, items[start:start + size])
+            report(f"batched x{size}", best_of(args.runs, batched), audio_s, unbatched)
+
+    # Concurrent callers, one chunk each at a time
+    work = [items[i::args.threads] for i in range(args.threads)]
+    lock = threading.Lock()
+
+    def serialized(mine):
+        for item in mine:
+            with lock:
+                kokoro_batch.run_one(kokoro, item)
+
+    def coalesced(mine):
+        for item in mine:
+            kokoro_batch.infer(kokoro, [item])
+
+    def concurrent(target):
+        threads = [threading.Thread(target=target, args=(mine,)) for mine in work]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    print(f"\n  {args.threads} concurrent callers")
+    serial_s = best_of(args.runs, lambda: concurrent(serialized))
+    report("serialized", serial_s, audio_s)
+    if supported:
+        kokoro_batch._load_batch_config = lambda: {"window_ms": args.window_ms, "max_batch": args.threads}
+        kokoro_batch.enable_coalescing(lock)
+        report(f"coalesced ({args.window_ms:g} ms window)", best_of(args.runs, lambda: concurrent(coalesced)),
+               audio_s, serial_s)
+        stats = kokoro_batch.stats()
+        print(f"  {stats['items']} chunks in {stats['batches']} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10,<3.13"
+# dependencies = [
+#     "kokoro-onnx",
+# ]
+# ///
+"""
+Benchmark Kokoro model and voice loading.
+
+Compares the old eager load (every voice in voices-v1.0.bin read into RAM)
+with the memory-mapped archive that only pulls in the voices a session uses.
+Each variant runs in a fresh process so RSS numbers are not shared.
+
+Usage: uv run scripts/bench-kokoro-load.py [--runs N]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add utils to path
+UTILS_DIR = Path(__file__).parent.parent / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+# Also check installed location
+INSTALLED_UTILS = Path.home() / ".claude" / "hooks" / "utils"
+if INSTALLED_UTILS.exists():
+    sys.path.insert(0, str(INSTALLED_UTILS))
+
+SESSION_VOICES = ["bf_emma", "af_nicole"]
+
+
+def _rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def run_variant(mode: str) -> dict:
+    """Load the model and voices one way and report timings."""
+    import numpy as np
+    import kokoro_tts
+
+    baseline_rss = _rss_mb()
+    start = time.perf_counter()
+    kokoro = kokoro_tts.get_kokoro()
+    if kokoro is None:
+        return {"error": "Kokoro unavailable"}
+    model_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if mode == "eager":
+        with np.load(kokoro_tts.VOICES_PATH) as archive:
+            voices = {name: archive[name] for name in archive.files}
+        styles = [voices[v] for v in SESSION_VOICES]
+    else:
+        styles = [kokoro_tts.get_voice_style(v) for v in SESSION_VOICES]
+    # Touch one row per voice like an inference would
+    for style in styles:
+        float(style[10].sum())
+    voices_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "mode": mode,
+        "model_ms": model_ms,
+        "voices_ms": voices_ms,
+        "rss_mb": _rss_mb(),
+        "rss_delta_mb": _rss_mb() - baseline_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Kokoro model/voice loading")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per variant")
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant)))
+        return
+
+    print(f"{'Variant':<8} {'Model ms':>10} {'Voices ms':>10} {'Peak RSS MB':>12}")
+    for mode in ("eager", "mmap"):
+        results = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, __file__, "--variant", mode],
+                capture_output=True, text=True
+            )
+            try:
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+            except (IndexError, json.JSONDecodeError):
+                print(f"{mode}: failed\n{out.stderr}", file=sys.stderr)
+                break
+            if "error" in result:
+                print(f"{mode}: {result['error']}", file=sys.stderr)
+                return
+            results.append(result)
+        if not results:
+            continue
+        n = len(results)
+        print(f"{mode:<8} "
+              f"{sum(r['model_ms'] for r in results) / n:>10.1f} "
+              f"{sum(r['voices_ms'] for r in results) / n:>10.1f} "
+              f"{sum(r['rss_mb'] for r in results) / n:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
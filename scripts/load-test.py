@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Concurrent multi-session load test for the TTS hooks.
+
+Simulates N Claude Code sessions on one machine, each firing SessionStart,
+then turns of UserPromptSubmit -> (thinking) -> Stop, with an occasional
+PreCompact. Hooks run as real subprocesses against a throwaway copy of
+the install layout, so they share the session state file, model files and
+"audio device" exactly as concurrent sessions do.
+
+Audio is faked: shims for `say` and `afplay` on PATH render/play nothing
+but log each playback interval (and optionally capture the WAV), so
+overlapping audio can be counted. Cloud modes run scripts/mock-tts-server.py.
+
+Reports:
+- hook latency p50/p90/p99/max per event
+- CPU time and peak RSS per hook process
+- state file corruption (unreadable reads), foreign state after a hook,
+  lost SessionStart updates
+- overlapping-audio incidents and peak concurrent streams
+
+Usage:
+    python3 scripts/load-test.py --sessions 4 --turns 5
+    python3 scripts/load-test.py --sessions 8 --mode openai --mock-args "--first-byte-ms 300"
+    python3 scripts/load-test.py --sessions 16 --time-scale 0.05 --json results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+HOOK_SCRIPTS = {
+    "SessionStart": "SessionStart/01-tts-init.py",
+    "UserPromptSubmit": "UserPromptSubmit/01-acknowledge.py",
+    "Stop": "Stop/01-tts-response.py",
+    "PreCompact": "PreCompact/01-announce.py",
+}
+MODES = ["kokoro", "elevenlabs", "openai", "off"]
+
+# Shim for `say`: writes a WAV sized by word count (-o) or "speaks" by sleeping
+SAY_SHIM = '''#!{python}
+import json, os, sys, time, wave
+args = sys.argv[1:]
+out, rate, words = None, 175, []
+i = 0
+while i < len(args):
+    if args[i] in ("-v", "-r", "-o"):
+        if args[i] == "-o":
+            out = args[i + 1]
+        elif args[i] == "-r":
+            rate = int(args[i + 1])
+        i += 2
+        continue
+    if not args[i].startswith("--"):
+        words.extend(args[i].split())
+    i += 1
+seconds = max(0.3, len(words) / max(rate, 1) * 60)
+scale = float(os.environ.get("LOADTEST_TIME_SCALE", "1"))
+if out:
+    time.sleep(seconds * scale * 0.05)
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(22050)
+        w.writeframes(b"\\x00\\x20\\x00\\xe0" * int(seconds * 11025))
+    sys.exit(0)
+start = time.time()
+time.sleep(seconds * scale)
+with open(os.environ["LOADTEST_AUDIO_LOG"], "a") as f:
+    f.write(json.dumps({{"tool": "say", "session": os.environ.get("CLAUDE_SESSION_ID", ""),
+                        "start": start, "end": time.time(), "audio_s": seconds}}) + "\\n")
+'''
+
+# Shim for `afplay`: logs the playback interval, optionally keeps the WAV
+AFPLAY_SHIM = '''#!{python}
+import json, os, shutil, signal, sys, time, wave
+path = sys.argv[-1]
+with wave.open(path, "rb") as w:
+    seconds = w.getnframes() / w.getframerate()
+capture = os.environ.get("LOADTEST_CAPTURE_DIR")
+if capture:
+    shutil.copy(path, os.path.join(capture, f"{{time.time():.6f}}-{{os.getpid()}}.wav"))
+scale = float(os.environ.get("LOADTEST_TIME_SCALE", "1"))
+start = time.time()
+# Barge-in terminates the player; still log the interval it played
+signal.signal(signal.SIGTERM, lambda *_: sys.exit(143))
+try:
+    time.sleep(seconds * scale)
+finally:
+    with open(os.environ["LOADTEST_AUDIO_LOG"], "a") as f:
+        f.write(json.dumps({{"tool": "afplay", "session": os.environ.get("CLAUDE_SESSION_ID", ""),
+                            "start": start, "end": time.time(), "audio_s": seconds}}) + "\\n")
+'''
+
+SENTENCES = [
+    "I updated the config loader so it reads `tts_config.json` once per hook.",
+    "The tests in /Users/dev/project/tests/test_router.py now pass.",
+    "There are three remaining issues, listed below.",
+    "- The **retry** path ignores the `Retry-After` header.",
+    "- Kokoro takes about 1.5 seconds to load on a cold start.",
+    "See https://github.com/example/project/issues/42 for the discussion.",
+    "The cache hit rate went from 40% to 92% after the change.",
+    "```python\ndef speak(text):\n    return router.speak('assistant', text)\n```",
+    "| Stage | p50 | p99 |\n|-------|-----|-----|\n| g2p | 12 | 40 |",
+    "Let me know if you want me to refactor the fallback chain as well.",
+]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def make_install(root: Path, mode: str) -> Path:
+    """Copy hooks, utils and config into install.sh's layout with the dialog off.
+
+    Remembered modes are ignored so the run uses mode, and the daemon's
+    mixer is off so every clip reaches the afplay shim.
+    """
+    hooks_dir = root / "hooks"
+    for event_dir in ("SessionStart", "UserPromptSubmit", "Stop", "PreCompact"):
+        shutil.copytree(REPO_DIR / "hooks" / event_dir, hooks_dir / event_dir,
+                        ignore=shutil.ignore_patterns("__pycache__"))
+    (hooks_dir / "utils").mkdir()
+    for path in (REPO_DIR / "utils").glob("*.py"):
+        shutil.copy(path, hooks_dir / "utils" / path.name)
+
+    config = json.loads((REPO_DIR / "config" / "tts_config.json").read_text())
+    config.setdefault("session", {}).update({"show_dialog": False, "default_mode": mode,
+                                             "remember_choice": "off"})
+    config.setdefault("audio", {}).setdefault("mixer", {})["enabled"] = False
+    (hooks_dir / "tts_config.json").write_text(json.dumps(config, indent=2))
+    return hooks_dir
+
+
+def make_shims(bin_dir: Path) -> None:
+    """Install the say/afplay shims."""
+    bin_dir.mkdir()
+    for name, template in (("say", SAY_SHIM), ("afplay", AFPLAY_SHIM)):
+        path = bin_dir / name
+        path.write_text(template.format(python=sys.executable))
+        path.chmod(0o755)
+
+
+def start_mock(args, log_path: Path):
+    """Start the mock cloud server on a free port; returns (process, base_url)."""
+    cmd = [sys.executable, str(REPO_DIR / "scripts" / "mock-tts-server.py"), "--port", "0"]
+    cmd += shlex.split(args.mock_args)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=open(log_path, "w"), text=True)
+    line = proc.stdout.readline()
+    match = re.search(r"http://\S+", line)
+    if not match:
+        proc.kill()
+        raise RuntimeError(f"Mock server failed to start: {line!r}")
+    return proc, match.group(0)
+
+
+class StateMonitor(threading.Thread):
+    """Poll the shared state file and count unreadable snapshots."""
+
+    def __init__(self, path: Path, interval: float = 0.002):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stop = threading.Event()
+        self.reads = 0
+        self.corrupt = 0
+        self.owner_changes = 0
+        self._owner = None
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            try:
+                raw = self.path.read_text()
+            except FileNotFoundError:
+                continue
+            self.reads += 1
+            try:
+                owner = json.loads(raw).get("session_id")
+            except json.JSONDecodeError:
+                self.corrupt += 1
+                continue
+            if owner != self._owner:
+                self.owner_changes += 1
+                self._owner = owner
+
+
+class LoadTest:
+    """Drive simulated sessions and collect results."""
+
+    def __init__(self, args, hooks_dir: Path, env: dict, state_file: Path):
+        self.args = args
+        self.hooks_dir = hooks_dir
+        self.env = env
+        self.state_file = state_file
+        self.runner = shlex.split(args.runner) if args.runner else [sys.executable]
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)  # event -> [(wall_ms, cpu_ms, rss_kb)]
+        self.failures = defaultdict(int)
+        self.foreign_state = 0
+        self.lost_updates = 0
+
+    def run_hook(self, event: str, session_id: str, payload: dict) -> None:
+        """Run one hook process and record wall time, CPU and peak RSS."""
+        env = dict(self.env, CLAUDE_SESSION_ID=session_id)
+        cmd = self.runner + [str(self.hooks_dir / HOOK_SCRIPTS[event])]
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, env=env)
+        # Kill hung hooks; wait4 (not communicate) so we get the child's rusage
+        watchdog = threading.Timer(self.args.hook_timeout, proc.kill)
+        watchdog.start()
+        try:
+            proc.stdin.write(json.dumps(payload).encode())
+            proc.stdin.close()
+            stdout = proc.stdout.read()
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            watchdog.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        cpu_ms = (usage.ru_utime + usage.ru_stime) * 1000
+        # ru_maxrss is KB on Linux, bytes on macOS
+        rss_kb = usage.ru_maxrss / 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+        ok = proc.returncode == 0
+        if ok:
+            try:
+                json.loads(stdout.decode().strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                ok = False
+
+        state = self._read_state()
+        with self.lock:
+            self.samples[event].append((wall_ms, cpu_ms, rss_kb))
+            if not ok:
+                self.failures[event] += 1
+            if state is not None and event != "SessionStart" and state.get("session_id") != session_id:
+                self.foreign_state += 1
+            if event == "SessionStart" and state is not None and state.get("session_id") == session_id:
+                if "tts_mode" not in state or "session_start" not in state:
+                    self.lost_updates += 1
+
+    def _read_state(self):
+        try:
+            return json.loads(self.state_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def session(self, index: int, transcripts: Path) -> None:
+        """One simulated session: start, turns, occasional compaction."""
+        args = self.args
+        rng = random.Random(args.seed * 1000 + index)
+        session_id = f"load-{index}"
+        transcript = transcripts / f"{session_id}.jsonl"
+        transcript.touch()
+        base = {
+            "session_id": session_id,
+            "transcript_path": str(transcript),
+            "cwd": str(transcripts),
+        }
+
+        time.sleep(rng.uniform(0, args.stagger) * args.time_scale)
+        self.run_hook("SessionStart", session_id,
+                      dict(base, hook_event_name="SessionStart", source="startup"))
+
+        for turn in range(args.turns):
+            self.run_hook("UserPromptSubmit", session_id,
+                          dict(base, hook_event_name="UserPromptSubmit", prompt=f"Turn {turn}: keep going"))
+            # Claude working on the turn
+            time.sleep(rng.expovariate(1 / args.think) * args.time_scale)
+            response = "\n".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, args.max_sentences)))
+            with open(transcript, "a") as f:
+                f.write(json.dumps({"type": "user", "message": {"content": f"Turn {turn}"}}) + "\n")
+                f.write(json.dumps({"type": "assistant",
+                                    "message": {"content": [{"type": "text", "text": response}]}}) + "\n")
+            self.run_hook("Stop", session_id, dict(base, hook_event_name="Stop", stop_hook_active=False))
+
+            if args.compact_every and (turn + 1) % args.compact_every == 0:
+                self.run_hook("PreCompact", session_id,
+                              dict(base, hook_event_name="PreCompact", trigger="auto", custom_instructions=""))
+            # User reading and typing the next prompt
+            time.sleep(rng.expovariate(1 / args.idle) * args.time_scale)
+
+
+def audio_overlaps(log_path: Path) -> dict:
+    """Count overlapping playback intervals from the shim log."""
+    intervals = []
+    if log_path.exists():
+        for line in log_path.read_text().splitlines():
+            try:
+                entry = json.loads(line)
+                intervals.append((entry["start"], entry["end"], entry["session"]))
+            except (ValueError, KeyError):
+                continue
+
+    events = sorted([(start, 1) for start, _, _ in intervals] + [(end, -1) for _, end, _ in intervals])
+    active = peak = 0
+    overlap_seconds = 0.0
+    last = None
+    for at, delta in events:
+        if active > 1 and last is not None:
+            overlap_seconds += at - last
+        active += delta
+        peak = max(peak, active)
+        last = at
+
+    incidents = cross_session = 0
+    ordered = sorted(intervals)
+    for i, (start, end, session) in enumerate(ordered):
+        for other_start, _, other_session in ordered[i + 1:]:
+            if other_start >= end:
+                break
+            incidents += 1
+            cross_session += other_session != session
+    return {
+        "streams": len(intervals),
+        "overlap_incidents": incidents,
+        "cross_session_overlaps": cross_session,
+        "overlap_seconds": round(overlap_seconds, 3),
+        "peak_concurrent": peak,
+    }
+
+
+def summarize(test: LoadTest, monitor: StateMonitor, audio: dict, elapsed: float) -> dict:
+    """Build the result dictionary."""
+    hooks = {}
+    for event in HOOK_SCRIPTS:
+        samples = test.samples.get(event)
+        if not samples:
+            continue
+        wall = sorted(s[0] for s in samples)
+        cpu = sorted(s[1] for s in samples)
+        rss = sorted(s[2] for s in samples)
+        hooks[event] = {
+            "count": len(samples),
+            "failures": test.failures.get(event, 0),
+            "p50_ms": round(percentile(wall, 50), 1),
+            "p90_ms": round(percentile(wall, 90), 1),
+            "p99_ms": round(percentile(wall, 99), 1),
+            "max_ms": round(wall[-1], 1),
+            "cpu_p50_ms": round(percentile(cpu, 50), 1),
+            "cpu_p99_ms": round(percentile(cpu, 99), 1),
+            "rss_p50_mb": round(percentile(rss, 50) / 1024, 1),
+            "rss_max_mb": round(rss[-1] / 1024, 1),
+        }
+    return {
+        "sessions": test.args.sessions,
+        "turns": test.args.turns,
+        "mode": test.args.mode,
+        "elapsed_s": round(elapsed, 2),
+        "hooks": hooks,
+        "state": {
+            "reads": monitor.reads,
+            "corrupt_reads": monitor.corrupt,
+            "owner_changes": monitor.owner_changes,
+            "foreign_state_after_hook": test.foreign_state,
+            "lost_session_start_updates": test.lost_updates,
+        },
+        "audio": audio,
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"\n{result['sessions']} sessions x {result['turns']} turns, mode={result['mode']}, "
+          f"{result['elapsed_s']} s")
+    print(f"\n  {'hook':<18} {'count':>6} {'fail':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'cpu p50':>8} {'cpu p99':>8} {'rss p50':>8} {'rss max':>8}")
+    for event, h in result["hooks"].items():
+        print(f"  {event:<18} {h['count']:>6} {h['failures']:>5} {h['p50_ms']:>8.1f} {h['p90_ms']:>8.1f} "
+              f"{h['p99_ms']:>8.1f} {h['max_ms']:>8.1f} {h['cpu_p50_ms']:>8.1f} {h['cpu_p99_ms']:>8.1f} "
+              f"{h['rss_p50_mb']:>7.1f}M {h['rss_max_mb']:>7.1f}M")
+
+    state = result["state"]
+    print("\nSession state")
+    print(f"  corrupt reads:            {state['corrupt_reads']} of {state['reads']}")
+    print(f"  owner changes:            {state['owner_changes']}")
+    print(f"  foreign state after hook: {state['foreign_state_after_hook']}")
+    print(f"  lost SessionStart writes: {state['lost_session_start_updates']}")
+
+    audio = result["audio"]
+    print("\nAudio")
+    print(f"  streams:                  {audio['streams']}")
+    print(f"  overlap incidents:        {audio['overlap_incidents']} "
+          f"({audio['cross_session_overlaps']} across sessions)")
+    print(f"  overlapping time:         {audio['overlap_seconds']} s")
+    print(f"  peak concurrent streams:  {audio['peak_concurrent']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-session hook load test")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Prompt/response turns per session")
+    parser.add_argument("--mode", choices=MODES, default="kokoro", help="TTS mode for all sessions")
+    parser.add_argument("--compact-every", type=int, default=4, help="PreCompact every N turns (0 = never)")
+    parser.add_argument("--think", type=float, default=6.0, help="Mean seconds Claude works per turn")
+    parser.add_argument("--idle", type=float, default=4.0, help="Mean seconds between Stop and next prompt")
+    parser.add_argument("--stagger", type=float, default=3.0, help="Max seconds between session starts")
+    parser.add_argument("--max-sentences", type=int, default=8, help="Max sentences per response")
+    parser.add_argument("--time-scale", type=float, default=0.2,
+                        help="Multiplier for think/idle time and fake audio duration")
+    parser.add_argument("--runner", default="", help="Hook command prefix (default: this python), e.g. 'uv run'")
+    parser.add_argument("--hook-timeout", type=float, default=60, help="Seconds before a hook counts as hung")
+    parser.add_argument("--mock-args", default="", help="Extra args for mock-tts-server.py (cloud modes)")
+    parser.add_argument("--no-daemon", action="store_true", help="Synthesize in each hook process")
+    parser.add_argument("--keep-home", action="store_true",
+                        help="Use the real HOME (real Kokoro models/caches) instead of an empty one")
+    parser.add_argument("--capture", type=Path, help="Directory to keep every played WAV")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Also write results as JSON")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="claude-tts-load-"))
+    mock = None
+    env = None
+    try:
+        hooks_dir = make_install(root, args.mode)
+        make_shims(root / "bin")
+        (root / "transcripts").mkdir()
+        state_file = root / "session_state.json"
+        audio_log = root / "audio.jsonl"
+
+        env = dict(os.environ)
+        env.update({
+            "PATH": f"{root / 'bin'}{os.pathsep}{env.get('PATH', '')}",
+            "CLAUDE_TTS_STATE_FILE": str(state_file),
+            "LOADTEST_AUDIO_LOG": str(audio_log),
+            "LOADTEST_TIME_SCALE": str(args.time_scale),
+            "CLAUDE_TTS_DAEMON_SOCKET": str(root / "daemon.sock"),
+            "CLAUDE_TTS_PLAYBACK_REGISTRY": str(root / "playback.json"),
+            "CLAUDE_TTS_RATE_LIMITS": str(root / "ratelimit.json"),
+        })
+        if args.no_daemon:
+            env["CLAUDE_TTS_DAEMON"] = "0"
+        env.pop("CLAUDE_TTS_PROFILE", None)
+        if not args.keep_home:
+            env["HOME"] = str(root / "home")
+            (root / "home").mkdir()
+        if args.capture:
+            args.capture.mkdir(parents=True, exist_ok=True)
+            env["LOADTEST_CAPTURE_DIR"] = str(args.capture.resolve())
+        if args.mode in ("elevenlabs", "openai"):
+            mock, base_url = start_mock(args, root / "mock.log")
+            env.update({
+                "ELEVENLABS_BASE_URL": base_url,
+                "ELEVENLABS_API_KEY": "mock",
+                "OPENAI_BASE_URL": f"{base_url}/v1",
+                "OPENAI_API_KEY": "mock",
+            })
+
+        test = LoadTest(args, hooks_dir, env, state_file)
+        monitor = StateMonitor(state_file)
+        monitor.start()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=test.session, args=(i, root / "transcripts"))
+                   for i in range(args.sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        monitor.stop.set()
+        monitor.join()
+
+        result = summarize(test, monitor, audio_overlaps(audio_log), elapsed)
+        print_report(result)
+        if args.json:
+            args.json.write_text(json.dumps(result, indent=2))
+        if not args.keep_home:
+            print(f"\nPer-stage metrics: python3 scripts/tts-stats.py "
+                  f"--file {root / 'home/.cache/claude-tts/metrics.jsonl'}"
+                  + ("" if args.keep else "  (add --keep to retain)"))
+    finally:
+        if env and not args.no_daemon:
+            subprocess.run([sys.executable, str(root / "hooks" / "utils" / "tts_daemon.py"), "stop"],
+                           env=env, capture_output=True)
+        if mock:
+            mock.terminate()
+        if args.keep:
+            print(f"Kept {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
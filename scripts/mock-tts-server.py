@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ElevenLabs and OpenAI speech endpoints.
+
+Serves canned audio with injectable latency, throughput caps, chunked
+streaming and error responses, so the network paths of elevenlabs_tts
+and openai_tts can be measured deterministically without network access.
+
+Endpoints:
+    POST /v1/text-to-speech/{voice_id}[/stream]   ElevenLabs (output_format query)
+    POST /v1/audio/speech                         OpenAI (response_format in body)
+    GET  /stats                                   Request counters (JSON)
+
+Point the providers at it:
+    export ELEVENLABS_BASE_URL=http://127.0.0.1:8765
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+
+Usage:
+    python3 scripts/mock-tts-server.py --port 8765 \\
+        --first-byte-ms 300 --throughput-kbps 64 --error-rate 0.1 --seed 1
+"""
+
+import argparse
+import functools
+import json
+import math
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# Silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, mono, 417 bytes, 26 ms
+MP3_FRAME = b"\xff\xfb\x90\xc0" + b"\x00" * 413
+MP3_FRAME_SECONDS = 1152 / 44100
+
+
+@functools.lru_cache(maxsize=64)
+def canned_pcm(seconds: float, sample_rate: int) -> bytes:
+    """Deterministic 16-bit PCM tone with a short fade in/out."""
+    count = max(1, int(seconds * sample_rate))
+    fade = min(count // 2, sample_rate // 100)
+    samples = []
+    for i in range(count):
+        envelope = min(1.0, i / fade, (count - i) / fade) if fade else 1.0
+        samples.append(int(8000 * envelope * math.sin(2 * math.pi * 220 * i / sample_rate)))
+    return struct.pack(f"<{count}h", *samples)
+
+
+def canned_mp3(seconds: float) -> bytes:
+    """Silent MP3 of roughly the given duration."""
+    return MP3_FRAME * max(1, int(seconds / MP3_FRAME_SECONDS))
+
+
+class MockState:
+    """Server-wide settings, RNG and counters."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = {}
+        self.bytes_sent = 0
+
+    def next_error(self):
+        """Decide whether this request fails, and with which status."""
+        with self.lock:
+            self.requests += 1
+            if self.requests <= self.args.fail_first:
+                status = self.args.error_codes[0]
+            elif self.rng.random() < self.args.error_rate:
+                status = self.rng.choice(self.args.error_codes)
+            else:
+                return None
+            self.errors[status] = self.errors.get(status, 0) + 1
+            return status
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, fmt, *args):
+        if self.state.args.verbose:
+            super().log_message(fmt, *args)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def _send_json(self, status: int, body: dict, headers: dict = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int) -> None:
+        headers = {}
+        if status == 429:
+            headers["Retry-After"] = str(self.state.args.retry_after)
+        self._send_json(status, {"error": {"message": f"Injected {status}", "code": status}}, headers)
+
+    def _stream(self, audio: bytes, content_type: str) -> None:
+        """Send audio chunked, after the first-byte delay, at the throughput cap."""
+        args = self.state.args
+        time.sleep(args.first_byte_ms / 1000)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        bytes_per_second = args.throughput_kbps * 1000 / 8 if args.throughput_kbps else 0
+        start = time.perf_counter()
+        sent = 0
+        for offset in range(0, len(audio), args.chunk_size):
+            chunk = audio[offset:offset + args.chunk_size]
+            if bytes_per_second:
+                due = start + sent / bytes_per_second
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.flush()
+            sent += len(chunk)
+        self.wfile.write(b"0\r\n\r\n")
+        with self.state.lock:
+            self.state.bytes_sent += sent
+
+    def _audio_seconds(self, text: str) -> float:
+        # Rounded so canned audio is reused across similar requests
+        return round(max(0.2, len(text) * self.state.args.seconds_per_char), 1)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/stats":
+            with self.state.lock:
+                self._send_json(200, {
+                    "requests": self.state.requests,
+                    "errors": self.state.errors,
+                    "bytes_sent": self.state.bytes_sent,
+                })
+            return
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._read_json()
+
+        if url.path.startswith("/v1/text-to-speech/"):
+            if not self.headers.get("xi-api-key"):
+                self._send_json(401, {"detail": "missing xi-api-key"})
+                return
+            status = self.state.next_error()
+            if status:
+                self._send_error(status)
+                return
+            output_format = parse_qs(url.query).get("output_format", ["mp3_44100_128"])[0]
+            seconds = self._audio_seconds(body.get("text", ""))
+            if output_format.startswith("pcm_"):
+                self._stream(canned_pcm(seconds, int(output_format[4:])), "audio/pcm")
+            else:
+                self._stream(canned_mp3(seconds), "audio/mpeg")
+            return
+
+        if url.path == "/v1/audio/speech":
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                self._send_json(401, {"error": {"message": "missing bearer token"}})
+                return
+            status = self.state.next_error()
+            if status:
+                self._send_error(status)
+                return
+            seconds = round(self._audio_seconds(body.get("input", "")) / float(body.get("speed", 1.0) or 1.0), 1)
+            if body.get("response_format") == "pcm":
+                self._stream(canned_pcm(seconds, 24000), "audio/pcm")
+            else:
+                self._stream(canned_mp3(seconds), "audio/mpeg")
+            return
+
+        self._send_json(404, {"error": "not found"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock ElevenLabs/OpenAI speech server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-byte-ms", type=float, default=0, help="Delay before the first byte")
+    parser.add_argument("--throughput-kbps", type=float, default=0, help="Throughput cap (0 = unlimited)")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Bytes per streamed chunk")
+    parser.add_argument("--seconds-per-char", type=float, default=0.06, help="Audio length per input char")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-codes", default="429,500,503", help="Statuses to inject")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail the first N requests")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed for error injection")
+    parser.add_argument("--verbose", action="store_true", help="Log each request")
+    args = parser.parse_args()
+    args.error_codes = [int(code) for code in args.error_codes.split(",") if code]
+
+    MockHandler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    print(f"Mock TTS server on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
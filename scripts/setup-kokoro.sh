@@ -3,9 +3,25 @@
 #
 # Downloads Kokoro models for local neural TTS
 # Models are ~270MB total
+#
+# Usage: setup-kokoro.sh [--from DIR] [--variants fp16,int8]
+#   --from DIR       Copy model files from a local directory instead of downloading
+#   --variants LIST  Also prepare quantized variants (fp16, int8). Each variant is
+#                    copied from --from if present, otherwise converted locally
+#                    from kokoro-v1.0.onnx
 
 set -e
 
+SOURCE_DIR=""
+VARIANTS=""
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --from) SOURCE_DIR="$2"; shift 2 ;;
+        --variants) VARIANTS="$2"; shift 2 ;;
+        *) echo "Unknown option: $1"; exit 1 ;;
+    esac
+done
+
 # Colors
 GREEN='\033[0;32m'
 BLUE='\033[0;34m'
@@ -20,12 +36,22 @@ echo -e "${BLUE}║   Kokoro TTS Model Setup                 ║${NC}"
 echo -e "${BLUE}╚══════════════════════════════════════════╝${NC}"
 echo ""
 
-# Check for curl
-if ! command -v curl &> /dev/null; then
+# Check for curl (only needed when downloading)
+if [ -z "$SOURCE_DIR" ] && ! command -v curl &> /dev/null; then
     echo "Error: curl is required but not installed."
     exit 1
 fi
 
+# Fetch a model file: copy from --from if given, otherwise download
+fetch() {
+    local name="$1"
+    if [ -n "$SOURCE_DIR" ]; then
+        cp "$SOURCE_DIR/$name" "$KOKORO_DIR/$name"
+    else
+        curl -L -o "$KOKORO_DIR/$name" "$MODEL_URL/$name"
+    fi
+}
+
 # Create directory
 echo -e "${BLUE}Creating model directory: $KOKORO_DIR${NC}"
 mkdir -p "$KOKORO_DIR"
@@ -35,9 +61,9 @@ MODEL_FILE="$KOKORO_DIR/kokoro-v1.0.onnx"
 if [ -f "$MODEL_FILE" ]; then
     echo -e "${YELLOW}Model file already exists, skipping...${NC}"
 else
-    echo -e "${BLUE}Downloading Kokoro model (224MB)...${NC}"
-    curl -L -o "$MODEL_FILE" "$MODEL_URL/kokoro-v1.0.onnx"
-    echo -e "${GREEN}Model downloaded${NC}"
+    echo -e "${BLUE}Fetching Kokoro model (224MB)...${NC}"
+    fetch "kokoro-v1.0.onnx"
+    echo -e "${GREEN}Model installed${NC}"
 fi
 
 # Download voices file
@@ -45,17 +71,49 @@ VOICES_FILE="$KOKORO_DIR/voices-v1.0.bin"
 if [ -f "$VOICES_FILE" ]; then
     echo -e "${YELLOW}Voices file already exists, skipping...${NC}"
 else
-    echo -e "${BLUE}Downloading Kokoro voices (46MB)...${NC}"
-    curl -L -o "$VOICES_FILE" "$MODEL_URL/voices-v1.0.bin"
-    echo -e "${GREEN}Voices downloaded${NC}"
+    echo -e "${BLUE}Fetching Kokoro voices (46MB)...${NC}"
+    fetch "voices-v1.0.bin"
+    echo -e "${GREEN}Voices installed${NC}"
 fi
 
+# Prepare quantized variants
+for variant in ${VARIANTS//,/ }; do
+    VARIANT_FILE="$KOKORO_DIR/kokoro-v1.0.$variant.onnx"
+    if [ -f "$VARIANT_FILE" ]; then
+        echo -e "${YELLOW}$variant model already exists, skipping...${NC}"
+    elif [ -n "$SOURCE_DIR" ] && [ -f "$SOURCE_DIR/kokoro-v1.0.$variant.onnx" ]; then
+        echo -e "${BLUE}Copying $variant model...${NC}"
+        cp "$SOURCE_DIR/kokoro-v1.0.$variant.onnx" "$VARIANT_FILE"
+    elif [ "$variant" = "int8" ]; then
+        echo -e "${BLUE}Quantizing int8 model from $MODEL_FILE...${NC}"
+        uv run --with onnx --with onnxruntime python -c "
+from onnxruntime.quantization import quantize_dynamic, QuantType
+quantize_dynamic('$MODEL_FILE', '$VARIANT_FILE', weight_type=QuantType.QUInt8)
+"
+    elif [ "$variant" = "fp16" ]; then
+        echo -e "${BLUE}Converting fp16 model from $MODEL_FILE...${NC}"
+        uv run --with onnx --with onnxconverter-common python -c "
+import onnx
+from onnxconverter_common import float16
+model = float16.convert_float_to_float16(onnx.load('$MODEL_FILE'), keep_io_types=True)
+onnx.save(model, '$VARIANT_FILE')
+"
+    else
+        echo "Unknown variant: $variant (expected fp16 or int8)"
+        exit 1
+    fi
+    [ -f "$VARIANT_FILE" ] && echo -e "${GREEN}$variant model ready${NC}"
+done
+
 echo ""
 echo -e "${GREEN}════════════════════════════════════════════${NC}"
 echo -e "${GREEN}  Kokoro setup complete!${NC}"
 echo -e "${GREEN}════════════════════════════════════════════${NC}"
 echo ""
 echo "Models installed to: $KOKORO_DIR"
+if [ -n "$VARIANTS" ]; then
+    echo "Select a variant with providers.kokoro.model_variant in tts_config.json"
+fi
 echo ""
 echo "Available voices:"
 echo "  American Female: af_bella, af_jessica, af_nicole, af_nova, af_river, af_sarah, af_sky"
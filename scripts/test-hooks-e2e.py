@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Headless end-to-end test of the four hooks through a test audio sink.
+
+Runs SessionStart, UserPromptSubmit, Stop and PreCompact as real
+subprocesses against a throwaway copy of the install layout, with
+CLAUDE_TTS_SINK=capture+realtime: nothing reaches a sound card, but
+every buffer is written to the capture directory and paced like a
+device, so barge-in behaves as it would for real. Then a reply is cut
+off by the next prompt.
+
+Checks that every hook delivered audio and that barge-in ended the
+reply early, and reports per hook:
+- wall time of the hook process
+- latency from hook start to the first buffer reaching the sink
+- buffers, audio length, and how playback ended
+
+Cloud modes run scripts/mock-tts-server.py; kokoro needs the models.
+In cloud modes UserPromptSubmit and PreCompact speak only through a
+local engine (espeak-ng or macOS say; PreCompact also Kokoro), so on a
+box without one those steps still run but their audio check is
+skipped, with the reason, rather than failed.
+With --watcher, replies are spoken by the transcript watcher: the reply
+is written to the transcript just before Stop runs, as Claude would.
+
+Usage:
+    python3 scripts/test-hooks-e2e.py [--mode elevenlabs] [--daemon] [--watcher] [--keep DIR]
+"""
+
+import argparse
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+HOOK_SCRIPTS = {
+    "SessionStart": "SessionStart/01-tts-init.py",
+    "UserPromptSubmit": "UserPromptSubmit/01-acknowledge.py",
+    "Stop": "Stop/01-tts-response.py",
+    "PreCompact": "PreCompact/01-announce.py",
+}
+SESSION_ID = "e2e-hooks"
+REPLY = ("The build is green again. I fixed the import cycle in the router and "
+         "moved the shared helpers into their own module. Next, I will update the "
+         "documentation and add a note to the changelog.")
+# Quiet time after the last buffer before a step counts as finished
+SETTLE_SECONDS = 0.5
+# Local engines a hook can speak with whatever the mode (cloud modes only)
+LOCAL_ENGINES = {
+    "UserPromptSubmit": ("macos_say", "espeak"),
+    "PreCompact": ("kokoro", "macos_say", "espeak"),
+}
+
+sys.path.insert(0, str(REPO_DIR / "utils"))
+import audio_sink  # noqa: E402
+
+
+def make_install(root: Path, mode: str, watcher: bool = False) -> Path:
+    """Copy hooks, utils and config into install.sh's layout with the dialog off."""
+    hooks_dir = root / "hooks"
+    for event_dir in ("SessionStart", "UserPromptSubmit", "Stop", "PreCompact"):
+        shutil.copytree(REPO_DIR / "hooks" / event_dir, hooks_dir / event_dir,
+                        ignore=shutil.ignore_patterns("__pycache__"))
+    (hooks_dir / "utils").mkdir()
+    for path in (REPO_DIR / "utils").glob("*.py"):
+        shutil.copy(path, hooks_dir / "utils" / path.name)
+    config = json.loads((REPO_DIR / "config" / "tts_config.json").read_text())
+    config.setdefault("session", {}).update({"show_dialog": False, "default_mode": mode,
+                                             "remember_choice": "off"})
+    config.setdefault("watcher", {})["enabled"] = watcher
+    (hooks_dir / "tts_config.json").write_text(json.dumps(config, indent=2))
+    return hooks_dir
+
+
+def start_mock(log_path: Path):
+    """Start the mock cloud server on a free port; returns (process, base_url)."""
+    cmd = [sys.executable, str(REPO_DIR / "scripts" / "mock-tts-server.py"), "--port", "0"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=open(log_path, "w"), text=True)
+    match = re.search(r"http://\S+", proc.stdout.readline())
+    if not match:
+        proc.kill()
+        raise RuntimeError("Mock server failed to start")
+    return proc, match.group(0)
+
+
+def usable_providers(hooks_dir: Path, env: dict) -> dict:
+    """Provider availability as the hooks will see it (capabilities.probe())."""
+    code = "import capabilities, json; print(json.dumps(capabilities.probe()['providers']))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=hooks_dir / "utils", env=env,
+                          capture_output=True, text=True)
+    try:
+        return json.loads(proc.stdout)
+    except ValueError:
+        return {}
+
+
+def write_transcript(path: Path, reply: str) -> None:
+    entry = {"type": "assistant", "message": {"content": [{"type": "text", "text": reply}]}}
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+class Runner:
+    def __init__(self, runner: list, hooks_dir: Path, env: dict, capture: Path, payload: dict,
+                 watcher: bool = False):
+        self.runner = runner
+        self.watcher = watcher
+        self.hooks_dir = hooks_dir
+        self.env = env
+        self.capture = capture
+        self.payload = payload
+
+    def start(self, event: str) -> tuple:
+        proc = subprocess.Popen(self.runner + [str(self.hooks_dir / HOOK_SCRIPTS[event])],
+                                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, env=self.env)
+        proc.stdin.write(json.dumps(self.payload).encode())
+        proc.stdin.close()
+        return time.time(), proc
+
+    def reply(self, transcript: Path, reply: str) -> tuple:
+        """Write a reply to the transcript and run Stop, as at the end of a turn."""
+        started = time.time()
+        write_transcript(transcript, reply)
+        _, proc = self.start("Stop")
+        return started, proc
+
+    def buffers(self, since: float, hook: str = None) -> list:
+        return [entry for entry in audio_sink.read_timeline(self.capture)
+                if entry["ts"] >= since and (hook is None or entry.get("hook") == hook)]
+
+    def settle(self, since: float, timeout: float) -> list:
+        """Wait for buffers after since, until none have arrived for a while."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            entries = self.buffers(since)
+            if entries and all("end_ts" in e for e in entries) \
+                    and time.time() - max(e["end_ts"] for e in entries) > SETTLE_SECONDS:
+                return entries
+            time.sleep(0.05)
+        return self.buffers(since)
+
+    def step(self, event: str, timeout: float, expect_audio: bool = True) -> dict:
+        if event == "Stop" and self.watcher:
+            started, proc = self.reply(Path(self.payload["transcript_path"]), REPLY)
+        else:
+            started, proc = self.start(event)
+        proc.wait(timeout=timeout)
+        wall_ms = (time.time() - started) * 1000
+        # Without audio to wait for, only catch stray buffers
+        entries = self.settle(started, timeout if expect_audio else SETTLE_SECONDS * 2)
+        return summarize(event, started, wall_ms, entries, proc.returncode)
+
+
+def summarize(event: str, started: float, wall_ms: float, entries: list, returncode: int) -> dict:
+    return {
+        "event": event,
+        "ok": returncode == 0 and bool(entries),
+        "wall_ms": round(wall_ms),
+        "first_buffer_ms": round((entries[0]["ts"] - started) * 1000) if entries else None,
+        "buffers": len(entries),
+        "audio_ms": round(sum(e["audio_ms"] for e in entries)),
+        "played_ms": round(sum(e.get("played_ms", 0) for e in entries)),
+        "ended": sorted({e.get("ended") or "playing" for e in entries}),
+        "returncode": returncode,
+    }
+
+
+def barge_in(runner: Runner, transcript: Path, timeout: float) -> dict:
+    """Cut a reply off with the next prompt once its first buffer plays."""
+    hook = "watcher" if runner.watcher else "stop"
+    started, stop = runner.reply(transcript, REPLY * 3)
+    deadline = time.time() + timeout
+    while not runner.buffers(started, hook) and time.time() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.3)
+    _, prompt = runner.start("UserPromptSubmit")
+    stop.wait(timeout=timeout)
+    prompt.wait(timeout=timeout)
+    wall_ms = (time.time() - started) * 1000
+    runner.settle(started, timeout)
+    result = summarize("barge-in", started, wall_ms, runner.buffers(started, hook), stop.returncode)
+    result["ok"] = result["ok"] and result["ended"] != ["complete"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless end-to-end test of the TTS hooks")
+    parser.add_argument("--mode", default="elevenlabs", choices=["kokoro", "elevenlabs", "openai"])
+    parser.add_argument("--sink", default="capture+realtime", help="Sink for the hooks (default: capture+realtime)")
+    parser.add_argument("--daemon", action="store_true", help="Let UserPromptSubmit start the daemon")
+    parser.add_argument("--watcher", action="store_true", help="Speak replies with the transcript watcher")
+    parser.add_argument("--runner", default="", help="Hook command prefix (default: this python)")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-step timeout in seconds")
+    parser.add_argument("--keep", type=Path, help="Keep the install and capture in this directory")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="tts-e2e-")) if args.keep is None else args.keep
+    root.mkdir(parents=True, exist_ok=True)
+    mock = None
+    try:
+        hooks_dir = make_install(root, args.mode, args.watcher)
+        capture = root / "capture"
+        (root / "home").mkdir(exist_ok=True)
+        env = dict(os.environ, HOME=str(root / "home"), CLAUDE_TTS_SINK=args.sink,
+                   CLAUDE_TTS_CAPTURE_DIR=str(capture),
+                   CLAUDE_TTS_STATE_FILE=str(root / "state.json"),
+                   CLAUDE_TTS_PROJECT_MODES=str(root / "modes.json"),
+                   CLAUDE_TTS_PLAYBACK_REGISTRY=str(root / "playback.json"),
+                   CLAUDE_TTS_RATE_LIMITS=str(root / "ratelimit.json"),
+                   CLAUDE_TTS_WATCH_DIR=str(root / "watch"),
+                   CLAUDE_TTS_DAEMON_SOCKET=str(root / "daemon.sock"))
+        if not args.daemon:
+            env["CLAUDE_TTS_DAEMON"] = "0"
+        if args.mode in ("elevenlabs", "openai"):
+            mock, base_url = start_mock(root / "mock.log")
+            env.update(ELEVENLABS_BASE_URL=base_url, ELEVENLABS_API_KEY="mock",
+                       OPENAI_BASE_URL=f"{base_url}/v1", OPENAI_API_KEY="mock")
+
+        transcript = root / "transcript.jsonl"
+        if not args.watcher:
+            write_transcript(transcript, REPLY)
+        payload = {"session_id": SESSION_ID, "cwd": str(root), "source": "startup",
+                   "transcript_path": str(transcript), "prompt": "Fix the build"}
+        runner = Runner(shlex.split(args.runner) or [sys.executable], hooks_dir, env, capture, payload,
+                        args.watcher)
+        providers = usable_providers(hooks_dir, env) if args.mode != "kokoro" else {}
+        results = []
+        for event in HOOK_SCRIPTS:
+            engines = LOCAL_ENGINES.get(event, ()) if args.mode != "kokoro" else ()
+            silent = bool(engines) and not any(providers.get(engine) for engine in engines)
+            result = runner.step(event, args.timeout, expect_audio=not silent)
+            if silent:
+                # The hook still has to run cleanly; it just has nothing to speak with
+                result["skipped"] = f"no local engine ({', '.join(engines)})"
+                result["ok"] = result["returncode"] == 0
+            results.append(result)
+        results.append(barge_in(runner, transcript, args.timeout))
+    finally:
+        if mock is not None:
+            mock.kill()
+        if args.daemon:
+            subprocess.run([sys.executable, str(root / "hooks" / "utils" / "tts_daemon.py"), "stop"],
+                           env=env, capture_output=True)
+        if args.keep is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"mode {args.mode}, sink {args.sink}, daemon {'on' if args.daemon else 'off'}, "
+              f"watcher {'on' if args.watcher else 'off'}\n")
+        print(f"  {'step':<18} {'ok':<4} {'wall':>7} {'1st buf':>8} {'bufs':>5} {'audio':>7} {'played':>7}  ended")
+        for r in results:
+            if r.get("skipped"):
+                print(f"  {r['event']:<18} {'skip' if r['ok'] else 'NO':<4} {r['wall_ms']:>7}  {r['skipped']}")
+                continue
+            first = f"{r['first_buffer_ms']}" if r["first_buffer_ms"] is not None else "-"
+            print(f"  {r['event']:<18} {'yes' if r['ok'] else 'NO':<4} {r['wall_ms']:>7} {first:>8} "
+                  f"{r['buffers']:>5} {r['audio_ms']:>7} {r['played_ms']:>7}  {','.join(r['ended'])}")
+        if args.keep:
+            print(f"\nCapture: {args.keep / 'capture'}")
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
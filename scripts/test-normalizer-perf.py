@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Fuzz and performance check for text_normalizer.
+
+Feeds generated worst-case strings (long asterisk, whitespace, dash and
+bracket runs, huge table lines, minified blobs, unclosed fences) plus
+random markdown-ish fuzz to clean_text_for_speech() and checks that:
+- nothing raises
+- time per KB stays under a bound at every size
+- doubling the input roughly doubles the time (no quadratic blow-up)
+- summary speech mode (speech_summary) stays under a millisecond per KB
+  on the same inputs and picks the same text every time
+
+The size caps are disabled while measuring so the regexes themselves
+are exercised; a final pass checks the caps truncate as configured.
+
+Usage:
+    python3 scripts/test-normalizer-perf.py
+    python3 scripts/test-normalizer-perf.py --max-ms-per-kb 1 --sizes 16,64,256
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add utils to path
+UTILS_DIR = Path(__file__).parent.parent / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+import speech_summary
+from text_normalizer import clean_text_for_speech, cap_input, TRUNCATED
+
+UNCAPPED = 1 << 30
+
+# name -> function building a string of about n chars
+WORST_CASES = {
+    "asterisk run": lambda n: "*" * n + "a",
+    "asterisk pairs": lambda n: "*a" * (n // 2),
+    "whitespace before dash": lambda n: " " * n + "x-",
+    "whitespace before em dash": lambda n: " " * n + "x—",
+    "whitespace before arrow": lambda n: " " * n + "x",
+    "blank lines": lambda n: " \n" * (n // 2),
+    "indented lines": lambda n: "\t \n" * (n // 3),
+    "dash run": lambda n: "-" * n,
+    "pipe run": lambda n: "|" * n + "a",
+    "huge table line": lambda n: "| cell " * (n // 7),
+    "unclosed table": lambda n: "|" + "a" * n,
+    "digit run": lambda n: "1" * n + "K",
+    "digit groups": lambda n: "1,000" * (n // 5),
+    "huge grouped number": lambda n: "1" + ",000" * (n // 4),
+    "open brackets": lambda n: "[" * n,
+    "open links": lambda n: "[a](" * (n // 4),
+    "unclosed link text": lambda n: "[a" * (n // 2),
+    "backticks": lambda n: "`" * n,
+    "unclosed fence": lambda n: "```" + "a" * n,
+    "fences": lambda n: "```a" * (n // 4),
+    "headers": lambda n: "#" * n,
+    "path": lambda n: "/" + "a" * n + " ",
+    "dotted path": lambda n: "/a." * (n // 3),
+    "minified": lambda n: "function(a,b){return a.b/c.d-e}" * (n // 32),
+    "dots": lambda n: "a." * (n // 2),
+    "urls": lambda n: "http://a.b/" * (n // 11),
+}
+
+# A typical long reply, for summary speech mode
+REPLY = """I tracked down the flaky build. It came from an import cycle in the router.
+
+## Changes
+
+- Fixed the cycle by moving the shared helpers into their own module.
+- Added a regression test for the import order.
+
+```python
+import helpers
+```
+
+| file | change |
+|------|--------|
+| router.py | imports |
+
+The old module stays for the two scripts that use it; both still pass.
+
+Everything is green now. Next, I will look at the slow startup.
+"""
+
+FUZZ_ALPHABET = list("ab1 .,*-|[]()`#/\n\t—–→>~:") + [
+    "```", "KB", "https://x.io/a", "1,000", "- ", "**", "](", "->", "3.14", "~/",
+]
+
+
+def fuzz_string(rng: random.Random, n: int) -> str:
+    """Random markdown-ish string of about n chars."""
+    parts = []
+    size = 0
+    while size < n:
+        token = rng.choice(FUZZ_ALPHABET) * rng.choice((1, 1, 1, 2, 50, 500))
+        parts.append(token)
+        size += len(token)
+    return "".join(parts)[:n]
+
+
+def time_ms(text: str, repeat: int) -> float:
+    """Best-of-repeat wall time for one normalization."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        clean_text_for_speech(text, max_line_chars=UNCAPPED, max_chars=UNCAPPED)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz/perf check for the speech normalizer")
+    parser.add_argument("--sizes", default="8,32,128", help="Input sizes in KB")
+    parser.add_argument("--max-ms-per-kb", type=float, default=5.0, help="Time bound per KB")
+    parser.add_argument("--max-summary-ms-per-kb", type=float, default=1.0,
+                        help="Time bound per KB for summary speech mode")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Max allowed (time ratio / size ratio) between sizes")
+    parser.add_argument("--fuzz", type=int, default=200, help="Random fuzz cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(s) * 1024 for s in args.sizes.split(",")]
+    failures = []
+
+    print(f"{'case':<28}" + "".join(f"{s // 1024:>8} KB" for s in sizes) + "   ms/KB")
+    for name, build in WORST_CASES.items():
+        timings = []
+        for size in sizes:
+            try:
+                timings.append(time_ms(build(size), args.repeat))
+            except Exception as e:
+                failures.append(f"{name}: raised {e!r}")
+                break
+        if len(timings) < len(sizes):
+            continue
+
+        per_kb = max(ms / (size / 1024) for ms, size in zip(timings, sizes))
+        print(f"{name:<28}" + "".join(f"{ms:>11.1f}" for ms in timings) + f"   {per_kb:5.2f}")
+        if per_kb > args.max_ms_per_kb:
+            failures.append(f"{name}: {per_kb:.2f} ms/KB > {args.max_ms_per_kb}")
+        for (t1, s1), (t2, s2) in zip(zip(timings, sizes), zip(timings[1:], sizes[1:])):
+            # Ignore sub-millisecond noise
+            if t2 > 1.0 and (t2 / max(t1, 0.05)) / (s2 / s1) > args.max_growth:
+                failures.append(f"{name}: superlinear growth {t1:.1f} ms -> {t2:.1f} ms")
+
+    rng = random.Random(args.seed)
+    worst = 0.0
+    for i in range(args.fuzz):
+        size = rng.choice(sizes)
+        text = fuzz_string(rng, size)
+        try:
+            ms = time_ms(text, 1)
+        except Exception as e:
+            failures.append(f"fuzz #{i}: raised {e!r} on {text[:80]!r}")
+            continue
+        worst = max(worst, ms / (size / 1024))
+    print(f"\nFuzz: {args.fuzz} cases, worst {worst:.2f} ms/KB")
+    if worst > args.max_ms_per_kb:
+        failures.append(f"fuzz: {worst:.2f} ms/KB > {args.max_ms_per_kb}")
+
+    summary_worst = 0.0
+    for name, build in [*WORST_CASES.items(), ("reply", lambda n: REPLY * (n // len(REPLY)))]:
+        text = build(sizes[-1])
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            summary = speech_summary.summarize(text)
+            best = min(best, time.perf_counter() - start)
+        summary_worst = max(summary_worst, best * 1000 / (len(text) / 1024))
+        if speech_summary.summarize(text) != summary:
+            failures.append(f"summary: {name} not deterministic")
+    print(f"Summary: worst {summary_worst:.3f} ms/KB")
+    if summary_worst > args.max_summary_ms_per_kb:
+        failures.append(f"summary: {summary_worst:.3f} ms/KB > {args.max_summary_ms_per_kb}")
+
+    capped = cap_input("word " * 10000, max_line_chars=2000, max_chars=20000)
+    if len(capped) > 2000 + len(TRUNCATED) or not capped.endswith(TRUNCATED):
+        failures.append(f"cap: line not truncated ({len(capped)} chars)")
+    capped = cap_input("line\n" * 10000, max_line_chars=2000, max_chars=20000)
+    if len(capped) > 20000:
+        failures.append(f"cap: text not truncated ({len(capped)} chars)")
+
+    if failures:
+        print("\nFAILED")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -43,10 +43,15 @@ def test_kokoro():
 
         result = kokoro_tts.speak("Testing Kokoro neural text to speech. This is the Emma voice.", "bf_emma", 1.0)
         print(f"Result: {'Success' if result else 'Failed'}")
+        timings = kokoro_tts.last_timings
+        if timings:
+            print(f"G2P: {timings.get('g2p_ms', 0):.0f}ms "
+                  f"({timings.get('g2p_hits', 0)} cached, {timings.get('g2p_misses', 0)} new) | "
+                  f"Inference: {timings.get('inference_ms', 0):.0f}ms")
         return result
     except ImportError as e:
         print(f"Import error: {e}")
-        print("Install with: uv pip install kokoro-onnx soundfile")
+        print("Install with: uv pip install kokoro-onnx numpy")
         return False
     except Exception as e:
         print(f"Error: {e}")
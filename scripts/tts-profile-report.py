@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Summarize the most recent hook profiles.
+
+Profiles are written when CLAUDE_TTS_PROFILE=1 (or profiling.enabled)
+is set. For each recent run this prints wall time, the slowest functions
+by cumulative time and the largest allocations.
+
+Usage:
+    python3 scripts/tts-profile-report.py              # last 5 runs
+    python3 scripts/tts-profile-report.py --hook stop --count 1 --full
+"""
+
+import argparse
+import io
+import os
+import pstats
+import sys
+from pathlib import Path
+
+# Add utils to path
+UTILS_DIR = Path(__file__).parent.parent / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+# Also check installed location
+INSTALLED_UTILS = Path.home() / ".claude" / "hooks" / "utils"
+if INSTALLED_UTILS.exists():
+    sys.path.insert(0, str(INSTALLED_UTILS))
+
+import hook_profiler
+
+
+def _section(report: str, title: str, lines: int) -> list:
+    """Get the first lines of a report section."""
+    out = []
+    in_section = False
+    for line in report.splitlines():
+        if line.startswith("=== "):
+            in_section = title in line
+            continue
+        if in_section and line.strip():
+            out.append(line)
+            if len(out) >= lines:
+                break
+    return out
+
+
+def summarize(prof_path: Path, top: int, full: bool) -> None:
+    """Print a summary of one profile run."""
+    report_path = prof_path.with_suffix(".txt")
+    report = report_path.read_text() if report_path.exists() else ""
+    print(f"\n### {prof_path.stem}")
+
+    if full and report:
+        print(report)
+        return
+
+    for line in report.splitlines()[:3]:
+        if line.startswith("Wall time"):
+            print(line)
+
+    out = io.StringIO()
+    stats = pstats.Stats(str(prof_path), stream=out)
+    stats.sort_stats("cumulative").print_stats(top)
+    print("Slowest functions (cumulative):")
+    # Skip pstats' preamble, keep the table
+    lines = out.getvalue().splitlines()
+    start = next((i for i, line in enumerate(lines) if line.strip().startswith("ncalls")), 0)
+    for line in lines[start:start + top + 1]:
+        print(f"  {line}")
+
+    allocations = _section(report, "allocations", top)
+    if allocations:
+        print("Largest allocations:")
+        for line in allocations:
+            print(f"  {line}")
+
+    sampled = _section(report, "Sampled stacks", 5)
+    if sampled:
+        print("Hottest sampled stacks:")
+        for line in sampled:
+            print(f"  {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize recent hook profiles")
+    parser.add_argument("--dir", type=Path, default=None, help="Profile directory")
+    parser.add_argument("--hook", help="Only this hook (stop, user_prompt_submit, ...)")
+    parser.add_argument("--count", type=int, default=5, help="Number of recent runs")
+    parser.add_argument("--top", type=int, default=10, help="Rows per table")
+    parser.add_argument("--full", action="store_true", help="Print the full reports")
+    args = parser.parse_args()
+
+    config = hook_profiler._load_profiling_config()
+    profile_dir = args.dir or Path(os.path.expanduser(config.get("dir", str(hook_profiler.DEFAULT_PROFILE_DIR))))
+    pattern = f"*-{args.hook}.prof" if args.hook else "*.prof"
+    profiles = sorted(profile_dir.glob(pattern), reverse=True)[:args.count]
+    if not profiles:
+        print(f"No profiles in {profile_dir}")
+        print("Enable with: export CLAUDE_TTS_PROFILE=1")
+        return
+
+    for prof_path in profiles:
+        summarize(prof_path, args.top, args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+"""
+Replay spoken replies from the speech history.
+
+Plays a stored turn straight from its cached audio: no transcript read,
+no normalization and no provider call. Turns count from 1 per session;
+negative numbers count back from the latest (-1, the default, is the
+last reply). Submitting a prompt cuts the replay off like any reply.
+
+Usage:
+    python3 scripts/tts-replay.py [TURN] [--session ID]
+    python3 scripts/tts-replay.py --list [--session ID]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add utils to path
+UTILS_DIR = Path(__file__).parent.parent / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+# Also check installed location
+INSTALLED_UTILS = Path.home() / ".claude" / "hooks" / "utils"
+if INSTALLED_UTILS.exists():
+    sys.path.insert(0, str(INSTALLED_UTILS))
+
+import speech_history
+
+
+def default_session() -> str:
+    """The current session if it has history, else the most recent one."""
+    from session_state import get_session_state
+
+    known = speech_history.sessions()
+    current = str(get_session_state().get("session_id", ""))
+    if current and speech_history.turn_range(current):
+        return current
+    return known[0] if known else None
+
+
+def list_turns(session: str) -> None:
+    for turn in speech_history.turn_range(session):
+        entry = speech_history.get(session, turn)
+        if entry is None:
+            continue
+        when = datetime.fromtimestamp(entry["ts"]).strftime("%H:%M:%S")
+        cut = "" if entry.get("complete", True) else " (cut off)"
+        text = entry["text"].replace("\n", " ")
+        print(f"{turn:>4}  {when}  {entry['duration']:>5.1f}s{cut}  {text[:70]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay spoken replies from cached audio")
+    parser.add_argument("turn", nargs="?", type=int, default=-1,
+                        help="Turn number, or negative to count back (default: -1, the last reply)")
+    parser.add_argument("--session", help="Session ID (default: current or most recent)")
+    parser.add_argument("--list", action="store_true", help="List stored turns")
+    parser.add_argument("--text", action="store_true", help="Print the turn's text instead of playing it")
+    args = parser.parse_args()
+
+    session = args.session or default_session()
+    if session is None:
+        sys.exit(f"No speech history in {speech_history.history_dir()}")
+    if args.list:
+        print(f"Session {session}")
+        list_turns(session)
+        return
+
+    start = time.perf_counter()
+    entry = speech_history.get(session, args.turn)
+    if entry is None:
+        stored = speech_history.turn_range(session)
+        sys.exit(f"Turn {args.turn} not stored for session {session} "
+                 f"(turns {stored.start}-{stored.stop - 1})" if stored else f"No turns for session {session}")
+    if args.text:
+        print(entry["text"])
+        return
+    audio = speech_history.load_audio(entry)
+    if audio is None:
+        sys.exit(f"Audio for turn {entry['turn']} is missing")
+
+    import audio_output
+    import playback_registry
+
+    samples, sample_rate = audio
+    print(f"Turn {entry['turn']} ({entry['duration']:.1f}s, loaded in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms): {entry['text'][:70]}")
+    with playback_registry.utterance(entry["text"], session=entry["session"]):
+        ok = audio_output.play_pcm(samples, sample_rate, volume=entry.get("volume") or 1.0)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
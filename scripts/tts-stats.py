@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Summarize TTS latency metrics.
+
+Reads the JSONL metrics file written by the hooks and providers and
+prints p50/p90/p99 per stage and per provider over a time window.
+
+Usage:
+    python3 scripts/tts-stats.py                # last 24 hours
+    python3 scripts/tts-stats.py --since 30m    # last 30 minutes
+    python3 scripts/tts-stats.py --since 7d --session abc123
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add utils to path
+UTILS_DIR = Path(__file__).parent.parent / "utils"
+sys.path.insert(0, str(UTILS_DIR))
+
+# Also check installed location
+INSTALLED_UTILS = Path.home() / ".claude" / "hooks" / "utils"
+if INSTALLED_UTILS.exists():
+    sys.path.insert(0, str(INSTALLED_UTILS))
+
+import tts_metrics
+
+# Pipeline order for display
+STAGE_ORDER = [
+    "config_load", "capabilities", "watch_flush", "watch_claim", "transcript_read", "summarize", "text_clean",
+    "warmup", "queue_wait",
+    "rate_wait", "g2p", "batch", "synthesis", "first_audio", "playback", "playback_end", "hook",
+]
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_window(value: str) -> float:
+    """Parse a window like 30m, 24h or 7d into seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid window: {value} (use e.g. 30m, 24h, 7d)")
+    return float(match.group(1)) * UNITS[match.group(2)]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def load_records(path: Path, since: float, session: str = None) -> list:
+    """Load records newer than `since` (epoch seconds), including the rotated file."""
+    records = []
+    for candidate in (path.with_name(path.name + ".1"), path):
+        if not candidate.exists():
+            continue
+        with open(candidate) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("ts", 0) < since:
+                    continue
+                if session and entry.get("session") != session:
+                    continue
+                records.append(entry)
+    return records
+
+
+def _stage_key(stage: str):
+    return (STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER), stage)
+
+
+def print_table(title: str, groups: dict) -> None:
+    """Print count and percentiles for each group."""
+    print(f"\n{title}")
+    print(f"  {'':<34} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for key in sorted(groups, key=lambda k: (_stage_key(k[0]), k[1:])):
+        values = sorted(groups[key])
+        label = " / ".join(str(k) for k in key if k)
+        print(f"  {label:<34} {len(values):>7} "
+              f"{percentile(values, 50):>9.1f} {percentile(values, 90):>9.1f} {percentile(values, 99):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize TTS latency metrics")
+    parser.add_argument("--since", type=parse_window, default=parse_window("24h"),
+                        help="Time window, e.g. 30m, 24h, 7d (default 24h)")
+    parser.add_argument("--file", type=Path, default=None, help="Metrics file")
+    parser.add_argument("--session", help="Only records from this session")
+    args = parser.parse_args()
+
+    path = args.file or tts_metrics.metrics_file()
+    records = load_records(path, time.time() - args.since, args.session)
+    if not records:
+        print(f"No metrics in window ({path})")
+        return
+
+    by_stage = defaultdict(list)
+    by_provider = defaultdict(list)
+    by_session = defaultdict(list)
+    for entry in records:
+        by_stage[(entry["stage"],)].append(entry["ms"])
+        if entry.get("provider"):
+            by_provider[(entry["stage"], entry["provider"])].append(entry["ms"])
+        if entry["stage"] == "queue_wait":
+            by_session[("queue_wait", entry.get("session", "?"))].append(entry["ms"])
+
+    print(f"{len(records)} records from {path}")
+    print_table("Per stage", by_stage)
+    if by_provider:
+        print_table("Per stage and provider", by_provider)
+    if by_session:
+        print_table("Daemon queue wait per session", by_session)
+
+
+if __name__ == "__main__":
+    main()
@@ -56,16 +56,40 @@ if [ -f "$HOOKS_DIR/PreCompact/01-announce.py" ]; then
     echo "  Removed PreCompact/01-announce.py"
 fi
 
+# Stop the synthesis daemon before removing its code
+if [ -f "$HOOKS_DIR/utils/tts_daemon.py" ]; then
+    python3 "$HOOKS_DIR/utils/tts_daemon.py" stop &> /dev/null && echo "  Stopped TTS daemon"
+fi
+rm -f "/tmp/claude-tts-playback-$(id -u).json"
+rm -f "/tmp/claude-tts-ratelimit-$(id -u).json"
+
 # Remove utils
 echo -e "${BLUE}Removing utility files...${NC}"
 TTS_UTILS=(
     "macos_say.py"
+    "espeak_tts.py"
     "kokoro_tts.py"
+    "kokoro_batch.py"
     "elevenlabs_tts.py"
     "openai_tts.py"
     "tts_router.py"
     "tts_dialog.py"
     "session_state.py"
+    "capabilities.py"
+    "phoneme_cache.py"
+    "audio_post.py"
+    "audio_output.py"
+    "audio_mixer.py"
+    "audio_sink.py"
+    "tts_metrics.py"
+    "hook_profiler.py"
+    "text_normalizer.py"
+    "speech_summary.py"
+    "transcript_watcher.py"
+    "tts_daemon.py"
+    "playback_registry.py"
+    "rate_limiter.py"
+    "speech_history.py"
     "__init__.py"
 )
 
@@ -76,6 +100,14 @@ for util in "${TTS_UTILS[@]}"; do
     fi
 done
 
+# Remove the hook runtime and compiled bytecode
+if [ -d "$HOOKS_DIR/.venv" ]; then
+    rm -rf "$HOOKS_DIR/.venv"
+    echo "  Removed hook runtime (.venv)"
+fi
+rm -f "$HOOKS_DIR/hook-requirements.lock"
+rm -rf "$HOOKS_DIR/utils/__pycache__"
+
 # Remove config
 if [ -f "$HOOKS_DIR/tts_config.json" ]; then
     echo -e "${YELLOW}Backing up tts_config.json to tts_config.json.uninstalled${NC}"
@@ -4,14 +4,31 @@ TTS provider utilities for Claude Code hooks.
 
 Providers:
 - kokoro_tts: Local neural TTS (82M parameters, free)
+- kokoro_batch: Batched Kokoro inference and request coalescing
 - elevenlabs_tts: Cloud TTS (ElevenLabs API)
 - openai_tts: Cloud TTS (OpenAI API)
 - macos_say: macOS native TTS (fallback)
+- espeak_tts: Resident espeak-ng (fallback off macOS)
 
 Utilities:
 - tts_router: Mode-aware provider selection
-- session_state: TTS mode persistence
-- tts_dialog: macOS AppleScript dialogs
+- speech_history: Per-session spoken history for replay
+- session_state: TTS mode persistence and remembered per-project modes
+- capabilities: Per-session snapshot of usable providers, players and key sources
+- tts_dialog: Provider selection dialogs and terminal selector
+- phoneme_cache: Persistent Kokoro G2P cache
+- audio_post: Vectorized trim, normalization, volume and crossfades
+- audio_mixer: In-process mixing of overlapping clips with ducking
+- audio_output: Shared PCM playback path
+- audio_sink: Null, realtime and capture sinks for headless testing
+- tts_metrics: Structured per-stage latency records
+- hook_profiler: Opt-in cProfile/tracemalloc wrapper for hooks
+- text_normalizer: Linear-time markdown-to-speech cleanup
+- speech_summary: Heuristic gist of long replies (summary speech mode)
+- transcript_watcher: Speaks reply text as it lands in the transcript
+- tts_daemon: Shared warm synthesis process (Unix socket)
+- playback_registry: In-flight utterances and barge-in cancellation
+- rate_limiter: Shared cloud request/character budgets, retries and overflow
 """
 
 __version__ = "1.0.0"
@@ -0,0 +1,409 @@
+"""
+In-process audio mixer for overlapping cues.
+
+Without it, every clip gets its own player process, so an acknowledgment,
+a compaction announcement and a response either collide on the device
+or wait for each other. The daemon instead plays everything through one
+output stream: clips at any sample rate (Kokoro 24 kHz, cloud PCM,
+macOS say) are resampled to the mixer rate and summed block by block,
+and speech is ducked while a short system cue plays over it.
+
+Output, in order of preference (audio.mixer.output "auto"):
+- sounddevice: a PortAudio callback stream (optional dependency)
+- a raw PCM pipe to one long-lived player: sox's play, ffplay, aplay or pacat
+
+The output is opened on the first clip and closed again after
+IDLE_CLOSE_SECONDS of silence. If none is available, start() returns
+False and playback stays one player process per clip.
+
+Only long-lived processes (the daemon) start the mixer; audio_output
+routes play_pcm() through it when active().
+
+Configuration via tts_config.json (audio.mixer):
+- enabled: Mix in the daemon (default true)
+- output: "auto", "sounddevice", "sox", "ffplay", "aplay" or "pacat"
+- sample_rate: Mixer and output rate in Hz (default 24000)
+- duck_db: Speech level while a cue plays (default -12)
+- duck_attack_ms / duck_release_ms: Ducking ramps (default 40 / 300)
+"""
+
+import contextvars
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import audio_post
+
+
+DEFAULT_SAMPLE_RATE = 24000
+DEFAULT_DUCK_DB = -12
+DEFAULT_DUCK_ATTACK_MS = 40
+DEFAULT_DUCK_RELEASE_MS = 300
+BLOCK_MS = 20
+# The pipe output is kept this far ahead of real time
+PIPE_LEAD_SECONDS = 0.1
+IDLE_CLOSE_SECONDS = 10
+
+_mixer = None
+# Whether playback on the current thread or asyncio task is a cue
+_cue = contextvars.ContextVar("claude_tts_cue", default=False)
+
+
+def _load_mixer_config() -> dict:
+    """Load audio.mixer from tts_config.json."""
+    return audio_post._load_audio_config().get("mixer", {})
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Linearly resample float32 mono samples.
+
+    Returns:
+        samples itself when the rates match, else a new float32 array
+    """
+    if from_rate == to_rate or samples.size == 0:
+        return samples
+    length = max(1, round(samples.size * to_rate / from_rate))
+    positions = np.arange(length, dtype=np.float64) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+class Voice:
+    """One clip being mixed."""
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, cue: bool):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.cue = cue
+        self.pos = 0
+        self.end = samples.size
+        self.done = threading.Event()
+        # Remaining fade-out frames and the total fade length
+        self._fade_left = None
+        self._fade_len = 0
+
+    @property
+    def duration(self) -> float:
+        return self.samples.size / self.sample_rate
+
+    @property
+    def position(self) -> float:
+        """Seconds of this clip handed to the output so far."""
+        return self.pos / self.sample_rate
+
+    def stop(self) -> None:
+        self.end = self.pos
+
+    def fade(self, ms: float) -> None:
+        """Fade out over ms from the current position, then stop."""
+        frames = int(self.sample_rate * ms / 1000)
+        self.end = min(self.end, self.pos + frames)
+        self._fade_left = self._fade_len = max(1, self.end - self.pos)
+
+    def stop_at(self, seconds: float) -> None:
+        """End at seconds into the clip (finish_sentence barge-in)."""
+        self.end = min(self.end, max(self.pos, int(seconds * self.sample_rate)))
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+    def _take(self, frames: int) -> np.ndarray:
+        """The next block of samples, with any fade applied."""
+        block = self.samples[self.pos:min(self.end, self.pos + frames)]
+        if self._fade_left is not None and block.size:
+            start = self._fade_left / self._fade_len
+            stop = (self._fade_left - block.size) / self._fade_len
+            block = block * np.linspace(start, stop, block.size, dtype=np.float32)
+            self._fade_left -= block.size
+        self.pos += block.size
+        return block
+
+
+class Mixer:
+    """Sums active voices into output blocks, ducking speech under cues."""
+
+    def __init__(self, sample_rate: int, duck_db: float, attack_ms: float, release_ms: float):
+        self.sample_rate = sample_rate
+        self.duck_gain = 10 ** (duck_db / 20)
+        self._attack = max(1, int(sample_rate * attack_ms / 1000))
+        self._release = max(1, int(sample_rate * release_ms / 1000))
+        self._gain = 1.0
+        self._voices = []
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self.clips = 0
+        self.overlaps = 0
+        self.last_active = time.monotonic()
+
+    def add(self, samples: np.ndarray, sample_rate: int, cue: bool = False) -> Voice:
+        voice = Voice(resample(samples, sample_rate, self.sample_rate), self.sample_rate, cue)
+        with self._lock:
+            if self._voices:
+                self.overlaps += 1
+            self._voices.append(voice)
+            self.clips += 1
+            self._active.set()
+        return voice
+
+    def busy(self) -> bool:
+        return self._active.is_set()
+
+    def _duck_ramp(self, frames: int, ducking: bool) -> np.ndarray:
+        """Speech gain for this block, moving toward the duck target."""
+        span = 1.0 - self.duck_gain
+        if ducking:
+            target = max(self.duck_gain, self._gain - span * frames / self._attack)
+        else:
+            target = min(1.0, self._gain + span * frames / self._release)
+        ramp = np.linspace(self._gain, target, frames, dtype=np.float32)
+        self._gain = target
+        return ramp
+
+    def render(self, frames: int) -> np.ndarray:
+        """Mix the next block of frames (float32, clipped to [-1, 1])."""
+        speech = np.zeros(frames, dtype=np.float32)
+        cues = np.zeros(frames, dtype=np.float32)
+        with self._lock:
+            voices = list(self._voices)
+        ducking = any(v.cue for v in voices)
+        for voice in voices:
+            block = voice._take(frames)
+            bus = cues if voice.cue else speech
+            bus[:block.size] += block
+        if ducking or self._gain < 1.0:
+            speech *= self._duck_ramp(frames, ducking)
+        speech += cues
+        np.clip(speech, -1.0, 1.0, out=speech)
+
+        finished = [v for v in voices if v.pos >= v.end]
+        if finished:
+            with self._lock:
+                self._voices = [v for v in self._voices if v not in finished]
+                if not self._voices:
+                    self._active.clear()
+            for voice in finished:
+                voice.done.set()
+        if voices:
+            self.last_active = time.monotonic()
+        return speech
+
+    def drop_all(self) -> None:
+        """Release every waiting voice (the output failed)."""
+        with self._lock:
+            voices, self._voices = self._voices, []
+            self._active.clear()
+        for voice in voices:
+            voice.done.set()
+
+    def idle_for(self) -> float:
+        return 0.0 if self.busy() else time.monotonic() - self.last_active
+
+
+class _SoundDeviceOutput:
+    """PortAudio callback stream; stopped while idle."""
+
+    name = "sounddevice"
+
+    def __init__(self, mixer: Mixer):
+        import sounddevice
+        self._sd = sounddevice
+        self._mixer = mixer
+        self._stream = None
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        outdata[:, 0] = self._mixer.render(frames)
+        with self._lock:
+            # Decided under the lock, so a clip added meanwhile reopens the stream
+            if self._mixer.idle_for() > IDLE_CLOSE_SECONDS:
+                self._stopping = True
+                raise self._sd.CallbackStop
+
+    def ensure_running(self) -> None:
+        with self._lock:
+            if self._stream is not None and not self._stopping:
+                return
+            if self._stream is not None:
+                self._stream.close()
+            self._stopping = False
+            try:
+                self._stream = self._sd.OutputStream(
+                    samplerate=self._mixer.sample_rate, channels=1, dtype="float32",
+                    blocksize=int(self._mixer.sample_rate * BLOCK_MS / 1000), callback=self._callback)
+                self._stream.start()
+            except Exception as e:
+                print(f"Mixer output sounddevice failed: {e}", file=sys.stderr)
+                self._stream = None
+                self._mixer.drop_all()
+
+
+class _PipeOutput:
+    """Raw 16-bit PCM piped to one player process, paced to real time."""
+
+    def __init__(self, mixer: Mixer, name: str, cmd: list):
+        self.name = name
+        self._mixer = mixer
+        self._cmd = cmd
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._feed, daemon=True)
+                self._thread.start()
+
+    def _idle_stop(self) -> bool:
+        """Decide under the lock, so a clip added meanwhile starts a new feeder."""
+        with self._lock:
+            if self._mixer.idle_for() > IDLE_CLOSE_SECONDS:
+                self._thread = None
+                return True
+            return False
+
+    def _feed(self) -> None:
+        rate = self._mixer.sample_rate
+        frames = int(rate * BLOCK_MS / 1000)
+        pcm = np.empty(frames, dtype="<i2")
+        try:
+            player = subprocess.Popen(self._cmd, stdin=subprocess.PIPE,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Mixer output {self.name} failed: {e}", file=sys.stderr)
+            self._fail()
+            return
+        start = time.monotonic()
+        written = 0
+        try:
+            while not self._idle_stop():
+                np.multiply(self._mixer.render(frames), 32767, out=pcm, casting="unsafe")
+                player.stdin.write(pcm.tobytes())
+                written += frames
+                ahead = start + written / rate - time.monotonic() - PIPE_LEAD_SECONDS
+                if ahead > 0:
+                    time.sleep(ahead)
+        except (BrokenPipeError, OSError) as e:
+            print(f"Mixer output {self.name} closed: {e}", file=sys.stderr)
+            self._fail()
+        finally:
+            try:
+                player.stdin.close()
+            except OSError:
+                pass
+            player.wait()
+
+
+    def _fail(self) -> None:
+        with self._lock:
+            self._thread = None
+        self._mixer.drop_all()
+
+
+def _pipe_command(name: str, rate: int) -> list:
+    """Player command reading mono s16le PCM at rate from stdin, if installed."""
+    commands = {
+        "sox": ("play", ["play", "-q", "-t", "raw", "-r", str(rate), "-e", "signed",
+                         "-b", "16", "-c", "1", "-"]),
+        "ffplay": ("ffplay", ["ffplay", "-nodisp", "-loglevel", "quiet", "-f", "s16le",
+                              "-ar", str(rate), "-ac", "1", "-"]),
+        "aplay": ("aplay", ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-r", str(rate), "-c", "1", "-"]),
+        "pacat": ("pacat", ["pacat", "--raw", "--format=s16le", f"--rate={rate}", "--channels=1"]),
+    }
+    binary, cmd = commands[name]
+    return cmd if shutil.which(binary) else None
+
+
+def _open_output(mixer: Mixer, choice: str):
+    """The first available output backend for audio.mixer.output."""
+    names = ["sounddevice", "sox", "ffplay", "aplay", "pacat"] if choice == "auto" else [choice]
+    for name in names:
+        if name == "sounddevice":
+            try:
+                return _SoundDeviceOutput(mixer)
+            except (ImportError, OSError):
+                continue
+        if name not in ("sox", "ffplay", "aplay", "pacat"):
+            print(f"Unknown mixer output: {name}", file=sys.stderr)
+            continue
+        cmd = _pipe_command(name, mixer.sample_rate)
+        if cmd:
+            return _PipeOutput(mixer, name, cmd)
+    return None
+
+
+def start() -> bool:
+    """Route this process's playback through one mixed output stream.
+
+    Returns:
+        True if the mixer is running (or already was)
+    """
+    global _mixer
+    if _mixer is not None:
+        return True
+    config = _load_mixer_config()
+    if not config.get("enabled", True):
+        return False
+    import audio_sink
+    if audio_sink.selected() != "device":
+        # Test sinks take clips one by one; don't open the device
+        return False
+    mixer = Mixer(
+        config.get("sample_rate", DEFAULT_SAMPLE_RATE),
+        config.get("duck_db", DEFAULT_DUCK_DB),
+        config.get("duck_attack_ms", DEFAULT_DUCK_ATTACK_MS),
+        config.get("duck_release_ms", DEFAULT_DUCK_RELEASE_MS),
+    )
+    output = _open_output(mixer, config.get("output", "auto"))
+    if output is None:
+        print("No mixer output available; playing clips one by one", file=sys.stderr)
+        return False
+    mixer.output = output
+    _mixer = mixer
+    return True
+
+
+def active() -> bool:
+    """Check whether play() is available in this process."""
+    return _mixer is not None
+
+
+@contextmanager
+def cue():
+    """Mark playback on this thread (or task) as a system cue (speech ducks under it)."""
+    previous = _cue.get()
+    _cue.set(True)
+    try:
+        yield
+    finally:
+        _cue.set(previous)
+
+
+def play(samples: np.ndarray, sample_rate: int) -> Voice:
+    """Start mixing a clip; returns its Voice to wait on or cut short.
+
+    Args:
+        samples: Post-processed float32 mono samples
+        sample_rate: Their sample rate (resampled to the mixer rate)
+    """
+    voice = _mixer.add(samples, sample_rate, cue=_cue.get())
+    _mixer.output.ensure_running()
+    return voice
+
+
+def stats() -> dict:
+    """Mixer output, clips played and clips that overlapped another."""
+    if _mixer is None:
+        return {"active": False}
+    return {
+        "active": True,
+        "output": _mixer.output.name,
+        "sample_rate": _mixer.sample_rate,
+        "clips": _mixer.clips,
+        "overlaps": _mixer.overlaps,
+        "playing": len(_mixer._voices),
+    }
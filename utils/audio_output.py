@@ -0,0 +1,259 @@
+"""
+PCM playback shared by all providers.
+
+Providers hand float32 samples to play_pcm(), which runs the
+audio_post stage (trim, normalization, volume) and plays the result.
+Cloud providers request raw 16-bit PCM and convert with pcm16_to_float32().
+
+Playback watches the current barge-in utterance (playback_registry) and
+ends early when it is cancelled: immediately, with a short fade-out, or
+at the end of the current sentence.
+
+Inside speech_history.recording(), each clip is also kept for replay.
+
+In the daemon, clips go to the in-process mixer (audio_mixer) instead of
+a player process per clip, so they can overlap on one output stream.
+
+With a test sink selected (audio_sink: null, realtime, capture), clips
+go there instead of the device.
+
+play() is the asyncio counterpart for a provider's synthesize() stream:
+chunks are synthesized ahead while earlier ones play.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audio_mixer
+import audio_post
+import audio_sink
+import playback_registry
+import speech_history
+import tts_metrics
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit PCM bytes to float32 samples."""
+    # Drop a dangling odd byte from a truncated stream
+    pcm = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2")
+    samples = pcm.astype(np.float32)
+    np.multiply(samples, np.float32(1 / 32768), out=samples)
+    return samples
+
+
+def read_wav(path: str) -> tuple:
+    """Read a 16-bit PCM WAV file as float32 mono samples.
+
+    Returns:
+        (samples, sample_rate)
+    """
+    with wave.open(str(path), "rb") as w:
+        sample_rate = w.getframerate()
+        channels = w.getnchannels()
+        samples = pcm16_to_float32(w.readframes(w.getnframes()))
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return samples, sample_rate
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int) -> None:
+    """Write float32 samples as a 16-bit PCM WAV file.
+
+    Clips in place and converts straight into the int16 output buffer.
+    """
+    np.clip(samples, -1.0, 1.0, out=samples)
+    pcm = np.empty(len(samples), dtype="<i2")
+    np.multiply(samples, 32767, out=pcm, casting="unsafe")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+
+
+def _play_fade(samples: np.ndarray, sample_rate: int, position: float) -> None:
+    """Play a short linear fade-out of the audio from position (seconds)."""
+    fade_ms = playback_registry._load_barge_in_config().get("fade_ms", playback_registry.DEFAULT_FADE_MS)
+    start = int(position * sample_rate)
+    tail = samples[start:start + int(sample_rate * fade_ms / 1000)].copy()
+    if tail.size == 0:
+        return
+    tail *= np.linspace(1.0, 0.0, tail.size, dtype=np.float32)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+        fade_path = f.name
+    try:
+        write_wav(fade_path, tail, sample_rate)
+        subprocess.run(["afplay", fade_path], capture_output=True)
+    finally:
+        os.remove(fade_path)
+
+
+def _wait_player(player: subprocess.Popen, samples: np.ndarray, sample_rate: int, text: str = None) -> int:
+    """Wait for the player, ending it early if the utterance is cancelled.
+
+    Returns:
+        The player's exit code, or 0 if playback was cut short on purpose
+    """
+    duration = len(samples) / sample_rate
+    started = time.monotonic()
+    stop_at = None
+    while player.poll() is None:
+        if stop_at is None and playback_registry.cancelled():
+            played = time.monotonic() - started
+            mode = playback_registry.current().mode
+            if mode == "finish_sentence":
+                stop_at = started + playback_registry.stop_point(played, duration, text)
+                continue
+            player.terminate()
+            player.wait()
+            if mode == "fade":
+                _play_fade(samples, sample_rate, played)
+            return 0
+        if stop_at is not None and time.monotonic() >= stop_at:
+            player.terminate()
+            player.wait()
+            return 0
+        time.sleep(playback_registry.POLL_INTERVAL)
+    return player.returncode
+
+
+def _play_mixed(samples: np.ndarray, sample_rate: int, text: str = None) -> None:
+    """Play through the in-process mixer, ending early on barge-in."""
+    voice = audio_mixer.play(samples, sample_rate)
+    playback_registry.player_started(None, voice.duration, text)
+    stopping = False
+    while not voice.wait(playback_registry.POLL_INTERVAL):
+        if stopping or not playback_registry.cancelled():
+            continue
+        stopping = True
+        mode = playback_registry.current().mode
+        if mode == "finish_sentence":
+            voice.stop_at(playback_registry.stop_point(voice.position, voice.duration, text))
+        elif mode == "fade":
+            voice.fade(playback_registry._load_barge_in_config().get(
+                "fade_ms", playback_registry.DEFAULT_FADE_MS))
+        else:
+            voice.stop()
+
+
+def play_pcm(samples: np.ndarray, sample_rate: int, volume: float = 1.0, text: str = None) -> bool:
+    """Post-process and play float32 samples.
+
+    Args:
+        samples: float32 mono samples (modified in place)
+        sample_rate: Sample rate in Hz
+        volume: Playback volume (0.0 to 1.0)
+        text: Text of these samples when they are one chunk of a longer
+            utterance (for finish_sentence barge-in)
+
+    Returns:
+        True if successful (or cancelled by barge-in), False otherwise
+    """
+    if playback_registry.cancelled():
+        return True
+    speech_history.capture(samples, sample_rate, volume)
+    samples = audio_post.process(samples, sample_rate, volume=volume)
+    if samples.size == 0:
+        return True
+    sink = audio_sink.selected()
+    if sink != "device":
+        # Headless: null, realtime or capture instead of the device
+        with tts_metrics.timed("playback", **tts_metrics.utterance_tags(),
+                               audio_ms=round(len(samples) / sample_rate * 1000), sink=sink):
+            audio_sink.play(samples, sample_rate, text)
+        tts_metrics.mark("playback_end")
+        return True
+    if audio_mixer.active():
+        with tts_metrics.timed("playback", **tts_metrics.utterance_tags(),
+                               audio_ms=round(len(samples) / sample_rate * 1000), mixed=True):
+            _play_mixed(samples, sample_rate, text)
+        tts_metrics.mark("playback_end")
+        return True
+
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+            temp_path = f.name
+        write_wav(temp_path, samples, sample_rate)
+        with tts_metrics.timed("playback", **tts_metrics.utterance_tags(),
+                               audio_ms=round(len(samples) / sample_rate * 1000)):
+            with subprocess.Popen(["afplay", temp_path], stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL) as player:
+                playback_registry.player_started(player.pid, len(samples) / sample_rate, text)
+                returncode = _wait_player(player, samples, sample_rate, text)
+            # A negative code means the player was killed (barge-in), not an error
+            if returncode > 0:
+                raise subprocess.CalledProcessError(returncode, player.args)
+        tts_metrics.mark("playback_end")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Audio playback failed: {e}", file=sys.stderr)
+        return False
+    except FileNotFoundError:
+        print("afplay not found (not on macOS?)", file=sys.stderr)
+        return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+async def play(chunks, volume: float = 1.0, prefetch: int = 1) -> bool:
+    """Play an async stream of chunks as they arrive.
+
+    A producer task keeps up to prefetch chunks synthesized ahead of the
+    one playing; play_pcm() runs on a worker thread so the event loop
+    stays free. The pipeline gets its own metrics state, so concurrent
+    calls (asyncio.gather) don't mix their timings.
+
+    Args:
+        chunks: Async iterator of (samples, sample_rate, chunk_text), e.g.
+            a provider's synthesize()
+        volume: Playback volume (0.0 to 1.0)
+        prefetch: Chunks synthesized ahead of playback (default 1)
+
+    Returns:
+        True if every chunk played (or barge-in stopped it), False if
+        nothing was synthesized or playback failed
+    """
+    tts_metrics.isolate()
+    ready = asyncio.Queue(maxsize=max(1, prefetch))
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                await ready.put(chunk)
+        except Exception as e:
+            print(f"Synthesis failed: {e}", file=sys.stderr)
+        # End of stream (not sent when cancelled)
+        await ready.put(None)
+
+    producer = asyncio.create_task(produce())
+    played = 0
+    try:
+        while True:
+            chunk = await ready.get()
+            if chunk is None:
+                break
+            samples, sample_rate, text = chunk
+            if not await asyncio.to_thread(play_pcm, samples, sample_rate, volume, text):
+                return False
+            played += 1
+            if playback_registry.cancelled():
+                break
+    finally:
+        producer.cancel()
+        await asyncio.wait([producer])
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
+    return played > 0 or playback_registry.cancelled()
@@ -0,0 +1,175 @@
+"""
+Vectorized audio post-processing for the PCM path.
+
+Every provider's output passes through here before playback:
+1. Leading/trailing silence trim (returns a view, no copy)
+2. Peak or loudness (RMS) normalization, in place
+3. Volume gain, in place
+4. Short crossfades when joining chunks
+
+All functions work on float32 mono buffers in the range [-1, 1].
+
+Configuration via tts_config.json:
+- audio.trim_silence: Trim leading/trailing silence (default true)
+- audio.silence_threshold: Amplitude treated as silence (default 0.01)
+- audio.normalize: "peak", "loudness" or "none" (default "peak")
+- audio.target_peak: Peak level after normalization (default 0.95)
+- audio.target_rms: RMS level for loudness normalization (default 0.1)
+- audio.crossfade_ms: Crossfade between chunks (default 10)
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+
+DEFAULT_SILENCE_THRESHOLD = 0.01
+DEFAULT_TARGET_PEAK = 0.95
+DEFAULT_TARGET_RMS = 0.1
+DEFAULT_CROSSFADE_MS = 10
+# Keep a little audio around trimmed edges so consonants aren't clipped
+TRIM_PAD_MS = 15
+
+_audio_config = None
+
+
+def _load_audio_config() -> dict:
+    """Load the audio section from tts_config.json (once per process)."""
+    global _audio_config
+    if _audio_config is None:
+        _audio_config = {}
+        try:
+            config_path = HOOKS_DIR / "tts_config.json"
+            if config_path.exists():
+                with open(config_path) as f:
+                    _audio_config = json.load(f).get("audio", {})
+        except Exception:
+            pass
+    return _audio_config
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int,
+                 threshold: float = DEFAULT_SILENCE_THRESHOLD) -> np.ndarray:
+    """Trim leading and trailing silence.
+
+    Returns:
+        A view into samples (no copy)
+    """
+    loud = np.flatnonzero(np.abs(samples) > threshold)
+    if loud.size == 0:
+        return samples[:0]
+    pad = int(sample_rate * TRIM_PAD_MS / 1000)
+    start = max(0, int(loud[0]) - pad)
+    end = min(len(samples), int(loud[-1]) + pad + 1)
+    return samples[start:end]
+
+
+def peak(samples: np.ndarray) -> float:
+    """Absolute peak level without allocating an abs() copy."""
+    if samples.size == 0:
+        return 0.0
+    return float(max(samples.max(), -samples.min()))
+
+
+def rms(samples: np.ndarray) -> float:
+    """RMS level (dot product, no temporary array)."""
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.dot(samples, samples) / samples.size))
+
+
+def apply_gain(samples: np.ndarray, gain: float) -> np.ndarray:
+    """Scale samples in place."""
+    if gain != 1.0:
+        np.multiply(samples, np.float32(gain), out=samples)
+    return samples
+
+
+def normalize(samples: np.ndarray, mode: str = "peak",
+              target_peak: float = DEFAULT_TARGET_PEAK,
+              target_rms: float = DEFAULT_TARGET_RMS) -> np.ndarray:
+    """Normalize in place to a peak or loudness (RMS) target.
+
+    Loudness normalization is limited so the peak never exceeds target_peak.
+    """
+    current_peak = peak(samples)
+    if mode == "none" or current_peak == 0.0:
+        return samples
+    gain = target_peak / current_peak
+    if mode == "loudness":
+        current_rms = rms(samples)
+        if current_rms > 0.0:
+            gain = min(gain, target_rms / current_rms)
+    return apply_gain(samples, gain)
+
+
+def process(samples: np.ndarray, sample_rate: int, volume: float = 1.0,
+            trim: bool = None) -> np.ndarray:
+    """Run the full post-processing stage on one buffer.
+
+    Args:
+        samples: float32 mono samples (modified in place)
+        sample_rate: Sample rate in Hz
+        volume: Playback volume (0.0 to 1.0)
+        trim: Override audio.trim_silence
+
+    Returns:
+        The processed samples (a view of the input buffer)
+    """
+    config = _load_audio_config()
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim > 1:
+        samples = samples.reshape(-1)
+    if not samples.flags.writeable:
+        samples = samples.copy()
+
+    if trim if trim is not None else config.get("trim_silence", True):
+        samples = trim_silence(samples, sample_rate,
+                               config.get("silence_threshold", DEFAULT_SILENCE_THRESHOLD))
+    normalize(
+        samples,
+        mode=config.get("normalize", "peak"),
+        target_peak=config.get("target_peak", DEFAULT_TARGET_PEAK),
+        target_rms=config.get("target_rms", DEFAULT_TARGET_RMS),
+    )
+    apply_gain(samples, max(0.0, min(1.0, volume)))
+    return samples
+
+
+def join_chunks(chunks: list, sample_rate: int, crossfade_ms: float = None) -> np.ndarray:
+    """Join chunks into one buffer with short linear crossfades.
+
+    Each chunk is trimmed first, then written straight into a single
+    preallocated output buffer; overlaps are faded in place.
+    """
+    config = _load_audio_config()
+    if crossfade_ms is None:
+        crossfade_ms = config.get("crossfade_ms", DEFAULT_CROSSFADE_MS)
+    threshold = config.get("silence_threshold", DEFAULT_SILENCE_THRESHOLD)
+
+    parts = [trim_silence(np.asarray(c, dtype=np.float32).reshape(-1), sample_rate, threshold)
+             for c in chunks]
+    parts = [p for p in parts if p.size]
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+
+    fade = int(sample_rate * crossfade_ms / 1000)
+    overlaps = [min(fade, len(a), len(b)) for a, b in zip(parts, parts[1:])]
+    out = np.empty(sum(len(p) for p in parts) - sum(overlaps), dtype=np.float32)
+
+    pos = 0
+    for i, part in enumerate(parts):
+        overlap = overlaps[i - 1] if i > 0 else 0
+        if overlap:
+            ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            region = out[pos - overlap:pos]
+            # region = region * (1 - ramp) + head * ramp, computed in place
+            np.multiply(region, 1.0 - ramp, out=region)
+            np.multiply(ramp, part[:overlap], out=ramp)
+            np.add(region, ramp, out=region)
+        out[pos:pos + len(part) - overlap] = part[overlap:]
+        pos += len(part) - overlap
+    return out
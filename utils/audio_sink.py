@@ -0,0 +1,200 @@
+"""
+Pluggable audio sinks for headless testing and measurement.
+
+play_pcm() normally hands post-processed audio to the device (afplay,
+or the daemon's mixer). audio.sink in tts_config.json, or the
+CLAUDE_TTS_SINK environment variable, swaps the device for:
+
+- null: discard the audio immediately
+- realtime: discard it, but take as long as the device would; barge-in
+  stops, fades or finishes the sentence as it does on the device
+- capture: write each buffer as a WAV file and append it to one
+  16-bit PCM stream
+
+Sinks combine with "+" (capture+realtime). Every sink other than
+device logs each buffer to timeline.jsonl in the capture directory, once
+when it arrives (duration, pid, hook, session, utterance, provider) and
+once when it ends (end time, time played, how playback ended);
+read_timeline() merges the two. End-to-end
+latency and ordering of all four hooks can then be checked on a
+machine without a sound card (see scripts/test-hooks-e2e.py).
+
+The daemon's mixer drives the device directly, so it is not started
+while a non-device sink is selected; clips are delivered one by one.
+
+Configuration via tts_config.json (audio section):
+- sink: device, null, realtime or capture (default device)
+- capture_dir: Timeline and capture directory
+  (default /tmp/claude-tts-capture-<uid>; CLAUDE_TTS_CAPTURE_DIR overrides)
+"""
+
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import playback_registry
+import tts_metrics
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+SINKS = ("device", "null", "realtime", "capture")
+DEFAULT_SINK = "device"
+DEFAULT_CAPTURE_DIR = Path(f"/tmp/claude-tts-capture-{os.getuid()}")
+# stream.pcm is one rate whatever the provider's
+STREAM_RATE = 24000
+
+_counter = 0
+_counter_lock = threading.Lock()
+
+
+def _load_audio_config() -> dict:
+    """Load the audio section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("audio", {})
+    except Exception:
+        pass
+    return {}
+
+
+def selected() -> str:
+    """The configured sink ("device" unless overridden)."""
+    sink = os.environ.get("CLAUDE_TTS_SINK") or _load_audio_config().get("sink") or DEFAULT_SINK
+    parts = sink.split("+")
+    if not all(part in SINKS for part in parts) or ("device" in parts and len(parts) > 1):
+        print(f"Unknown audio sink {sink!r}; using {DEFAULT_SINK}", file=sys.stderr)
+        return DEFAULT_SINK
+    return sink
+
+
+def capture_dir() -> Path:
+    configured = os.environ.get("CLAUDE_TTS_CAPTURE_DIR") or _load_audio_config().get("capture_dir")
+    return Path(configured).expanduser() if configured else DEFAULT_CAPTURE_DIR
+
+
+@contextmanager
+def _locked(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _buffer_name() -> str:
+    global _counter
+    with _counter_lock:
+        _counter += 1
+        return f"{int(time.time() * 1000)}-{os.getpid()}-{_counter:04d}"
+
+
+def _capture(directory: Path, name: str, samples: np.ndarray, sample_rate: int) -> dict:
+    """Write one buffer as WAV and append it to stream.pcm (caller holds the lock)."""
+    import audio_mixer
+    import audio_output
+
+    audio_output.write_wav(directory / f"{name}.wav", samples.copy(), sample_rate)
+    stream = directory / "stream.pcm"
+    offset = stream.stat().st_size // 2 if stream.exists() else 0
+    pcm = np.clip(audio_mixer.resample(samples, sample_rate, STREAM_RATE), -1.0, 1.0)
+    with open(stream, "ab") as f:
+        f.write((pcm * 32767).astype("<i2").tobytes())
+    return {"file": f"{name}.wav", "stream_offset": offset, "stream_samples": len(pcm)}
+
+
+def _pace(duration: float, text: str = None) -> tuple:
+    """Take as long as the device would to play duration seconds.
+
+    Returns:
+        (seconds played, how playback ended: complete, stop, fade or finish_sentence)
+    """
+    started = time.monotonic()
+    end = started + duration
+    ended = "complete"
+    while True:
+        now = time.monotonic()
+        if now >= end:
+            return min(duration, now - started), ended
+        if ended == "complete" and playback_registry.cancelled():
+            played = now - started
+            ended = playback_registry.current().mode
+            if ended == "stop":
+                return played, ended
+            if ended == "fade":
+                fade_ms = playback_registry._load_barge_in_config().get(
+                    "fade_ms", playback_registry.DEFAULT_FADE_MS)
+                end = min(end, now + fade_ms / 1000)
+            else:
+                end = min(end, started + playback_registry.stop_point(played, duration, text))
+        time.sleep(min(playback_registry.POLL_INTERVAL, max(0.0, end - now)))
+
+
+def play(samples: np.ndarray, sample_rate: int, text: str = None) -> None:
+    """Deliver post-processed samples to the selected sink and log them.
+
+    Args:
+        samples: float32 mono samples
+        sample_rate: Sample rate in Hz
+        text: Text of the chunk (for finish_sentence barge-in)
+    """
+    sink = selected()
+    parts = sink.split("+")
+    duration = len(samples) / sample_rate
+    utterance = playback_registry.current()
+    entry = {"ts": round(time.time(), 4), "sink": sink, "pid": os.getpid(),
+             "sample_rate": sample_rate, "audio_ms": round(duration * 1000, 1),
+             **tts_metrics.context_tags(), **tts_metrics.utterance_tags()}
+    if utterance is not None:
+        entry.update(utterance=utterance.id, session=utterance.session)
+    if text:
+        entry["text"] = text
+    directory = capture_dir()
+    entry["id"] = _buffer_name()
+    with _locked(directory):
+        if "capture" in parts:
+            entry.update(_capture(directory, entry["id"], samples, sample_rate))
+        _log(directory, entry)
+
+    playback_registry.player_started(None, duration, text)
+    played, ended = _pace(duration, text) if "realtime" in parts else (0.0, "complete")
+    with _locked(directory):
+        _log(directory, {"id": entry["id"], "end_ts": round(time.time(), 4),
+                         "played_ms": round(played * 1000, 1), "ended": ended})
+
+
+def _log(directory: Path, record: dict) -> None:
+    """Append to the timeline (caller holds the lock)."""
+    with open(directory / "timeline.jsonl", "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def read_timeline(directory: Path = None) -> list:
+    """Timeline entries, one per buffer, in arrival order.
+
+    Buffers still playing have no end_ts, played_ms or ended yet.
+    """
+    path = (directory or capture_dir()) / "timeline.jsonl"
+    if not path.exists():
+        return []
+    buffers = {}
+    for line in path.read_text().splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        buffers.setdefault(record.get("id"), {}).update(record)
+    return sorted((entry for entry in buffers.values() if "ts" in entry), key=lambda entry: entry["ts"])
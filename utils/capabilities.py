@@ -0,0 +1,230 @@
+"""
+Capability snapshot: which providers, players and API keys are usable.
+
+Finding out is not free: API keys are looked up in the environment,
+~/.claude/.env and ~/.config/elevenlabs/api_key, Kokoro needs its model
+files and package, and the fallbacks need binaries on PATH. A new
+session probes all of it once, in the detached process SessionStart
+starts (tts_dialog.py resolve --probe), and keeps the result in session
+state under "capabilities"; the router, the hooks and the providers read
+the snapshot instead of probing again. It is rebuilt when a new session
+starts or when one of its sources changes (the key and model files or
+tts_config.json by mtime/size, PATH, the key variables, the
+interpreter), and built on demand by the first hook that finds none.
+
+API keys themselves are never stored: the snapshot only records where
+each key resolves, and the session state file is private (0600).
+api_key() then reads that one source, once per process.
+
+Usage:
+    python3 capabilities.py          # Show the snapshot (rebuilt)
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import session_state
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+ENV_FILE = Path.home() / ".claude" / ".env"
+# Where each provider's key may come from, in lookup order
+KEY_SOURCES = {
+    "elevenlabs": ("ELEVENLABS_API_KEY", [ENV_FILE, Path.home() / ".config" / "elevenlabs" / "api_key"]),
+    "openai": ("OPENAI_API_KEY", [ENV_FILE]),
+}
+BINARIES = ("afplay", "say", "espeak-ng", "espeak", "osascript", "zenity", "kdialog",
+            "play", "ffplay", "aplay", "pacat")
+PACKAGES = ("kokoro_onnx", "onnxruntime", "requests", "openai", "sounddevice", "numpy")
+# Kokoro model file per variant ("" for fp32), as in kokoro_tts.MODEL_VARIANTS
+KOKORO_MODEL = "kokoro-v1.0{variant}.onnx"
+# A long-lived process (the daemon) re-checks the sources this often
+RECHECK_SECONDS = 5.0
+
+_snapshot = None
+_checked_at = 0.0
+_keys = {}
+
+
+def _read_key(provider: str, source: str) -> str:
+    """Read a provider's key from one source ("env" or a file path)."""
+    variable, _ = KEY_SOURCES[provider]
+    if source == "env":
+        return os.getenv(variable, "")
+    path = Path(source)
+    try:
+        if path.name != ".env":
+            return path.read_text().strip()
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and "=" in line:
+                    key, value = line.split("=", 1)
+                    if key.strip() == variable:
+                        return value.strip()
+    except OSError:
+        pass
+    return ""
+
+
+def _find_key(provider: str):
+    """Probe every source for a provider's key.
+
+    Returns:
+        (source, key), or (None, "") if none resolves
+    """
+    _, files = KEY_SOURCES[provider]
+    for source in ["env", *(str(path) for path in files)]:
+        key = _read_key(provider, source)
+        if key:
+            return source, key
+    return None, ""
+
+
+def _kokoro_files() -> list:
+    """Model and voices files Kokoro would load (per tts_config.json).
+
+    Resolved like kokoro_tts.MODEL_PATH, without importing it (and numpy).
+    """
+    try:
+        with open(HOOKS_DIR / "tts_config.json") as f:
+            config = json.load(f).get("providers", {}).get("kokoro", {})
+    except (OSError, ValueError):
+        config = {}
+    model_dir = Path(os.path.expanduser(config.get("model_dir", "~/.local/share/kokoro")))
+    variant = config.get("model_variant", "fp32")
+    model = model_dir / KOKORO_MODEL.format(variant=f".{variant}" if variant != "fp32" else "")
+    if not model.exists():
+        model = model_dir / KOKORO_MODEL.format(variant="")
+    return [str(model), str(model_dir / "voices-v1.0.bin")]
+
+
+def _sources(snapshot: dict) -> list:
+    """Files whose change invalidates the snapshot."""
+    files = {str(HOOKS_DIR / "tts_config.json"), *snapshot["kokoro_files"]}
+    for _, paths in KEY_SOURCES.values():
+        files.update(str(path) for path in paths)
+    return sorted(files)
+
+
+def _fingerprint(files: list) -> str:
+    """Hash of the environment and the sources' size and mtime."""
+    parts = [sys.executable, sys.platform, os.environ.get("PATH", "")]
+    parts += [os.environ.get(variable, "") for variable, _ in KEY_SOURCES.values()]
+    for path in files:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:-")
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+
+
+def probe() -> dict:
+    """Probe everything now (no caching)."""
+    packages = {name: importlib.util.find_spec(name) is not None for name in PACKAGES}
+    binaries = {name: shutil.which(name) for name in BINARIES}
+    keys = {}
+    for provider in KEY_SOURCES:
+        source, key = _find_key(provider)
+        keys[provider] = source
+        if key:
+            _keys[provider] = key
+    kokoro_files = _kokoro_files()
+    import ctypes.util
+    espeak_library = ctypes.util.find_library("espeak-ng")
+    if espeak_library is None and importlib.util.find_spec("espeakng_loader") is not None:
+        espeak_library = "espeakng_loader"
+    snapshot = {
+        "session_id": session_state.get_session_state().get("session_id"),
+        "created_at": time.time(),
+        "providers": {
+            "kokoro": packages["kokoro_onnx"] and bool(kokoro_files)
+                      and all(os.path.exists(path) for path in kokoro_files),
+            "elevenlabs": packages["requests"] and keys["elevenlabs"] is not None,
+            "openai": packages["openai"] and keys["openai"] is not None,
+            "macos_say": sys.platform == "darwin" and binaries["say"] is not None,
+            "espeak": espeak_library is not None or bool(binaries["espeak-ng"] or binaries["espeak"]),
+        },
+        "keys": keys,
+        "binaries": binaries,
+        "packages": packages,
+        "espeak_library": espeak_library,
+        "kokoro_files": kokoro_files,
+    }
+    snapshot["fingerprint"] = _fingerprint(_sources(snapshot))
+    return snapshot
+
+
+def refresh() -> dict:
+    """Probe again and store the result in session state (new sessions)."""
+    global _snapshot, _checked_at
+    _snapshot = probe()
+    _checked_at = time.monotonic()
+    try:
+        session_state.save_capabilities(_snapshot)
+    except OSError as e:
+        print(f"Could not save capabilities: {e}", file=sys.stderr)
+    return _snapshot
+
+
+def snapshot() -> dict:
+    """The current snapshot, rebuilt only if its sources changed."""
+    global _snapshot, _checked_at
+    if _snapshot is not None and time.monotonic() - _checked_at < RECHECK_SECONDS:
+        return _snapshot
+    stored = _snapshot or session_state.get_session_state().get("capabilities")
+    if stored and stored.get("fingerprint") == _fingerprint(_sources(stored)):
+        _snapshot, _checked_at = stored, time.monotonic()
+        return _snapshot
+    _keys.clear()
+    return refresh()
+
+
+def usable(provider: str) -> bool:
+    """Whether a provider (kokoro, elevenlabs, openai, macos_say, espeak) can be used."""
+    return bool(snapshot()["providers"].get(provider))
+
+
+def binary(name: str):
+    """Path of a binary, from the snapshot when it is one of BINARIES."""
+    if name in BINARIES:
+        return snapshot()["binaries"].get(name)
+    return shutil.which(name)
+
+
+def espeak_library():
+    """The espeak-ng library found at probe time: a path, "espeakng_loader", or None."""
+    return snapshot().get("espeak_library")
+
+
+def api_key(provider: str) -> str:
+    """A provider's API key, read from the source the snapshot recorded.
+
+    Returns:
+        The key, or "" if none resolves
+    """
+    source = snapshot()["keys"].get(provider)
+    if source is None:
+        return ""
+    if provider not in _keys:
+        key = _read_key(provider, source)
+        if not key:
+            # Moved since the snapshot: look everywhere again
+            refresh()
+            return _keys.get(provider, "")
+        _keys[provider] = key
+    return _keys[provider]
+
+
+if __name__ == "__main__":
+    print(json.dumps(refresh(), indent=2))
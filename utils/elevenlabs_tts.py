@@ -3,54 +3,145 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #     "requests",
+#     "numpy",
 # ]
 # ///
 """
 ElevenLabs TTS API wrapper.
 UV single-file script with inline dependencies.
+
+The API base URL can be overridden (e.g. to point at
+scripts/mock-tts-server.py) via ELEVENLABS_BASE_URL or
+providers.elevenlabs.base_url in tts_config.json.
+
+Requests go through the shared rate limiter (rate_limiter.py), which
+retries 429/5xx responses and may turn a request away; speak() then
+returns False and rate_limiter.overflow_mode() names the fallback.
+
+synthesize() is the asyncio counterpart: one request per chunk of
+whole sentences, run on worker threads so the event loop keeps playing
+earlier chunks while later ones download.
 """
 
+import asyncio
+import json
 import os
 import sys
-import tempfile
-import subprocess
+import time
 from pathlib import Path
 
 import requests
 
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import capabilities
+import playback_registry
+import rate_limiter
+import text_normalizer
+import tts_metrics
+
 
 # API configuration
-API_URL = "https://api.elevenlabs.io/v1/text-to-speech"
+DEFAULT_BASE_URL = "https://api.elevenlabs.io"
+API_PATH = "/v1/text-to-speech"
+API_URL = DEFAULT_BASE_URL + API_PATH
 DEFAULT_MODEL = "eleven_flash_v2_5"
 DEFAULT_SPEED = 1.0
 DEFAULT_STABILITY = 0.5
 DEFAULT_SIMILARITY = 0.75
+# Raw 16-bit PCM so output goes through the shared post-processing stage
+OUTPUT_FORMAT = "pcm_24000"
+SAMPLE_RATE = 24000
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+
+# Reused across calls so a long-lived process keeps its TLS connection
+_session = None
+
+
+def _load_provider_config() -> dict:
+    """Load providers.elevenlabs from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("providers", {}).get("elevenlabs", {})
+    except Exception:
+        pass
+    return {}
+
+
+def get_api_url() -> str:
+    """Get the text-to-speech endpoint, honouring a configured base URL."""
+    base_url = os.getenv("ELEVENLABS_BASE_URL") or _load_provider_config().get("base_url")
+    if not base_url:
+        return API_URL
+    return base_url.rstrip("/") + API_PATH
+
+
+def get_session():
+    """Get the shared requests session (connection pool)."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def warmup() -> bool:
+    """Open a keep-alive connection to the API ahead of the first request.
+
+    Returns:
+        True if the server answered (any status), False otherwise
+    """
+    api_key = load_api_key()
+    if not api_key:
+        return False
+    try:
+        base_url = get_api_url()[:-len(API_PATH)]
+        get_session().get(f"{base_url}/v1/models", headers={"xi-api-key": api_key}, timeout=5).close()
+        return True
+    except requests.exceptions.RequestException:
+        return False
 
 
 def load_api_key() -> str:
-    """Load ElevenLabs API key from environment or .env file."""
-    # Check environment first
-    api_key = os.getenv("ELEVENLABS_API_KEY", "")
-    if api_key:
-        return api_key
-
-    # Try ~/.claude/.env (unified credentials)
-    env_file = Path.home() / ".claude" / ".env"
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    if key.strip() == "ELEVENLABS_API_KEY":
-                        return value.strip()
-
-    # Fallback: check for key file
-    key_file = Path.home() / ".config" / "elevenlabs" / "api_key"
-    if key_file.exists():
-        return key_file.read_text().strip()
-
-    return ""
+    """Load the ElevenLabs API key from the source the capability snapshot
+    recorded (environment, ~/.claude/.env, ~/.config/elevenlabs/api_key)."""
+    return capabilities.api_key("elevenlabs")
+
+
+def _payload(text: str, model: str, stability: float, similarity_boost: float, speed: float) -> dict:
+    """Request body for one text-to-speech call."""
+    return {
+        "text": text,
+        "model_id": model,
+        "voice_settings": {
+            "stability": stability,
+            "similarity_boost": similarity_boost,
+            # Clamp speed to ElevenLabs limits
+            "speed": max(0.7, min(1.2, speed))
+        }
+    }
+
+
+def _read_stream(response):
+    """Read a streamed PCM response, giving up on barge-in.
+
+    Returns:
+        The PCM bytes, or None if the utterance was cancelled
+    """
+    chunks = []
+    for chunk in response.iter_content(chunk_size=4096):
+        # Barge-in: stop between chunks
+        if playback_registry.cancelled():
+            response.close()
+            return None
+        if chunk:
+            tts_metrics.mark("first_audio")
+            chunks.append(chunk)
+    return b"".join(chunks)
 
 
 def speak(
@@ -59,7 +150,8 @@ def speak(
     speed: float = DEFAULT_SPEED,
     model: str = DEFAULT_MODEL,
     stability: float = DEFAULT_STABILITY,
-    similarity_boost: float = DEFAULT_SIMILARITY
+    similarity_boost: float = DEFAULT_SIMILARITY,
+    volume: float = 1.0
 ) -> bool:
     """
     Speak text using ElevenLabs API.
@@ -71,6 +163,7 @@ def speak(
         model: Model ID (default eleven_flash_v2_5)
         stability: Voice stability (0.0-1.0)
         similarity_boost: Similarity boost (0.0-1.0)
+        volume: Playback volume (0.0 to 1.0, default 1.0)
 
     Returns:
         True if successful, False otherwise
@@ -85,52 +178,139 @@ def speak(
         "Content-Type": "application/json"
     }
 
-    # Clamp speed to ElevenLabs limits
-    speed = max(0.7, min(1.2, speed))
-
-    payload = {
-        "text": text,
-        "model_id": model,
-        "voice_settings": {
-            "stability": stability,
-            "similarity_boost": similarity_boost,
-            "speed": speed
-        }
-    }
-
-    voice_url = f"{API_URL}/{voice_id}"
+    payload = _payload(text, model, stability, similarity_boost, speed)
+    voice_url = f"{get_api_url()}/{voice_id}"
 
     try:
-        response = requests.post(voice_url, json=payload, headers=headers, stream=True)
-        response.raise_for_status()
+        import audio_output
 
-        # Save to temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            for chunk in response.iter_content(chunk_size=4096):
-                if chunk:
-                    temp_file.write(chunk)
-            temp_path = temp_file.name
+        tts_metrics.begin_utterance("elevenlabs", voice_id, len(text))
+        limit = rate_limiter.RateLimit("elevenlabs", api_key)
+        while True:
+            if not limit.acquire(len(text)):
+                # Overflowed (the caller degrades), or barge-in while queued
+                return playback_registry.cancelled()
+            start = time.perf_counter()
+            response = get_session().post(
+                voice_url,
+                params={"output_format": OUTPUT_FORMAT},
+                json=payload,
+                headers=headers,
+                stream=True
+            )
+            if response.ok:
+                break
+            delay = limit.retry_delay(response.status_code, response.headers.get("Retry-After"))
+            if delay is None:
+                response.raise_for_status()
+            response.close()
+            if not rate_limiter.wait(delay):
+                return True
 
-        # Play with afplay
-        subprocess.run(["afplay", temp_path], check=True)
+        pcm = _read_stream(response)
+        if pcm is None:
+            return True
+        tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000, **tts_metrics.utterance_tags())
+        samples = audio_output.pcm16_to_float32(pcm)
 
-        # Cleanup
-        os.remove(temp_path)
-        return True
+        return audio_output.play_pcm(samples, SAMPLE_RATE, volume=volume)
 
     except requests.exceptions.RequestException as e:
         print(f"ElevenLabs API error: {e}", file=sys.stderr)
         if hasattr(e, "response") and e.response is not None:
             print(f"Response: {e.response.text}", file=sys.stderr)
         return False
-    except subprocess.CalledProcessError as e:
-        print(f"Audio playback failed: {e}", file=sys.stderr)
-        return False
     except Exception as e:
         print(f"Unexpected error: {e}", file=sys.stderr)
         return False
 
 
+async def synthesize(
+    text: str,
+    voice_id: str,
+    speed: float = DEFAULT_SPEED,
+    model: str = DEFAULT_MODEL,
+    stability: float = DEFAULT_STABILITY,
+    similarity_boost: float = DEFAULT_SIMILARITY,
+    chunk_chars: int = text_normalizer.DEFAULT_CHUNK_CHARS
+):
+    """
+    Synthesize text chunk by chunk without blocking the event loop.
+
+    Each chunk of whole sentences is one request, sent with its
+    neighbours as previous_text/next_text so intonation carries across
+    chunks. The requests run on worker threads (asyncio.to_thread), so
+    other tasks keep running while they download. Rate limiting and
+    retries work as in speak(); stops on barge-in.
+
+    Args:
+        text: Text to speak
+        voice_id: ElevenLabs voice ID
+        speed, model, stability, similarity_boost: As for speak()
+        chunk_chars: About this many characters per request
+
+    Yields:
+        (samples, sample_rate, chunk_text) per chunk; nothing more after
+        an error, overflow or barge-in
+    """
+    api_key = load_api_key()
+    if not api_key:
+        print("Error: ELEVENLABS_API_KEY not found", file=sys.stderr)
+        return
+
+    headers = {
+        "xi-api-key": api_key,
+        "Content-Type": "application/json"
+    }
+    voice_url = f"{get_api_url()}/{voice_id}"
+    chunks = text_normalizer.sentence_chunks(text, chunk_chars)
+
+    try:
+        import audio_output
+
+        tts_metrics.begin_utterance("elevenlabs", voice_id, len(text))
+        limit = rate_limiter.RateLimit("elevenlabs", api_key)
+        for i, chunk in enumerate(chunks):
+            payload = _payload(chunk, model, stability, similarity_boost, speed)
+            if i > 0:
+                payload["previous_text"] = chunks[i - 1]
+            if i + 1 < len(chunks):
+                payload["next_text"] = chunks[i + 1]
+            while True:
+                if not await limit.acquire_async(len(chunk)):
+                    return
+                start = time.perf_counter()
+                response = await asyncio.to_thread(
+                    get_session().post,
+                    voice_url,
+                    params={"output_format": OUTPUT_FORMAT},
+                    json=payload,
+                    headers=headers,
+                    stream=True
+                )
+                if response.ok:
+                    break
+                delay = limit.retry_delay(response.status_code, response.headers.get("Retry-After"))
+                if delay is None:
+                    response.raise_for_status()
+                response.close()
+                if not await rate_limiter.wait_async(delay):
+                    return
+            pcm = await asyncio.to_thread(_read_stream, response)
+            if pcm is None:
+                return
+            tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000,
+                               **tts_metrics.utterance_tags(), chunk_len=len(chunk))
+            yield audio_output.pcm16_to_float32(pcm), SAMPLE_RATE, chunk
+
+    except requests.exceptions.RequestException as e:
+        print(f"ElevenLabs API error: {e}", file=sys.stderr)
+        if hasattr(e, "response") and e.response is not None:
+            print(f"Response: {e.response.text}", file=sys.stderr)
+    except Exception as e:
+        print(f"Unexpected error: {e}", file=sys.stderr)
+
+
 if __name__ == "__main__":
     # Test with Rachel voice (default ElevenLabs voice)
     speak(
@@ -0,0 +1,274 @@
+"""
+espeak-ng TTS wrapper: low-latency local fallback for Linux.
+
+macOS say only exists on macOS; elsewhere espeak-ng is the last resort
+when the primary provider fails. libespeak-ng is loaded once per
+process (the system library, or the copy kokoro-onnx ships through
+espeakng-loader) and stays resident, so after the first utterance
+synthesis starts without spawning anything; in the daemon it stays
+warm for good. Synthesis is synchronous and hands back PCM for the
+shared playback path, so volume, post-processing and barge-in behave
+as with the other providers.
+
+Without the library, the espeak-ng (or espeak) command renders each
+utterance instead. synthesize() is the asyncio counterpart; synthesis
+runs on a worker thread.
+
+Configuration via tts_config.json:
+- providers.espeak.enabled: Use espeak-ng as the fallback off macOS (default true)
+- voices.<type>.espeak_voice: espeak-ng voice name (default en-us)
+"""
+
+import asyncio
+import ctypes
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import capabilities
+import playback_registry
+import tts_metrics
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+DEFAULT_VOICE = "en-us"
+# espeak-ng words per minute at speed 1.0, and its accepted range
+BASE_RATE = 175
+MIN_RATE = 80
+MAX_RATE = 450
+# Synthesis callback interval; barge-in is noticed within this
+BUFFER_MS = 100
+
+# speak_lib.h
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+INITIALIZE_DONT_EXIT = 0x8000
+POS_CHARACTER = 1
+CHARS_UTF8 = 1
+PARAM_RATE = 1
+
+_SynthCallback = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p
+)
+
+_lib = None
+_sample_rate = 0
+_load_failed = False
+# libespeak-ng has a single global synthesizer
+_lock = threading.Lock()
+_chunks = []
+
+
+def _load_provider_config() -> dict:
+    """Load providers.espeak from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("providers", {}).get("espeak", {})
+    except Exception:
+        pass
+    return {}
+
+
+def enabled() -> bool:
+    return _load_provider_config().get("enabled", True)
+
+
+@_SynthCallback
+def _on_samples(wav, count, events):
+    # Returning 1 aborts synthesis (barge-in)
+    if playback_registry.cancelled():
+        return 1
+    if wav and count > 0:
+        _chunks.append(ctypes.string_at(wav, count * 2))
+    return 0
+
+
+def _library_candidates():
+    """(library path, data path) pairs to try, as found by the capability
+    snapshot: the system library, else kokoro-onnx's copy."""
+    library = capabilities.espeak_library()
+    if library is None:
+        return
+    if library != "espeakng_loader":
+        yield library, None
+    try:
+        import espeakng_loader
+        yield espeakng_loader.get_library_path(), espeakng_loader.get_data_path()
+    except ImportError:
+        pass
+
+
+def _load():
+    """Load and initialize libespeak-ng once per process.
+
+    Returns:
+        The library, or None if it is not available
+    """
+    global _lib, _sample_rate, _load_failed
+    if _lib is not None or _load_failed:
+        return _lib
+    for path, data_path in _library_candidates():
+        try:
+            lib = ctypes.CDLL(str(path))
+            lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+            sample_rate = lib.espeak_Initialize(
+                AUDIO_OUTPUT_SYNCHRONOUS, BUFFER_MS,
+                str(data_path).encode() if data_path else None, INITIALIZE_DONT_EXIT
+            )
+        except (OSError, AttributeError) as e:
+            print(f"Could not load {path}: {e}", file=sys.stderr)
+            continue
+        if sample_rate <= 0:
+            continue
+        lib.espeak_SetSynthCallback(_on_samples)
+        lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.espeak_Synth.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int,
+                                     ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p]
+        _lib, _sample_rate = lib, sample_rate
+        return lib
+    _load_failed = True
+    return None
+
+
+def is_available() -> bool:
+    """Check whether espeak-ng can be used (library or command)."""
+    return _load() is not None or _command() is not None
+
+
+def _command():
+    return capabilities.binary("espeak-ng") or capabilities.binary("espeak")
+
+
+def _rate(speed: float) -> int:
+    return max(MIN_RATE, min(MAX_RATE, int(BASE_RATE * speed)))
+
+
+def _create_library(lib, text: str, voice: str, speed: float) -> tuple:
+    import audio_output
+
+    with _lock:
+        if lib.espeak_SetVoiceByName(voice.encode()) != 0:
+            print(f"espeak-ng voice {voice} not found, using {DEFAULT_VOICE}", file=sys.stderr)
+            lib.espeak_SetVoiceByName(DEFAULT_VOICE.encode())
+        lib.espeak_SetParameter(PARAM_RATE, _rate(speed), 0)
+        _chunks.clear()
+        data = text.encode()
+        status = lib.espeak_Synth(data, len(data) + 1, 0, POS_CHARACTER, 0, CHARS_UTF8, None, None)
+        pcm = b"".join(_chunks)
+        _chunks.clear()
+    if status != 0:
+        print(f"espeak-ng synthesis failed (error {status})", file=sys.stderr)
+        return None
+    return audio_output.pcm16_to_float32(pcm), _sample_rate
+
+
+def _create_command(command: str, text: str, voice: str, speed: float) -> tuple:
+    import audio_output
+
+    result = subprocess.run([command, "--stdout", "-v", voice, "-s", str(_rate(speed))],
+                            input=text.encode(), capture_output=True, check=True)
+    # The streamed header carries no real length: read to the end
+    with wave.open(io.BytesIO(result.stdout), "rb") as w:
+        sample_rate = w.getframerate()
+        pcm = w.readframes(len(result.stdout))
+    return audio_output.pcm16_to_float32(pcm), sample_rate
+
+
+def create(text: str, voice: str = DEFAULT_VOICE, speed: float = 1.0):
+    """Synthesize text without playing it.
+
+    Returns:
+        (samples, sample_rate), or None if espeak-ng is unavailable or failed
+    """
+    lib = _load()
+    if lib is not None:
+        return _create_library(lib, text, voice, speed)
+    command = _command()
+    if command is None:
+        return None
+    try:
+        return _create_command(command, text, voice, speed)
+    except (subprocess.CalledProcessError, wave.Error, EOFError) as e:
+        print(f"espeak-ng failed: {e}", file=sys.stderr)
+        return None
+
+
+def speak(text: str, voice: str = DEFAULT_VOICE, speed: float = 1.0, volume: float = 1.0) -> bool:
+    """
+    Speak text using espeak-ng.
+
+    Args:
+        text: Text to speak
+        voice: espeak-ng voice (en-us, en-gb, en-gb-scotland, ...)
+        speed: Speed multiplier (1.0 = normal, ~175 wpm)
+        volume: Playback volume (0.0 to 1.0, default 1.0)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if not enabled():
+        return False
+    try:
+        import audio_output
+
+        tts_metrics.begin_utterance("espeak", voice, len(text))
+        start = time.perf_counter()
+        result = create(text, voice=voice, speed=speed)
+        if playback_registry.cancelled():
+            return True
+        if result is None:
+            print("espeak-ng not available (install espeak-ng)", file=sys.stderr)
+            return False
+        samples, sample_rate = result
+        tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000, **tts_metrics.utterance_tags())
+        tts_metrics.mark("first_audio")
+        return audio_output.play_pcm(samples, sample_rate, volume=volume)
+    except Exception as e:
+        print(f"Unexpected error in espeak-ng: {e}", file=sys.stderr)
+        return False
+
+
+async def synthesize(text: str, voice: str = DEFAULT_VOICE, speed: float = 1.0):
+    """
+    Synthesize text on a worker thread, for the event loop.
+
+    Args:
+        text: Text to speak
+        voice: espeak-ng voice (en-us, en-gb, en-gb-scotland, ...)
+        speed: Speed multiplier (1.0 = normal, ~175 wpm)
+
+    Yields:
+        (samples, sample_rate, text) once, unless espeak-ng is unavailable
+        or failed, or the utterance was cancelled
+    """
+    if not enabled():
+        return
+    try:
+        tts_metrics.begin_utterance("espeak", voice, len(text))
+        start = time.perf_counter()
+        result = await asyncio.to_thread(create, text, voice, speed)
+        if playback_registry.cancelled():
+            return
+        if result is None:
+            print("espeak-ng not available (install espeak-ng)", file=sys.stderr)
+            return
+        tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000, **tts_metrics.utterance_tags())
+        tts_metrics.mark("first_audio")
+    except Exception as e:
+        print(f"Unexpected error in espeak-ng: {e}", file=sys.stderr)
+        return
+    yield (*result, text)
+
+
+if __name__ == "__main__":
+    speak("Testing espeak-ng wrapper. Linux fallback online.")
@@ -0,0 +1,144 @@
+"""
+Opt-in profiling for hook invocations.
+
+Wraps a hook's main() in cProfile and tracemalloc, and optionally a
+stack-sampling profiler, then writes a timestamped report per run.
+
+Enable with either:
+- CLAUDE_TTS_PROFILE=1 (CLAUDE_TTS_PROFILE=sample adds the sampler)
+- profiling.enabled in tts_config.json (profiling.sample for the sampler)
+CLAUDE_TTS_PROFILE=0 turns profiling off whatever the config says.
+
+Reports go to profiling.dir (default ~/.cache/claude-tts/profiles):
+- <timestamp>-<hook>.prof: cProfile stats (load with pstats/snakeviz)
+- <timestamp>-<hook>.txt: top functions, top allocations, sampled stacks
+
+When disabled, run() calls main() directly; the profilers are not
+imported, and the switch is read from the config the hook already
+loaded rather than from the file again.
+Summarize recent runs with scripts/tts-profile-report.py.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+DEFAULT_PROFILE_DIR = Path.home() / ".cache" / "claude-tts" / "profiles"
+SAMPLE_INTERVAL = 0.005
+TOP_N = 25
+
+
+def _load_profiling_config() -> dict:
+    """Load the profiling section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("profiling", {})
+    except Exception:
+        pass
+    return {}
+
+
+def _sample_stacks(stop: threading.Event, target_thread: int, counts: Counter) -> None:
+    """Sample the main thread's stack until stopped."""
+    while not stop.wait(SAMPLE_INTERVAL):
+        frame = sys._current_frames().get(target_thread)
+        stack = []
+        while frame is not None and len(stack) < 30:
+            code = frame.f_code
+            stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        if stack:
+            counts[" <- ".join(stack[:8])] += 1
+
+
+def _write_report(path: Path, hook_name: str, elapsed: float, profiler, snapshot, samples: Counter) -> None:
+    """Write the human-readable report next to the .prof file."""
+    import io
+    import pstats
+
+    out = io.StringIO()
+    out.write(f"Hook: {hook_name}\n")
+    out.write(f"Started: {path.stem.split('-')[0]}\n")
+    out.write(f"Wall time: {elapsed * 1000:.1f} ms\n\n")
+
+    out.write(f"=== Top {TOP_N} functions (cumulative) ===\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(TOP_N)
+
+    out.write(f"\n=== Top {TOP_N} allocations ===\n")
+    for stat in snapshot.statistics("lineno")[:TOP_N]:
+        out.write(f"{stat}\n")
+
+    if samples:
+        total = sum(samples.values())
+        out.write(f"\n=== Sampled stacks ({total} samples every {SAMPLE_INTERVAL * 1000:.0f} ms) ===\n")
+        for stack, count in samples.most_common(TOP_N):
+            out.write(f"{count / total:6.1%}  {stack}\n")
+
+    path.write_text(out.getvalue())
+
+
+def _profiled(main, hook_name: str, config: dict, sample: bool):
+    """Run main() under cProfile/tracemalloc (and the sampler) and write reports."""
+    import cProfile
+    import tracemalloc
+
+    profile_dir = Path(os.path.expanduser(config.get("dir", str(DEFAULT_PROFILE_DIR))))
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{hook_name}"
+
+    samples = Counter()
+    stop = threading.Event()
+    sampler = None
+    if sample:
+        sampler = threading.Thread(
+            target=_sample_stacks, args=(stop, threading.get_ident(), samples), daemon=True
+        )
+        sampler.start()
+
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        return profiler.runcall(main)
+    finally:
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stop.set()
+        if sampler is not None:
+            sampler.join()
+        try:
+            profiler.dump_stats(str(profile_dir / f"{stem}.prof"))
+            _write_report(profile_dir / f"{stem}.txt", hook_name, elapsed, profiler, snapshot, samples)
+        except OSError as e:
+            print(f"Failed to write profile: {e}", file=sys.stderr)
+
+
+def run(main, hook_name: str, config: dict = None):
+    """Run a hook's main(), profiled if enabled.
+
+    Args:
+        main: The hook's main function
+        hook_name: Name used in report file names (stop, session_start, ...)
+        config: The hook's loaded tts_config.json, if it has one (else read here)
+    """
+    mode = os.environ.get("CLAUDE_TTS_PROFILE", "")
+    if mode == "0":
+        return main()
+    profiling = _load_profiling_config() if config is None else config.get("profiling", {})
+    if mode == "":
+        if not profiling.get("enabled", False):
+            return main()
+        sample = profiling.get("sample", False)
+    else:
+        sample = mode == "sample" or profiling.get("sample", False)
+    return _profiled(main, hook_name, profiling, sample)
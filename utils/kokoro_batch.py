@@ -0,0 +1,366 @@
+"""
+Batched Kokoro inference.
+
+Kokoro is run one chunk per ONNX call. When several chunks are ready at
+once (the chunks of one long reply, or chunks from several sessions in
+the daemon) they can be padded into one batched call, which uses the
+CPU's vector units better and pays the per-call overhead once.
+
+Whether the model accepts a batch is checked, not assumed: the input's
+batch dimension must be dynamic, and a probe run has to match unbatched
+output. The result is cached per model file and onnxruntime version in
+~/.cache/claude-tts/batch_probe.json. Hooks only read that cache; the
+daemon runs the probe when it warms up. Without a positive probe,
+everything runs unbatched as before.
+
+In the daemon, enable_coalescing() starts a collector that gathers
+chunks submitted by concurrent requests for batching.window_ms (or until
+batching.max_batch is reached) and runs them together.
+
+Configuration via tts_config.json (providers.kokoro.batching):
+- enabled: Batch when the model allows it (default true)
+- window_ms: How long the daemon waits to coalesce requests (default 8)
+- max_batch: Chunks per batched call (default 4)
+- max_padding: Largest share of padding tokens in a batch (default 0.5)
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+HOOKS_DIR = Path(__file__).parent.parent
+PROBE_FILE = Path.home() / ".cache" / "claude-tts" / "batch_probe.json"
+
+DEFAULT_WINDOW_MS = 8
+DEFAULT_MAX_BATCH = 4
+DEFAULT_MAX_PADDING = 0.5
+# Kokoro's context length in tokens, including the two boundary tokens
+MAX_TOKENS = 512
+# Probe: batched output must match unbatched within this relative RMS error
+PROBE_TOLERANCE = 0.05
+PROBE_PHONEMES = ("həlˈoʊ.", "ðɪs ɪz ə lˈɔŋɡɚ tˈɛst sˈɛntəns.")
+
+_supported = None
+_coalescer = None
+
+
+def _load_batch_config() -> dict:
+    """Load providers.kokoro.batching from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                config = json.load(f)
+                return config.get("providers", {}).get("kokoro", {}).get("batching", {})
+    except Exception:
+        pass
+    return {}
+
+
+def _model_tag() -> str:
+    """Probe cache key: model file size/mtime and onnxruntime version."""
+    import kokoro_tts
+    import onnxruntime as rt
+    stat = kokoro_tts.MODEL_PATH.stat()
+    return f"{kokoro_tts.MODEL_PATH.name}-{stat.st_size:x}-{int(stat.st_mtime):x}-ort{rt.__version__}"
+
+
+def _token_input(session):
+    """The model's token input (named input_ids or tokens)."""
+    for inp in session.get_inputs():
+        if inp.name in ("input_ids", "tokens"):
+            return inp
+    return None
+
+
+def _build_inputs(kokoro, items: list) -> dict:
+    """Pad items into one feed dict.
+
+    Args:
+        kokoro: Kokoro instance
+        items: (phonemes, style, speed) tuples sharing one speed
+
+    Returns:
+        Session feed dict
+    """
+    session = kokoro.sess
+    tokens = [kokoro.tokenizer.tokenize(phonemes)[:MAX_TOKENS - 2] for phonemes, _, _ in items]
+    width = max(len(t) for t in tokens) + 2
+    ids = np.zeros((len(items), width), dtype=np.int64)
+    for row, t in zip(ids, tokens):
+        row[1:len(t) + 1] = t
+    # Style vectors are indexed by the unpadded token count
+    style = np.concatenate([np.asarray(s[len(t)], dtype=np.float32).reshape(1, -1)
+                            for (_, s, _), t in zip(items, tokens)])
+
+    feed = {}
+    for inp in session.get_inputs():
+        if inp.name in ("input_ids", "tokens"):
+            feed[inp.name] = ids
+        elif inp.name == "style":
+            feed[inp.name] = style
+        elif inp.name == "speed":
+            dtype = np.int32 if "int" in inp.type else np.float32
+            count = 1 if inp.shape and inp.shape[0] == 1 else len(items)
+            feed[inp.name] = np.full(count, items[0][2], dtype=dtype)
+    return feed
+
+
+def run_batch(kokoro, items: list) -> list:
+    """One batched session run; returns one float32 array per item."""
+    feed = _build_inputs(kokoro, items)
+    audio = np.asarray(kokoro.sess.run(None, feed)[0], dtype=np.float32)
+    if audio.ndim != 2 or audio.shape[0] != len(items):
+        raise ValueError(f"unexpected batched output shape {audio.shape}")
+    # Padding tokens come out as trailing near-silence; join_chunks trims it
+    return list(audio)
+
+
+def run_one(kokoro, item) -> np.ndarray:
+    """One unbatched call through Kokoro's own API."""
+    phonemes, style, speed = item
+    samples, _ = kokoro.create(phonemes, voice=style, speed=speed, is_phonemes=True)
+    return np.asarray(samples, dtype=np.float32).reshape(-1)
+
+
+def _probe(kokoro, style) -> bool:
+    """Check that batched output matches unbatched output."""
+    import audio_post
+
+    items = [(p, style, 1.0) for p in PROBE_PHONEMES]
+    try:
+        batched = run_batch(kokoro, items)
+    except Exception as e:
+        print(f"Kokoro model does not batch: {e}", file=sys.stderr)
+        return False
+    for item, out in zip(items, batched):
+        single = audio_post.trim_silence(run_one(kokoro, item), 24000)
+        out = audio_post.trim_silence(out, 24000)
+        # Allow for the silence margin trimming leaves (50 ms)
+        if abs(len(out) - len(single)) > max(0.05 * len(single), 1200):
+            return False
+        n = min(len(out), len(single))
+        error = np.sqrt(np.mean((out[:n] - single[:n]) ** 2)) / max(audio_post.rms(single[:n]), 1e-6)
+        if error > PROBE_TOLERANCE:
+            return False
+    return True
+
+
+def supports_batching(kokoro, style=None, probe: bool = False) -> bool:
+    """Check whether batched inference is enabled and works for this model.
+
+    Args:
+        kokoro: Kokoro instance
+        style: Voice style vectors to probe with
+        probe: Run the probe if no cached result exists (daemon warm-up,
+            benchmarks); otherwise an unknown model counts as unsupported
+
+    Returns:
+        True if batched calls may be used
+    """
+    global _supported
+    if not _load_batch_config().get("enabled", True):
+        return False
+    if _supported is not None:
+        return _supported
+
+    try:
+        tag = _model_tag()
+        cache = json.loads(PROBE_FILE.read_text()) if PROBE_FILE.exists() else {}
+    except (OSError, ValueError, ImportError):
+        return False
+    if tag in cache:
+        _supported = bool(cache[tag])
+        return _supported
+    if not probe or style is None:
+        return False
+
+    token_input = _token_input(kokoro.sess)
+    dynamic = token_input is not None and not isinstance(token_input.shape[0], int)
+    _supported = dynamic and _probe(kokoro, style)
+    cache[tag] = _supported
+    try:
+        PROBE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        PROBE_FILE.write_text(json.dumps(cache))
+    except OSError:
+        pass
+    return _supported
+
+
+def plan(token_counts: list, limit: int, max_padding: float) -> list:
+    """Group item indexes into batches of similar length.
+
+    Items are sorted by token count; a batch is closed when it holds
+    limit items or when adding the next item would make padding exceed
+    max_padding of the batch's tokens.
+
+    Returns:
+        List of index lists
+    """
+    batches = []
+    current = []
+    for i in sorted(range(len(token_counts)), key=token_counts.__getitem__):
+        candidate = current + [i]
+        width = token_counts[i]
+        padding = 1 - sum(token_counts[j] for j in candidate) / (width * len(candidate) or 1)
+        if current and (len(candidate) > limit or padding > max_padding):
+            batches.append(current)
+            candidate = [i]
+        current = candidate
+    if current:
+        batches.append(current)
+    return batches
+
+
+def max_batch() -> int:
+    """Configured chunks per batched call."""
+    return max(1, _load_batch_config().get("max_batch", DEFAULT_MAX_BATCH))
+
+
+def _infer_now(kokoro, items: list, batched: bool) -> list:
+    """Run items, batching groups of similar length when allowed."""
+    if not batched or len(items) == 1:
+        return [run_one(kokoro, item) for item in items]
+
+    config = _load_batch_config()
+    results = [None] * len(items)
+    # Speed is one input per call, so batch only items that share it
+    by_speed = {}
+    for i, item in enumerate(items):
+        by_speed.setdefault(item[2], []).append(i)
+    for indexes in by_speed.values():
+        counts = [len(kokoro.tokenizer.tokenize(items[i][0])) for i in indexes]
+        for group in plan(counts, max_batch(), config.get("max_padding", DEFAULT_MAX_PADDING)):
+            members = [indexes[g] for g in group]
+            if len(members) == 1:
+                results[members[0]] = run_one(kokoro, items[members[0]])
+                continue
+            for i, out in zip(members, run_batch(kokoro, [items[i] for i in members])):
+                results[i] = out
+    return results
+
+
+def infer(kokoro, items: list) -> list:
+    """Synthesize (phonemes, style, speed) items.
+
+    In the daemon with coalescing enabled, items join the shared
+    collector and may be batched with other requests; otherwise they are
+    batched among themselves when the model allows it.
+
+    Returns:
+        One float32 sample array per item (24 kHz)
+    """
+    if _coalescer is not None:
+        pending = [_coalescer.submit(item) for item in items]
+        return [p.result() for p in pending]
+    return _infer_now(kokoro, items, supports_batching(kokoro))
+
+
+class _Pending:
+    """One submitted item waiting for its batch."""
+
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self) -> np.ndarray:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _Coalescer:
+    """Collects items from concurrent callers and runs them in batches."""
+
+    def __init__(self, run_lock=None):
+        self._cond = threading.Condition()
+        self._queue = []
+        self._run_lock = run_lock
+        self.batches = 0
+        self.items = 0
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, item) -> _Pending:
+        pending = _Pending(item)
+        with self._cond:
+            self._queue.append(pending)
+            self._cond.notify_all()
+        return pending
+
+    def _take(self) -> list:
+        """Wait for work, then up to window_ms for the batch to fill."""
+        config = _load_batch_config()
+        window = config.get("window_ms", DEFAULT_WINDOW_MS) / 1000
+        limit = max_batch()
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = time.monotonic() + window
+            while len(self._queue) < limit and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            taken, self._queue = self._queue[:limit], self._queue[limit:]
+        return taken
+
+    def _loop(self) -> None:
+        import kokoro_tts
+        import tts_metrics
+
+        while True:
+            taken = self._take()
+            try:
+                kokoro = kokoro_tts.get_kokoro()
+                if kokoro is None:
+                    raise RuntimeError("Kokoro unavailable")
+                start = time.perf_counter()
+                if self._run_lock is not None:
+                    with self._run_lock:
+                        outputs = _infer_now(kokoro, [p.item for p in taken], supports_batching(kokoro))
+                else:
+                    outputs = _infer_now(kokoro, [p.item for p in taken], supports_batching(kokoro))
+                tts_metrics.record("batch", (time.perf_counter() - start) * 1000,
+                                   provider="kokoro", batch_size=len(taken))
+                for pending, out in zip(taken, outputs):
+                    pending.value = out
+            except Exception as e:
+                for pending in taken:
+                    pending.error = e
+            self.batches += 1
+            self.items += len(taken)
+            for pending in taken:
+                pending.done.set()
+
+
+def enable_coalescing(run_lock=None) -> None:
+    """Route infer() through a shared collector (long-lived processes only).
+
+    Args:
+        run_lock: Held around each inference call (e.g. the daemon's
+            concurrency cap)
+    """
+    global _coalescer
+    if _coalescer is None and _load_batch_config().get("enabled", True):
+        _coalescer = _Coalescer(run_lock)
+
+
+def coalescing() -> bool:
+    """Check whether infer() goes through the shared collector."""
+    return _coalescer is not None
+
+
+def stats() -> dict:
+    """Batches run and items coalesced (daemon only)."""
+    if _coalescer is None:
+        return {"coalescing": False, "supported": _supported}
+    return {
+        "coalescing": True,
+        "supported": _supported,
+        "batches": _coalescer.batches,
+        "items": _coalescer.items,
+    }
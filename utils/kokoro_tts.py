@@ -3,7 +3,7 @@
 # requires-python = ">=3.10,<3.13"
 # dependencies = [
 #     "kokoro-onnx",
-#     "soundfile",
+#     "numpy",
 # ]
 # ///
 """
@@ -17,41 +17,387 @@ Voice naming convention:
 - bm_* = British Male (daniel, fable, george, lewis, oliver, oscar)
 """
 
+import asyncio
 import os
+import platform
 import sys
 import json
-import tempfile
-import subprocess
+import time
+import struct
+import threading
+import zipfile
 from pathlib import Path
 
-# Model paths
-KOKORO_DIR = Path.home() / ".local" / "share" / "kokoro"
-MODEL_PATH = KOKORO_DIR / "kokoro-v1.0.onnx"
-VOICES_PATH = KOKORO_DIR / "voices-v1.0.bin"
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import phoneme_cache
+import playback_registry
+import text_normalizer
+import tts_metrics
+
 HOOKS_DIR = Path(__file__).parent.parent
 
+# Model variants (file names match the kokoro-onnx releases)
+MODEL_VARIANTS = {
+    "fp32": "kokoro-v1.0.onnx",
+    "fp16": "kokoro-v1.0.fp16.onnx",
+    "int8": "kokoro-v1.0.int8.onnx",
+}
+
+# espeak language per voice prefix (first letter of the voice name)
+VOICE_LANGS = {
+    "a": "en-us", "b": "en-gb", "e": "es", "f": "fr-fr", "h": "hi",
+    "i": "it", "j": "ja", "p": "pt-br", "z": "cmn",
+}
+
+# Phoneme characters per inference call (Kokoro's limit is 510 tokens)
+MAX_CHUNK_PHONEMES = 400
+
+# Optimized ONNX graphs persisted across sessions
+GRAPH_CACHE_DIR = Path.home() / ".cache" / "claude-tts" / "onnx"
+
 # Singleton for model (avoid reloading)
 _kokoro_instance = None
+# Daemon threads may request the model at the same time; load it once
+_load_lock = threading.Lock()
+
+# Voices archive: name -> (offset, dtype, shape, fortran_order), None if compressed
+_voice_index = None
+# Style vectors of the voices actually used (memory-mapped views)
+_voice_styles = {}
+
+# espeak G2P is not thread-safe; one phonemization at a time
+_g2p_lock = threading.Lock()
+
+# G2P vs inference split of the last finished create call (milliseconds);
+# rebound whole, so concurrent calls never see each other's partial dict
+last_timings = {}
+
+
+def _load_kokoro_config() -> dict:
+    """Load providers.kokoro from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                config = json.load(f)
+                return config.get("providers", {}).get("kokoro", {})
+    except Exception:
+        pass
+    return {}
+
+
+_config = _load_kokoro_config()
+if _config.get("phoneme_cache_size"):
+    phoneme_cache.set_max_entries(_config["phoneme_cache_size"])
+
+# Model paths
+KOKORO_DIR = Path(os.path.expanduser(_config.get("model_dir", "~/.local/share/kokoro")))
+VOICES_PATH = KOKORO_DIR / "voices-v1.0.bin"
+
+
+def model_path(variant: str = "fp32") -> Path:
+    """Get the model file for a variant (fp32, fp16, int8)."""
+    return KOKORO_DIR / MODEL_VARIANTS.get(variant, MODEL_VARIANTS["fp32"])
+
+
+MODEL_PATH = model_path(_config.get("model_variant", "fp32"))
+if not MODEL_PATH.exists() and model_path("fp32").exists():
+    print(f"Kokoro model {MODEL_PATH.name} not found, using fp32", file=sys.stderr)
+    MODEL_PATH = model_path("fp32")
+
+
+def _onnx_providers() -> list:
+    """Execution providers for the Kokoro session (ONNX_PROVIDER)."""
+    return [os.getenv("ONNX_PROVIDER", "CPUExecutionProvider")]
+
+
+def optimized_graph_path(path: Path, providers: list = None) -> Path:
+    """Cache file for a model's optimized graph.
+
+    Keyed by model size/mtime, onnxruntime version, execution providers
+    and CPU architecture: ORT_ENABLE_ALL bakes in layout transforms for
+    the provider and CPU it ran on, so the cache must not be reused
+    across them (e.g. a ~/.cache shared between machines).
+    """
+    import onnxruntime as rt
+    stat = path.stat()
+    names = "+".join(p.replace("ExecutionProvider", "") for p in providers or _onnx_providers())
+    tag = f"{stat.st_size:x}-{int(stat.st_mtime):x}-ort{rt.__version__}-{names}-{platform.machine()}"
+    return GRAPH_CACHE_DIR / f"{path.stem}.{tag}.onnx"
+
+
+def _create_session(path: Path):
+    """Create an ONNX Runtime session, reusing a persisted optimized graph.
+
+    The first load optimizes the graph and writes it to GRAPH_CACHE_DIR;
+    later loads read it back with graph optimization disabled.
+    """
+    import onnxruntime as rt
+
+    providers = _onnx_providers()
+    options = rt.SessionOptions()
+    if not _config.get("cache_optimized_graph", True):
+        return rt.InferenceSession(str(path), options, providers=providers)
+
+    cache_path = optimized_graph_path(path, providers)
+    if cache_path.exists():
+        options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            return rt.InferenceSession(str(cache_path), options, providers=providers)
+        except Exception as e:
+            print(f"Discarding optimized graph cache: {e}", file=sys.stderr)
+            # A concurrent loader may have discarded it already
+            cache_path.unlink(missing_ok=True)
+            options = rt.SessionOptions()
+
+    # Optimize once and persist; rename so concurrent loads never see a partial file
+    GRAPH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.optimized_model_filepath = str(temp_path)
+    session = rt.InferenceSession(str(path), options, providers=providers)
+    if temp_path.exists():
+        os.replace(temp_path, cache_path)
+    return session
 
 
 def get_kokoro():
     """Get or create Kokoro instance (singleton)."""
     global _kokoro_instance
-    if _kokoro_instance is None:
-        try:
-            from kokoro_onnx import Kokoro
-            if MODEL_PATH.exists() and VOICES_PATH.exists():
-                _kokoro_instance = Kokoro(str(MODEL_PATH), str(VOICES_PATH))
-            else:
-                print(f"Kokoro models not found at {KOKORO_DIR}", file=sys.stderr)
+    if _kokoro_instance is not None:
+        return _kokoro_instance
+    with _load_lock:
+        if _kokoro_instance is None:
+            try:
+                from kokoro_onnx import Kokoro
+                if MODEL_PATH.exists() and VOICES_PATH.exists():
+                    # Kokoro only opens the archive here; style vectors come
+                    # from get_voice_style() so unused voices are never read
+                    _kokoro_instance = Kokoro.from_session(_create_session(MODEL_PATH), str(VOICES_PATH))
+                else:
+                    print(f"Kokoro models not found at {KOKORO_DIR}", file=sys.stderr)
+                    return None
+            except ImportError:
+                print("kokoro_onnx not installed", file=sys.stderr)
                 return None
-        except ImportError:
-            print("kokoro_onnx not installed", file=sys.stderr)
+            except Exception as e:
+                print(f"Failed to load Kokoro: {e}", file=sys.stderr)
+                return None
+    return _kokoro_instance
+
+
+def is_loaded() -> bool:
+    """Check whether the model is resident in this process."""
+    return _kokoro_instance is not None
+
+
+def unload() -> bool:
+    """Drop the model session and voice data; get_kokoro() reloads on demand.
+
+    Returns:
+        True if a model was loaded
+    """
+    global _kokoro_instance, _voice_index
+    was_loaded = _kokoro_instance is not None
+    _kokoro_instance = None
+    _voice_index = None
+    _voice_styles.clear()
+    return was_loaded
+
+
+def _load_voice_index() -> dict:
+    """Index the voices archive without reading any style vectors.
+
+    voices-v1.0.bin is an .npz (zip of .npy members). Stored members are
+    located by their byte offset so they can be memory-mapped directly.
+    """
+    global _voice_index
+    if _voice_index is not None:
+        return _voice_index
+
+    import numpy as np
+
+    index = {}
+    try:
+        with zipfile.ZipFile(VOICES_PATH) as archive, open(VOICES_PATH, "rb") as f:
+            for info in archive.infolist():
+                name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+                if info.compress_type != zipfile.ZIP_STORED:
+                    index[name] = None
+                    continue
+                # Skip the local file header to reach the .npy payload
+                f.seek(info.header_offset)
+                header = struct.unpack(zipfile.structFileHeader, f.read(zipfile.sizeFileHeader))
+                f.seek(info.header_offset + zipfile.sizeFileHeader + header[10] + header[11])
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                index[name] = (f.tell(), dtype, shape, fortran_order)
+    except (OSError, zipfile.BadZipFile, ValueError) as e:
+        print(f"Failed to index Kokoro voices: {e}", file=sys.stderr)
+        return {}
+
+    _voice_index = index
+    return _voice_index
+
+
+def get_voice_style(voice: str):
+    """Get the style vectors for one voice, memory-mapped from the archive.
+
+    Only the pages of rows Kokoro actually indexes are read from disk.
+
+    Returns:
+        numpy array (or memmap), or None if the voice is unknown
+    """
+    if voice in _voice_styles:
+        return _voice_styles[voice]
+
+    # Daemon workers ask for the same voice at once; index and map it once
+    with _load_lock:
+        if voice in _voice_styles:
+            return _voice_styles[voice]
+
+        index = _load_voice_index()
+        if voice not in index:
             return None
-        except Exception as e:
-            print(f"Failed to load Kokoro: {e}", file=sys.stderr)
+
+        import numpy as np
+
+        entry = index[voice]
+        if entry is None:
+            # Compressed member: fall back to reading just this voice
+            with np.load(VOICES_PATH) as archive:
+                style = archive[voice]
+        else:
+            offset, dtype, shape, fortran_order = entry
+            style = np.memmap(VOICES_PATH, dtype=dtype, mode="r", offset=offset,
+                              shape=shape, order="F" if fortran_order else "C")
+        _voice_styles[voice] = style
+        return style
+
+
+def voice_lang(voice: str) -> str:
+    """Get the espeak language for a Kokoro voice name."""
+    return VOICE_LANGS.get(voice[:1], "en-us")
+
+
+def _phonemize_sentences(text: str, lang: str) -> tuple:
+    """Convert text to phonemes per sentence, consulting the phoneme cache.
+
+    Misses go through Kokoro's espeak tokenizer and are stored; the cache
+    file is flushed once per call. Calls are serialized by _g2p_lock.
+
+    Returns:
+        (phonemes per sentence, cache hits, cache misses)
+    """
+    kokoro = get_kokoro()
+    if kokoro is None:
+        return [], 0, 0
+
+    parts = []
+    hits = misses = 0
+    with _g2p_lock:
+        # Sentences are the unit of phoneme caching
+        for sentence in text_normalizer.split_sentences(text):
+            phonemes = phoneme_cache.get(lang, sentence)
+            if phonemes is None:
+                phonemes = kokoro.tokenizer.phonemize(phoneme_cache.normalize_sentence(sentence), lang)
+                phoneme_cache.put(lang, sentence, phonemes)
+                misses += 1
+            else:
+                hits += 1
+            if phonemes:
+                parts.append(phonemes)
+        phoneme_cache.flush()
+    return parts, hits, misses
+
+
+def phonemize(text: str, lang: str = "en-us") -> str:
+    """Convert text to phonemes via the phoneme cache."""
+    return " ".join(_phonemize_sentences(text, lang)[0])
+
+
+def _group_chunks(sentences: list, max_len: int = MAX_CHUNK_PHONEMES) -> list:
+    """Group sentence phonemes into chunks that fit one inference call."""
+    chunks = []
+    current = ""
+    for phonemes in sentences:
+        if current and len(current) + 1 + len(phonemes) > max_len:
+            chunks.append(current)
+            current = phonemes
+        else:
+            current = f"{current} {phonemes}" if current else phonemes
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def warm_g2p(lang: str = "en-us") -> None:
+    """Run one G2P call so espeak is loaded in long-lived processes."""
+    kokoro = get_kokoro()
+    if kokoro is not None:
+        with _g2p_lock:
+            kokoro.tokenizer.phonemize("Ready.", lang)
+
+
+def create(text: str, voice: str = "bf_emma", speed: float = 1.0):
+    """Synthesize text with Kokoro via the cached phoneme path.
+
+    Sentences are grouped into chunks; each chunk is inferred (several per
+    ONNX call when kokoro_batch allows it), trimmed of leading/trailing
+    silence and crossfaded into the next.
+    Records G2P and inference time separately in last_timings. Safe to
+    call from several threads: G2P is serialized, inference is not.
+
+    Returns:
+        (samples, sample_rate), or None if Kokoro is unavailable or the
+        utterance was cancelled
+    """
+    kokoro = get_kokoro()
+    if kokoro is None:
+        return None
+
+    import audio_post
+
+    global last_timings
+    tts_metrics.begin_utterance("kokoro", voice, len(text))
+    start = time.perf_counter()
+    sentences, hits, misses = _phonemize_sentences(text, voice_lang(voice))
+    timings = {"g2p_ms": (time.perf_counter() - start) * 1000, "g2p_hits": hits, "g2p_misses": misses}
+    tts_metrics.record("g2p", timings["g2p_ms"], **tts_metrics.utterance_tags(),
+                       cache_hits=hits, cache_misses=misses)
+    if not sentences:
+        return None
+
+    style = get_voice_style(voice)
+    if style is None:
+        print(f"Unknown Kokoro voice: {voice}", file=sys.stderr)
+        return None
+
+    import kokoro_batch
+
+    start = time.perf_counter()
+    chunks = []
+    sample_rate = 24000
+    items = [(phonemes, style, speed) for phonemes in _group_chunks(sentences)]
+    # Chunks go through in batches when the model allows it
+    step = 1
+    if len(items) > 1 and (kokoro_batch.coalescing() or kokoro_batch.supports_batching(kokoro)):
+        step = kokoro_batch.max_batch()
+    for i in range(0, len(items), step):
+        # Barge-in: stop between chunks
+        if playback_registry.cancelled():
             return None
-    return _kokoro_instance
+        chunks.extend(kokoro_batch.infer(kokoro, items[i:i + step]))
+        tts_metrics.mark("first_audio")
+    timings["inference_ms"] = (time.perf_counter() - start) * 1000
+    tts_metrics.record("synthesis", timings["inference_ms"], **tts_metrics.utterance_tags())
+    last_timings = timings
+    return audio_post.join_chunks(chunks, sample_rate), sample_rate
 
 
 def speak(text: str, voice: str = "bf_emma", speed: float = 1.0, volume: float = 1.0) -> bool:
@@ -67,52 +413,67 @@ def speak(text: str, voice: str = "bf_emma", speed: float = 1.0, volume: float =
     Returns:
         True if successful, False otherwise
     """
-    kokoro = get_kokoro()
-    if kokoro is None:
+    if get_kokoro() is None:
         return False
 
     try:
-        import soundfile as sf
+        import audio_output
 
         # Generate speech
-        samples, sample_rate = kokoro.create(text, voice=voice, speed=speed)
+        result = create(text, voice=voice, speed=speed)
+        if result is None:
+            return playback_registry.cancelled()
+        samples, sample_rate = result
 
-        # Save to temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, samples, sample_rate)
-            temp_path = f.name
+        return audio_output.play_pcm(samples, sample_rate, volume=volume)
 
-        # Play with afplay (with volume control)
-        cmd = ["afplay"]
-        if volume != 1.0:
-            cmd.extend(["-v", str(volume)])
-        cmd.append(temp_path)
-        subprocess.run(cmd, check=True)
+    except Exception as e:
+        print(f"Kokoro TTS error: {e}", file=sys.stderr)
+        return False
+
+
+async def synthesize(text: str, voice: str = "bf_emma", speed: float = 1.0,
+                     chunk_chars: int = text_normalizer.DEFAULT_CHUNK_CHARS):
+    """
+    Synthesize text chunk by chunk without blocking the event loop.
+
+    Each chunk of whole sentences goes through create() on a worker
+    thread, so earlier chunks play while later ones are inferred; chunks
+    from concurrent pipelines share inference calls when kokoro_batch
+    coalesces them.
 
-        # Cleanup
-        os.remove(temp_path)
-        return True
+    Args:
+        text: Text to speak
+        voice: Kokoro voice name (bf_emma, am_adam, etc.)
+        speed: Speech speed (1.0 = normal)
+        chunk_chars: About this many characters per chunk
 
+    Yields:
+        (samples, sample_rate, chunk_text) per chunk; nothing more after
+        an error or barge-in
+    """
+    try:
+        if await asyncio.to_thread(get_kokoro) is None:
+            return
+        for chunk in text_normalizer.sentence_chunks(text, chunk_chars):
+            if playback_registry.cancelled():
+                return
+            result = await asyncio.to_thread(create, chunk, voice, speed)
+            if result is None:
+                return
+            yield (*result, chunk)
     except Exception as e:
         print(f"Kokoro TTS error: {e}", file=sys.stderr)
-        return False
 
 
 def list_voices():
-    """List available Kokoro voices."""
-    return [
-        # American Female
-        "af_alloy", "af_aoede", "af_bella", "af_heart", "af_jessica",
-        "af_kore", "af_nicole", "af_nova", "af_river", "af_sarah", "af_sky",
-        # American Male
-        "am_adam", "am_echo", "am_eric", "am_liam", "am_michael", "am_onyx",
-        # British Female
-        "bf_alice", "bf_emma", "bf_lily", "bf_matilda",
-        # British Male
-        "bm_daniel", "bm_fable", "bm_george", "bm_lewis", "bm_oliver", "bm_oscar"
-    ]
+    """List available Kokoro voices from the voices archive index."""
+    if not VOICES_PATH.exists():
+        return []
+    return sorted(_load_voice_index())
 
 
 if __name__ == "__main__":
     # Test
     speak("Testing Kokoro TTS wrapper. This is the Emma voice.", voice="bf_emma")
+    print(f"Timings: {last_timings}")
@@ -1,13 +1,58 @@
 """
 macOS say command wrapper for TTS fallback.
 No external dependencies - uses built-in macOS speech synthesis.
+
+When NumPy is available, speech is rendered to a WAV file and played
+through the shared PCM path so volume and post-processing match the
+other providers. Otherwise say speaks directly.
+
+synthesize() is the asyncio counterpart (it needs NumPy): say renders
+in a subprocess the event loop waits on without blocking.
 """
 
+import asyncio
+import os
 import subprocess
 import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _speak_pcm(text: str, voice: str, rate: int, volume: float) -> bool:
+    """Render with say to 16-bit WAV and play via audio_output."""
+    import audio_output
+    import playback_registry
+    import tts_metrics
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+        temp_path = f.name
+    try:
+        tts_metrics.begin_utterance("macos", voice, len(text))
+        start = time.perf_counter()
+        cmd = ["say", "-v", voice, "-r", str(rate), "-o", temp_path,
+               "--file-format=WAVE", "--data-format=LEI16@22050", text]
+        with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) as proc:
+            # Barge-in: stop rendering as soon as the utterance is cancelled
+            while proc.poll() is None:
+                if playback_registry.cancelled():
+                    proc.terminate()
+                    return True
+                time.sleep(playback_registry.POLL_INTERVAL)
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+        samples, sample_rate = audio_output.read_wav(temp_path)
+        tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000, **tts_metrics.utterance_tags())
+        tts_metrics.mark("first_audio")
+        return audio_output.play_pcm(samples, sample_rate, volume=volume)
+    finally:
+        os.remove(temp_path)
 
 
-def speak(text: str, voice: str = "Samantha", speed: float = 1.0) -> bool:
+def speak(text: str, voice: str = "Samantha", speed: float = 1.0, volume: float = 1.0) -> bool:
     """
     Speak text using macOS built-in say command.
 
@@ -15,6 +60,7 @@ def speak(text: str, voice: str = "Samantha", speed: float = 1.0) -> bool:
         text: Text to speak
         voice: macOS voice name (Samantha, Alex, Tom, etc.)
         speed: Speed multiplier (1.0 = normal, ~175 wpm)
+        volume: Playback volume (0.0 to 1.0, default 1.0)
 
     Returns:
         True if successful, False otherwise
@@ -23,6 +69,10 @@ def speak(text: str, voice: str = "Samantha", speed: float = 1.0) -> bool:
     rate = int(175 * speed)
 
     try:
+        try:
+            return _speak_pcm(text, voice, rate, volume)
+        except ImportError:
+            pass
         subprocess.run(
             ["say", "-v", voice, "-r", str(rate), text],
             check=True,
@@ -40,6 +90,59 @@ def speak(text: str, voice: str = "Samantha", speed: float = 1.0) -> bool:
         return False
 
 
+async def synthesize(text: str, voice: str = "Samantha", speed: float = 1.0):
+    """
+    Render text with say without blocking the event loop.
+
+    Args:
+        text: Text to speak
+        voice: macOS voice name (Samantha, Alex, Tom, etc.)
+        speed: Speed multiplier (1.0 = normal, ~175 wpm)
+
+    Yields:
+        (samples, sample_rate, text) once, unless say failed or the
+        utterance was cancelled
+    """
+    rate = int(175 * speed)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+        temp_path = f.name
+    try:
+        import audio_output
+        import playback_registry
+        import tts_metrics
+
+        tts_metrics.begin_utterance("macos", voice, len(text))
+        start = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            "say", "-v", voice, "-r", str(rate), "-o", temp_path,
+            "--file-format=WAVE", "--data-format=LEI16@22050", text,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+        # Barge-in: stop rendering as soon as the utterance is cancelled
+        while proc.returncode is None:
+            if playback_registry.cancelled():
+                proc.terminate()
+                await proc.wait()
+                return
+            try:
+                await asyncio.wait_for(proc.wait(), playback_registry.POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        if proc.returncode:
+            print(f"macOS say failed (exit {proc.returncode})", file=sys.stderr)
+            return
+        samples, sample_rate = audio_output.read_wav(temp_path)
+        tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000, **tts_metrics.utterance_tags())
+        tts_metrics.mark("first_audio")
+        yield samples, sample_rate, text
+    except FileNotFoundError:
+        print("macOS say command not found (not on macOS?)", file=sys.stderr)
+    except Exception as e:
+        print(f"Unexpected error in macOS say: {e}", file=sys.stderr)
+    finally:
+        os.remove(temp_path)
+
+
 def list_voices() -> list:
     """List available macOS voices."""
     try:
@@ -3,52 +3,118 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #     "openai",
+#     "numpy",
 # ]
 # ///
 """
 OpenAI TTS API wrapper.
 UV single-file script with inline dependencies.
+
+The API base URL can be overridden (e.g. to point at
+scripts/mock-tts-server.py) via OPENAI_BASE_URL or
+providers.openai.base_url in tts_config.json.
+
+The SDK's own retries are off: rate_limiter.py paces requests, retries
+429/5xx and reports overflow through rate_limiter.overflow_mode().
+
+synthesize() is the asyncio counterpart, on the SDK's AsyncOpenAI
+client: one streamed request per chunk of whole sentences, so earlier
+chunks play while later ones download.
 """
 
+import json
 import os
 import sys
-import tempfile
-import subprocess
+import time
 from pathlib import Path
 
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import capabilities
+import playback_registry
+import rate_limiter
+import text_normalizer
+import tts_metrics
+
 
 # API configuration
 DEFAULT_MODEL = "tts-1-hd"
 DEFAULT_VOICE = "onyx"
 DEFAULT_SPEED = 1.0
+# Raw 24kHz 16-bit PCM so output goes through the shared post-processing stage
+RESPONSE_FORMAT = "pcm"
+SAMPLE_RATE = 24000
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+
+# Reused across calls so a long-lived process keeps its TLS connection
+_client = None
+_client_key = None
+
+
+def _load_provider_config() -> dict:
+    """Load providers.openai from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("providers", {}).get("openai", {})
+    except Exception:
+        pass
+    return {}
+
+
+def get_base_url():
+    """Get the API base URL, or None for the SDK default."""
+    return os.getenv("OPENAI_BASE_URL") or _load_provider_config().get("base_url") or None
+
+
+def get_client(api_key: str):
+    """Get the shared OpenAI client (connection pool) for this key and base URL."""
+    global _client, _client_key
+    key = (api_key, get_base_url())
+    if _client is None or _client_key != key:
+        from openai import OpenAI
+        _client = OpenAI(api_key=api_key, base_url=key[1])
+        _client_key = key
+    return _client
+
+
+def warmup() -> bool:
+    """Open a keep-alive connection to the API ahead of the first request.
+
+    Returns:
+        True if the server answered (any status), False otherwise
+    """
+    api_key = load_api_key()
+    if not api_key:
+        return False
+    try:
+        import openai
+        get_client(api_key).with_options(timeout=5, max_retries=0).models.retrieve(DEFAULT_MODEL)
+        return True
+    except ImportError:
+        return False
+    except openai.APIStatusError:
+        return True
+    except Exception:
+        return False
 
 
 def load_api_key() -> str:
-    """Load OpenAI API key from environment or .env file."""
-    # Check environment first
-    api_key = os.getenv("OPENAI_API_KEY", "")
-    if api_key:
-        return api_key
-
-    # Try ~/.claude/.env (unified credentials)
-    env_file = Path.home() / ".claude" / ".env"
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    if key.strip() == "OPENAI_API_KEY":
-                        return value.strip()
-
-    return ""
+    """Load the OpenAI API key from the source the capability snapshot
+    recorded (environment, ~/.claude/.env)."""
+    return capabilities.api_key("openai")
 
 
 def speak(
     text: str,
     voice: str = DEFAULT_VOICE,
     speed: float = DEFAULT_SPEED,
-    model: str = DEFAULT_MODEL
+    model: str = DEFAULT_MODEL,
+    volume: float = 1.0
 ) -> bool:
     """
     Speak text using OpenAI TTS API.
@@ -58,6 +124,7 @@ def speak(
         voice: OpenAI voice (alloy, echo, fable, onyx, nova, shimmer)
         speed: Speech speed (0.25-4.0, default 1.0)
         model: Model ID (tts-1 or tts-1-hd)
+        volume: Playback volume (0.0 to 1.0, default 1.0)
 
     Returns:
         True if successful, False otherwise
@@ -68,31 +135,48 @@ def speak(
         return False
 
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
+        import audio_output
+        import openai
+        # Retries are left to the shared rate limiter
+        client = get_client(api_key).with_options(max_retries=0)
 
         # Clamp speed to OpenAI limits
         speed = max(0.25, min(4.0, speed))
 
-        # Create speech
-        response = client.audio.speech.create(
-            model=model,
-            voice=voice,
-            input=text,
-            speed=speed
-        )
-
-        # Save to temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as f:
-            response.stream_to_file(f.name)
-            temp_path = f.name
+        # Create speech (streamed so the first byte can be timed)
+        tts_metrics.begin_utterance("openai", voice, len(text))
+        limit = rate_limiter.RateLimit("openai", api_key)
+        while True:
+            if not limit.acquire(len(text)):
+                # Overflowed (the caller degrades), or barge-in while queued
+                return playback_registry.cancelled()
+            start = time.perf_counter()
+            chunks = []
+            try:
+                with client.audio.speech.with_streaming_response.create(
+                    model=model,
+                    voice=voice,
+                    input=text,
+                    speed=speed,
+                    response_format=RESPONSE_FORMAT
+                ) as response:
+                    for chunk in response.iter_bytes(chunk_size=4096):
+                        # Barge-in: stop between chunks
+                        if playback_registry.cancelled():
+                            return True
+                        tts_metrics.mark("first_audio")
+                        chunks.append(chunk)
+                break
+            except openai.APIStatusError as e:
+                delay = limit.retry_delay(e.status_code, e.response.headers.get("retry-after"))
+                if delay is None:
+                    raise
+                if not rate_limiter.wait(delay):
+                    return True
+        tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000, **tts_metrics.utterance_tags())
+        samples = audio_output.pcm16_to_float32(b"".join(chunks))
 
-        # Play with afplay
-        subprocess.run(["afplay", temp_path], check=True)
-
-        # Cleanup
-        os.remove(temp_path)
-        return True
+        return audio_output.play_pcm(samples, SAMPLE_RATE, volume=volume)
 
     except Exception as e:
         print(f"OpenAI TTS error: {e}", file=sys.stderr)
@@ -104,6 +188,80 @@ def list_voices():
     return ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
 
 
+async def synthesize(
+    text: str,
+    voice: str = DEFAULT_VOICE,
+    speed: float = DEFAULT_SPEED,
+    model: str = DEFAULT_MODEL,
+    chunk_chars: int = text_normalizer.DEFAULT_CHUNK_CHARS
+):
+    """
+    Synthesize text chunk by chunk without blocking the event loop.
+
+    Uses its own AsyncOpenAI client (async clients belong to one event
+    loop), kept for the chunks of this text. Rate limiting and retries
+    work as in speak(); stops on barge-in.
+
+    Args:
+        text: Text to speak
+        voice, speed, model: As for speak()
+        chunk_chars: About this many characters per request
+
+    Yields:
+        (samples, sample_rate, chunk_text) per chunk; nothing more after
+        an error, overflow or barge-in
+    """
+    api_key = load_api_key()
+    if not api_key:
+        print("Error: OPENAI_API_KEY not found", file=sys.stderr)
+        return
+
+    try:
+        import audio_output
+        import openai
+
+        # Clamp speed to OpenAI limits
+        speed = max(0.25, min(4.0, speed))
+
+        tts_metrics.begin_utterance("openai", voice, len(text))
+        limit = rate_limiter.RateLimit("openai", api_key)
+        # Retries are left to the shared rate limiter
+        async with openai.AsyncOpenAI(api_key=api_key, base_url=get_base_url(), max_retries=0) as client:
+            for chunk in text_normalizer.sentence_chunks(text, chunk_chars):
+                while True:
+                    if not await limit.acquire_async(len(chunk)):
+                        return
+                    start = time.perf_counter()
+                    parts = []
+                    try:
+                        async with client.audio.speech.with_streaming_response.create(
+                            model=model,
+                            voice=voice,
+                            input=chunk,
+                            speed=speed,
+                            response_format=RESPONSE_FORMAT
+                        ) as response:
+                            async for data in response.iter_bytes(chunk_size=4096):
+                                # Barge-in: stop between chunks
+                                if playback_registry.cancelled():
+                                    return
+                                tts_metrics.mark("first_audio")
+                                parts.append(data)
+                        break
+                    except openai.APIStatusError as e:
+                        delay = limit.retry_delay(e.status_code, e.response.headers.get("retry-after"))
+                        if delay is None:
+                            raise
+                        if not await rate_limiter.wait_async(delay):
+                            return
+                tts_metrics.record("synthesis", (time.perf_counter() - start) * 1000,
+                                   **tts_metrics.utterance_tags(), chunk_len=len(chunk))
+                yield audio_output.pcm16_to_float32(b"".join(parts)), SAMPLE_RATE, chunk
+
+    except Exception as e:
+        print(f"OpenAI TTS error: {e}", file=sys.stderr)
+
+
 if __name__ == "__main__":
     # Test with onyx voice
     speak(
@@ -0,0 +1,145 @@
+"""
+Persistent phoneme cache for Kokoro's grapheme-to-phoneme (G2P) step.
+
+Kokoro runs every sentence through espeak before ONNX inference starts.
+Replies repeat the same sentences constantly ("Got it.", "Tests pass."),
+so phonemes are cached on disk keyed by (language, normalized sentence).
+
+The cache is a bounded LRU stored as JSON. Each hook process loads it
+once, and writes it back atomically only if something changed. All
+access goes through one lock, since daemon workers and asyncio
+pipelines synthesize from several threads.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+# Cache location and bounds
+CACHE_DIR = Path.home() / ".cache" / "claude-tts"
+CACHE_FILE = CACHE_DIR / "phoneme_cache.json"
+DEFAULT_MAX_ENTRIES = 5000
+
+_entries = None
+_dirty = False
+_max_entries = DEFAULT_MAX_ENTRIES
+# Guards _entries and _dirty (reentrant: release() flushes)
+_lock = threading.RLock()
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Collapse whitespace so trivially different sentences share a key."""
+    return re.sub(r"\s+", " ", sentence).strip()
+
+
+def _key(lang: str, sentence: str) -> str:
+    return f"{lang}|{normalize_sentence(sentence)}"
+
+
+def _load() -> OrderedDict:
+    """Load the cache file once per process. Caller holds _lock."""
+    global _entries
+    if _entries is None:
+        _entries = OrderedDict()
+        try:
+            if CACHE_FILE.exists():
+                data = json.loads(CACHE_FILE.read_text())
+                if isinstance(data, dict):
+                    _entries.update(data)
+        except (json.JSONDecodeError, OSError):
+            pass
+    return _entries
+
+
+def set_max_entries(max_entries: int) -> None:
+    """Set the cache bound (oldest entries are evicted first)."""
+    global _max_entries
+    _max_entries = max(1, int(max_entries))
+
+
+def get(lang: str, sentence: str):
+    """Get cached phonemes for a sentence.
+
+    Args:
+        lang: espeak language code (en-us, en-gb, ...)
+        sentence: Sentence text
+
+    Returns:
+        Phoneme string, or None on a miss
+    """
+    key = _key(lang, sentence)
+    with _lock:
+        entries = _load()
+        phonemes = entries.get(key)
+        if phonemes is not None:
+            entries.move_to_end(key)
+    return phonemes
+
+
+def put(lang: str, sentence: str, phonemes: str) -> None:
+    """Store phonemes for a sentence, evicting the oldest entries past the bound."""
+    global _dirty
+    key = _key(lang, sentence)
+    with _lock:
+        entries = _load()
+        entries[key] = phonemes
+        entries.move_to_end(key)
+        while len(entries) > _max_entries:
+            entries.popitem(last=False)
+        _dirty = True
+
+
+def flush() -> None:
+    """Write the cache to disk if it changed (atomic rename)."""
+    global _dirty
+    with _lock:
+        if not _dirty or _entries is None:
+            return
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(_entries, f)
+            os.replace(temp_path, CACHE_FILE)
+            _dirty = False
+        except OSError:
+            pass
+
+
+def release() -> None:
+    """Write pending entries and drop the in-memory copy.
+
+    The next get() or put() reloads from disk. Used by the daemon to
+    shed memory; nothing is lost.
+    """
+    global _entries
+    with _lock:
+        flush()
+        _entries = None
+
+
+def resident_entries() -> int:
+    """Number of entries currently held in memory (0 if not loaded)."""
+    with _lock:
+        return len(_entries) if _entries is not None else 0
+
+
+def clear() -> None:
+    """Drop the in-memory cache and delete the cache file."""
+    global _entries, _dirty
+    with _lock:
+        _entries = None
+        _dirty = False
+        if CACHE_FILE.exists():
+            CACHE_FILE.unlink()
+
+
+def stats() -> dict:
+    """Get cache size information."""
+    with _lock:
+        return {"entries": len(_load()), "max_entries": _max_entries}
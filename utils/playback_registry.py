@@ -0,0 +1,362 @@
+"""
+Playback and synthesis registry for barge-in.
+
+Every utterance registers which process owns it (a hook, or the daemon),
+the player process once audio starts, when playback began and where
+its sentences end. When the user submits a new prompt, the
+UserPromptSubmit hook calls request_cancel() for its session and the
+owner stops synthesis between chunks and ends playback according to
+barge_in.mode:
+
+- stop: kill the player immediately
+- fade: kill the player and play a short fade-out of the current audio
+- finish_sentence: let the player run to the end of the current sentence
+
+Owners are told to cancel with SIGUSR1 (hook processes) or a "cancel"
+request over the daemon socket. If an owner does not let go within
+barge_in.wait_ms, the player is killed directly so the device is free.
+
+The registry is a small JSON file guarded by flock, keyed by session.
+"""
+
+import contextvars
+import fcntl
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+REGISTRY_FILE = Path(os.environ.get(
+    "CLAUDE_TTS_PLAYBACK_REGISTRY", f"/tmp/claude-tts-playback-{os.getuid()}.json"
+))
+MODES = ("stop", "fade", "finish_sentence")
+DEFAULT_MODE = "stop"
+DEFAULT_FADE_MS = 250
+DEFAULT_WAIT_MS = 500
+# finish_sentence never runs on for longer than this
+MAX_FINISH_MS = 6000
+POLL_INTERVAL = 0.01
+
+# Utterances owned by this process, by session
+_local = {}
+_local_lock = threading.Lock()
+# The utterance current on this thread or asyncio task (new threads start
+# without one; tasks and asyncio.to_thread() inherit their creator's)
+_current = contextvars.ContextVar("claude_tts_utterance", default=None)
+_signal_installed = False
+
+
+class Utterance:
+    """One registered utterance owned by this process."""
+
+    def __init__(self, session: str, text: str, daemon: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.session = session
+        self.text = text
+        self.daemon = daemon
+        self.cancel_event = threading.Event()
+        self.cancel_mode = None
+
+    def cancel(self, mode: str = None) -> None:
+        """Flag cancellation; mode None is looked up in the registry later."""
+        if mode is not None:
+            self.cancel_mode = mode if mode in MODES else DEFAULT_MODE
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def mode(self) -> str:
+        """The requested cancel mode (stop, fade or finish_sentence)."""
+        if self.cancel_mode is None:
+            try:
+                with _locked_registry(write=False) as data:
+                    mode = data.get(self.session, {}).get("cancel")
+            except OSError:
+                mode = None
+            self.cancel_mode = mode if mode in MODES else DEFAULT_MODE
+        return self.cancel_mode
+
+
+def _load_barge_in_config() -> dict:
+    """Load the barge_in section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("barge_in", {})
+    except Exception:
+        pass
+    return {}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+@contextmanager
+def _locked_registry(write: bool = True):
+    """Yield the registry dict under an exclusive lock, saving it if write."""
+    REGISTRY_FILE.touch(mode=0o600, exist_ok=True)
+    with open(REGISTRY_FILE, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            try:
+                data = json.loads(f.read() or "{}")
+            except ValueError:
+                data = {}
+            yield data
+            if write:
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(data))
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _update_entry(utterance: Utterance, **fields) -> None:
+    """Merge fields into this utterance's registry entry."""
+    try:
+        with _locked_registry() as data:
+            entry = data.get(utterance.session)
+            if entry and entry.get("id") == utterance.id:
+                entry.update(fields)
+    except OSError:
+        pass
+
+
+def _drop_entry(session: str, entry_id: str) -> None:
+    """Remove a session's registry entry if it is still the given one."""
+    try:
+        with _locked_registry() as data:
+            if data.get(session, {}).get("id") == entry_id:
+                del data[session]
+    except OSError:
+        pass
+
+
+def _on_signal(signum, frame) -> None:
+    """SIGUSR1: cancel this process's utterances.
+
+    No file I/O here (the interrupted code may hold the registry lock);
+    the mode is read from the registry when the owner acts on it.
+    """
+    for utterance_ in list(_local.values()):
+        utterance_.cancel()
+
+
+def _install_signal_handler() -> None:
+    global _signal_installed
+    if _signal_installed or threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signal.SIGUSR1, _on_signal)
+    _signal_installed = True
+
+
+def _session_id() -> str:
+    try:
+        from session_state import _get_current_session_id
+        return _get_current_session_id()
+    except Exception:
+        return str(os.getppid())
+
+
+@contextmanager
+def utterance(text: str, session: str = None, daemon: bool = False):
+    """Register an utterance for the duration of the block.
+
+    Args:
+        text: Text being spoken (used to estimate sentence boundaries)
+        session: Session ID (default: current session)
+        daemon: True when the owner is the synthesis daemon
+
+    Yields:
+        The Utterance; providers check cancelled() between chunks
+    """
+    session = session or _session_id()
+    current = Utterance(session, text, daemon)
+    if not daemon:
+        _install_signal_handler()
+    with _local_lock:
+        _local[session] = current
+    _current.set(current)
+    try:
+        with _locked_registry() as data:
+            # Drop entries whose owner died without cleaning up
+            for key in [k for k, e in data.items() if not _pid_alive(e.get("pid", 0))]:
+                del data[key]
+            data[session] = {
+                "id": current.id, "pid": os.getpid(), "daemon": daemon,
+                "state": "synthesis", "started": time.time(),
+            }
+    except OSError:
+        pass
+    try:
+        yield current
+    finally:
+        _current.set(None)
+        with _local_lock:
+            if _local.get(session) is current:
+                del _local[session]
+        try:
+            with _locked_registry() as data:
+                if data.get(session, {}).get("id") == current.id:
+                    del data[session]
+        except OSError:
+            pass
+
+
+def current():
+    """The utterance registered by this thread or task, or None."""
+    return _current.get()
+
+
+def bind(utterance_) -> None:
+    """Make another thread's utterance current here (daemon synthesis workers)."""
+    _current.set(utterance_)
+
+
+def cancelled() -> bool:
+    """Check whether this thread's (or task's) utterance has been cancelled."""
+    utterance_ = current()
+    return utterance_ is not None and utterance_.cancelled
+
+
+def sentence_ends(text: str, duration: float) -> list:
+    """Estimate sentence end times (seconds) by character share of the audio."""
+    if not text or duration <= 0:
+        return [duration]
+    ends = [m.end() for m in re.finditer(r"[.!?;:](?:\s+|$)|\n+", text)]
+    if not ends or ends[-1] < len(text):
+        ends.append(len(text))
+    return [duration * end / len(text) for end in ends]
+
+
+def player_started(pid: int, duration: float, text: str = None) -> None:
+    """Record the player process and sentence boundaries of this utterance.
+
+    Args:
+        pid: Player process ID (None when mixed in-process)
+        duration: Audio duration in seconds
+        text: Text of this audio when it is only part of the utterance
+    """
+    utterance_ = current()
+    if utterance_ is None:
+        return
+    ends = sentence_ends(text or utterance_.text, duration)
+    _update_entry(utterance_, state="playback", player_pid=pid, play_started=time.time(),
+                  duration=round(duration, 3), sentence_ends=[round(t, 3) for t in ends])
+
+
+def stop_point(played: float, duration: float, text: str = None) -> float:
+    """Where finish_sentence mode stops: the next sentence end after played."""
+    utterance_ = current()
+    if text is None:
+        text = utterance_.text if utterance_ else ""
+    for end in sentence_ends(text, duration):
+        if end >= played:
+            return min(end, played + MAX_FINISH_MS / 1000)
+    return duration
+
+
+def cancel_local(session: str, mode: str) -> bool:
+    """Cancel this process's utterance for a session (used by the daemon)."""
+    with _local_lock:
+        utterance_ = _local.get(session)
+    if utterance_ is None:
+        return False
+    utterance_.cancel(mode)
+    return True
+
+
+def request_cancel(session: str = None, mode: str = None, wait_ms: int = None) -> bool:
+    """Cancel the session's in-flight utterance, waiting until the device is free.
+
+    Args:
+        session: Session ID (default: current session)
+        mode: stop, fade or finish_sentence (default: barge_in.mode)
+        wait_ms: How long the owner gets before the player is killed
+
+    Returns:
+        True if an utterance was cancelled
+    """
+    config = _load_barge_in_config()
+    if not config.get("enabled", True):
+        return False
+    session = session or _session_id()
+    mode = mode or config.get("mode", DEFAULT_MODE)
+    if wait_ms is None:
+        wait_ms = config.get("wait_ms", DEFAULT_WAIT_MS)
+        if mode == "finish_sentence":
+            wait_ms = max(wait_ms, MAX_FINISH_MS)
+        elif mode == "fade":
+            wait_ms += config.get("fade_ms", DEFAULT_FADE_MS)
+
+    try:
+        with _locked_registry() as data:
+            entry = data.get(session)
+            if entry and not _pid_alive(entry["pid"]):
+                # Owner died (e.g. a hook killed by its timeout): nothing to
+                # signal, and its player_pid may belong to another process now
+                del data[session]
+                entry = None
+            if entry:
+                entry["cancel"] = mode
+                entry = dict(entry)
+    except OSError:
+        entry = None
+
+    if not entry or entry.get("daemon"):
+        # Also drops this session's speech still queued in the daemon
+        import tts_daemon
+        if tts_daemon.enabled():
+            tts_daemon.request("cancel", session=session, mode=mode)
+        if not entry:
+            return False
+    else:
+        try:
+            os.kill(entry["pid"], signal.SIGUSR1)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    deadline = time.monotonic() + wait_ms / 1000
+    while time.monotonic() < deadline:
+        try:
+            with _locked_registry(write=False) as data:
+                latest = data.get(session, {})
+        except OSError:
+            break
+        if latest.get("id") != entry["id"]:
+            return True
+        entry = latest
+        if not _pid_alive(entry["pid"]):
+            # Died instead of letting go: nothing left to stop
+            _drop_entry(session, entry["id"])
+            return True
+        time.sleep(POLL_INTERVAL)
+
+    # Owner is alive but did not let go in time: free the device directly
+    player_pid = entry.get("player_pid")
+    if player_pid:
+        try:
+            os.kill(player_pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+    print(f"Barge-in: owner {entry['pid']} did not stop within {wait_ms} ms", file=sys.stderr)
+    return True
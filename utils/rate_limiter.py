@@ -0,0 +1,295 @@
+"""
+Client-side rate limiting for the cloud TTS providers.
+
+Every ElevenLabs and OpenAI request first takes tokens from two token
+buckets, one counting requests and one counting characters, kept per
+provider and API key. The buckets live in a small JSON file guarded by
+flock, so every hook process (and concurrent sessions) draws from the
+same budget. A 429 or 503 from the API is retried after its Retry-After
+(or a jittered exponential backoff) and blocks the bucket for all
+processes until then.
+
+When a request does not fit, rate_limit.policy decides:
+- queue: wait for tokens, up to rate_limit.max_wait_ms per utterance
+- degrade: do not wait
+
+Either way, a request that cannot be sent in time overflows to
+rate_limit.overflow_mode (default kokoro, then macOS say) instead of
+failing over to say after a rejected request.
+
+Configuration via tts_config.json:
+- rate_limit: enabled, policy, max_wait_ms, max_retries, backoff_ms,
+  backoff_max_ms, overflow_mode
+- providers.<name>.rate_limit: requests_per_minute, characters_per_minute,
+  burst_seconds (bucket size in seconds of rate)
+"""
+
+import asyncio
+import contextvars
+import fcntl
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import tts_metrics
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+STATE_FILE = Path(os.environ.get(
+    "CLAUDE_TTS_RATE_LIMITS", f"/tmp/claude-tts-ratelimit-{os.getuid()}.json"
+))
+POLICIES = ("queue", "degrade")
+DEFAULT_POLICY = "queue"
+DEFAULT_MAX_WAIT_MS = 4000
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_MS = 500
+DEFAULT_BACKOFF_MAX_MS = 8000
+DEFAULT_OVERFLOW_MODE = "kokoro"
+DEFAULT_BURST_SECONDS = 10
+# Retried statuses; 429 (and anything with Retry-After) blocks the bucket
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Conservative defaults; raise them to match your plan
+DEFAULT_LIMITS = {
+    "elevenlabs": {"requests_per_minute": 60, "characters_per_minute": 20000},
+    "openai": {"requests_per_minute": 50, "characters_per_minute": 100000},
+}
+POLL_INTERVAL = 0.05
+
+# Per thread or asyncio task (daemon requests and async pipelines run
+# concurrently): providers whose last request overflowed
+_overflowed = contextvars.ContextVar("claude_tts_overflowed", default=frozenset())
+
+
+def _load_rate_limit_config() -> dict:
+    """Load the rate_limit section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("rate_limit", {})
+    except Exception:
+        pass
+    return {}
+
+
+def _load_limits(provider: str) -> dict:
+    """Load providers.<provider>.rate_limit, over the built-in defaults."""
+    limits = dict(DEFAULT_LIMITS.get(provider, {}))
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                limits.update(json.load(f).get("providers", {}).get(provider, {}).get("rate_limit", {}))
+    except Exception:
+        pass
+    return limits
+
+
+@contextmanager
+def _locked_state():
+    """Yield the shared bucket state under an exclusive lock, then save it."""
+    STATE_FILE.touch(mode=0o600, exist_ok=True)
+    with open(STATE_FILE, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            try:
+                data = json.loads(f.read() or "{}")
+            except ValueError:
+                data = {}
+            yield data
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(data))
+            # Flush before unlocking, or the next process may read it truncated
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _bucket_key(provider: str, api_key: str) -> str:
+    """Buckets are per provider and key; the key itself is never stored."""
+    return f"{provider}:{hashlib.sha256(api_key.encode()).hexdigest()[:12]}"
+
+
+def _refill(bucket: list, per_minute: float, capacity: float, now: float) -> float:
+    """Top up a [tokens, updated] bucket and return its tokens."""
+    tokens, updated = bucket
+    tokens = min(capacity, tokens + max(0.0, now - updated) * per_minute / 60)
+    bucket[:] = [tokens, now]
+    return tokens
+
+
+def overflow_mode(provider: str):
+    """Mode to speak with instead, if the provider's last request on this
+    thread or task overflowed.
+
+    Returns:
+        rate_limit.overflow_mode (e.g. "kokoro"), or None
+    """
+    if provider not in _overflowed.get():
+        return None
+    mode = _load_rate_limit_config().get("overflow_mode", DEFAULT_OVERFLOW_MODE)
+    return None if mode in (None, "", provider) else mode
+
+
+def wait(seconds: float) -> bool:
+    """Sleep, waking early on barge-in.
+
+    Returns:
+        False if the utterance was cancelled while waiting
+    """
+    import playback_registry
+
+    deadline = time.monotonic() + seconds
+    while True:
+        if playback_registry.cancelled():
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(POLL_INTERVAL, remaining))
+
+
+async def wait_async(seconds: float) -> bool:
+    """wait() for the event loop.
+
+    Returns:
+        False if the utterance was cancelled while waiting
+    """
+    import playback_registry
+
+    deadline = time.monotonic() + seconds
+    while True:
+        if playback_registry.cancelled():
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        await asyncio.sleep(min(POLL_INTERVAL, remaining))
+
+
+class RateLimit:
+    """Limiter for one utterance's request(s) to a provider."""
+
+    def __init__(self, provider: str, api_key: str):
+        config = _load_rate_limit_config()
+        self.provider = provider
+        self.key = _bucket_key(provider, api_key)
+        self.enabled = config.get("enabled", True)
+        self.policy = config.get("policy", DEFAULT_POLICY)
+        if self.policy not in POLICIES:
+            self.policy = DEFAULT_POLICY
+        self.max_retries = config.get("max_retries", DEFAULT_MAX_RETRIES)
+        self.backoff = config.get("backoff_ms", DEFAULT_BACKOFF_MS) / 1000
+        self.backoff_max = config.get("backoff_max_ms", DEFAULT_BACKOFF_MAX_MS) / 1000
+        self.max_wait = config.get("max_wait_ms", DEFAULT_MAX_WAIT_MS) / 1000 if self.policy == "queue" else 0
+        self.deadline = time.monotonic() + self.max_wait
+        self.limits = _load_limits(provider)
+        self.attempt = 0
+        _overflowed.set(_overflowed.get() - {provider})
+
+    def _overflow(self, reason: str) -> None:
+        _overflowed.set(_overflowed.get() | {self.provider})
+        tts_metrics.record("rate_wait", 0, provider=self.provider, outcome="overflow")
+        print(f"{self.provider} rate limited ({reason})", file=sys.stderr)
+
+    def reserve(self, chars: int):
+        """Take one request and chars characters from the shared buckets.
+
+        With the queue policy, tokens are reserved up front (buckets may go
+        negative) and the caller sleeps until they are due, so queued
+        processes are served in arrival order.
+
+        Returns:
+            Seconds until the request may be sent (0 for now), or None if
+            it overflowed
+        """
+        if not self.enabled:
+            return 0.0
+        rpm = float(self.limits.get("requests_per_minute") or 0)
+        cpm = float(self.limits.get("characters_per_minute") or 0)
+        burst = self.limits.get("burst_seconds", DEFAULT_BURST_SECONDS) / 60
+        with _locked_state() as data:
+            now = time.time()
+            entry = data.setdefault(self.key, {})
+            due = max(0.0, entry.get("blocked_until", 0) - now)
+            costs = []
+            for name, per_minute, cost in (("requests", rpm, 1), ("characters", cpm, chars)):
+                if per_minute <= 0:
+                    continue
+                capacity = max(1.0, per_minute * burst)
+                tokens = _refill(entry.setdefault(name, [capacity, now]), per_minute, capacity, now)
+                # A request bigger than the bucket only needs a full bucket
+                cost = min(cost, capacity)
+                costs.append((name, cost))
+                due = max(due, (cost - tokens) * 60 / per_minute)
+            if due > max(0.0, self.deadline - time.monotonic()):
+                self._overflow(f"next slot in {due:.1f}s")
+                return None
+            for name, cost in costs:
+                entry[name][0] -= cost
+        if due > 0:
+            tts_metrics.record("rate_wait", due * 1000, provider=self.provider, outcome="queued")
+        return due
+
+    def acquire(self, chars: int) -> bool:
+        """reserve(), then sleep until the tokens are due.
+
+        Returns:
+            True when the request may be sent, False if it overflowed or
+            the utterance was cancelled while queued
+        """
+        due = self.reserve(chars)
+        if due is None:
+            return False
+        return due <= 0 or wait(due)
+
+    async def acquire_async(self, chars: int) -> bool:
+        """acquire() for the event loop: other tasks run while this one queues."""
+        due = self.reserve(chars)
+        if due is None:
+            return False
+        return due <= 0 or await wait_async(due)
+
+    def retry_delay(self, status: int, retry_after: str = None):
+        """Record a failed request and decide whether to retry it.
+
+        A 429, or any response carrying Retry-After, blocks the bucket for
+        every process until the server's deadline.
+
+        Args:
+            status: HTTP status of the failed request
+            retry_after: The Retry-After header, if any
+
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        if not self.enabled or status not in RETRY_STATUSES:
+            return None
+        try:
+            server_delay = float(retry_after) if retry_after else None
+        except ValueError:
+            server_delay = None
+        if server_delay is not None:
+            # Spread the herd that was blocked by the same Retry-After
+            delay = server_delay + random.uniform(0, self.backoff)
+        else:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** self.attempt))
+        if status == 429 or server_delay is not None:
+            with _locked_state() as data:
+                entry = data.setdefault(self.key, {})
+                entry["blocked_until"] = max(entry.get("blocked_until", 0), time.time() + delay)
+        self.attempt += 1
+        if self.attempt <= self.max_retries and delay <= self.deadline - time.monotonic():
+            return delay
+        if status == 429:
+            self._overflow(f"HTTP 429, retry in {delay:.1f}s")
+        return None
@@ -1,6 +1,14 @@
 """
 Session state persistence for TTS mode selection.
 Uses a temporary file that persists for the Claude Code session.
+CLAUDE_TTS_STATE_FILE overrides the location (used by scripts/load-test.py).
+The file is private to the user (0600) and replaced atomically; it also
+holds the capability snapshot (capabilities.py).
+
+Mode choices are also remembered per project (the enclosing git
+repository) or per directory in ~/.config/claude-tts/project_modes.json,
+so later sessions there start in that mode without a dialog.
+CLAUDE_TTS_PROJECT_MODES overrides that location.
 """
 
 import json
@@ -10,7 +18,11 @@ from datetime import datetime, timedelta
 
 
 # State file location
-SESSION_STATE_FILE = Path("/tmp/claude_tts_session_state.json")
+SESSION_STATE_FILE = Path(os.environ.get("CLAUDE_TTS_STATE_FILE", "/tmp/claude_tts_session_state.json"))
+PROJECT_MODES_FILE = Path(os.environ.get(
+    "CLAUDE_TTS_PROJECT_MODES", Path.home() / ".config" / "claude-tts" / "project_modes.json"
+))
+TTS_MODES = ("kokoro", "elevenlabs", "openai", "off")
 
 
 def _get_current_session_id() -> str:
@@ -22,6 +34,28 @@ def _get_current_session_id() -> str:
     return os.environ.get("CLAUDE_SESSION_ID", str(os.getppid()))
 
 
+def set_session_id(session_id: str) -> None:
+    """Use the hook payload's session_id for the rest of this process.
+
+    Hooks run under different parent processes, so the PID fallback does
+    not match across hooks of one session; the payload's id does.
+
+    Args:
+        session_id: session_id from the hook's stdin payload (ignored if empty)
+    """
+    if session_id:
+        os.environ["CLAUDE_SESSION_ID"] = str(session_id)
+
+
+def _write_state(state: dict) -> None:
+    """Replace the state file atomically, readable only by the user."""
+    temp = SESSION_STATE_FILE.with_suffix(f".{os.getpid()}.tmp")
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(json.dumps(state))
+    os.replace(temp, SESSION_STATE_FILE)
+
+
 def save_tts_mode(mode: str) -> None:
     """Save TTS mode to session state file while preserving other keys.
 
@@ -36,7 +70,32 @@ def save_tts_mode(mode: str) -> None:
     state["tts_mode"] = mode
     state["session_id"] = _get_current_session_id()
     state["updated_at"] = datetime.now().isoformat()
-    SESSION_STATE_FILE.write_text(json.dumps(state))
+    _write_state(state)
+
+
+def apply_tts_mode(mode: str, session_id: str = None) -> bool:
+    """Set the mode chosen for a session, unless a newer session took over.
+
+    Used when a choice resolves after the session started (async dialog,
+    terminal selector); unlike save_tts_mode() it keeps the recorded
+    session id.
+
+    Args:
+        mode: TTS mode
+        session_id: Session the choice was made for (None: whichever is current)
+
+    Returns:
+        True if the mode was applied
+    """
+    state = get_session_state()
+    if session_id and state.get("session_id") not in (None, str(session_id)):
+        return False
+    state["tts_mode"] = mode
+    if session_id:
+        state["session_id"] = str(session_id)
+    state["updated_at"] = datetime.now().isoformat()
+    _write_state(state)
+    return True
 
 
 def get_tts_mode() -> str:
@@ -60,6 +119,17 @@ def get_tts_mode() -> str:
         return "off"
 
 
+def save_capabilities(snapshot: dict) -> None:
+    """Store the capability snapshot (see capabilities.py) with the session.
+
+    Args:
+        snapshot: Providers, binaries and key sources; never the keys
+    """
+    state = get_session_state()
+    state["capabilities"] = snapshot
+    _write_state(state)
+
+
 def clear_session_state() -> None:
     """Clear session state file."""
     if SESSION_STATE_FILE.exists():
@@ -77,6 +147,80 @@ def get_session_state() -> dict:
         return {}
 
 
+# === Remembered Mode Functions ===
+
+def project_root(cwd: str) -> Path:
+    """The git repository enclosing cwd, or cwd itself outside a repository."""
+    path = Path(cwd).resolve()
+    for candidate in (path, *path.parents):
+        if (candidate / ".git").exists():
+            return candidate
+    return path
+
+
+def _load_project_modes() -> dict:
+    try:
+        return json.loads(PROJECT_MODES_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_project_modes(modes: dict) -> None:
+    PROJECT_MODES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temp = PROJECT_MODES_FILE.with_suffix(f".{os.getpid()}.tmp")
+    temp.write_text(json.dumps(modes, indent=2))
+    os.replace(temp, PROJECT_MODES_FILE)
+
+
+def get_remembered_mode(cwd: str) -> str:
+    """Get the mode remembered for cwd or its nearest remembered parent.
+
+    Returns:
+        TTS mode, or None if nothing was remembered
+    """
+    if not cwd:
+        return None
+    modes = _load_project_modes()
+    if not modes:
+        return None
+    path = Path(cwd).resolve()
+    for candidate in (path, *path.parents):
+        mode = modes.get(str(candidate), {}).get("mode")
+        if mode in TTS_MODES:
+            return mode
+    return None
+
+
+def remember_mode(cwd: str, mode: str, scope: str = "project") -> None:
+    """Remember a mode choice for later sessions.
+
+    Args:
+        cwd: Session working directory
+        mode: TTS mode
+        scope: "project" (the enclosing git repository) or "directory" (cwd only)
+    """
+    if not cwd or mode not in TTS_MODES:
+        return
+    key = project_root(cwd) if scope == "project" else Path(cwd).resolve()
+    modes = _load_project_modes()
+    modes[str(key)] = {"mode": mode, "updated_at": datetime.now().isoformat()}
+    _save_project_modes(modes)
+
+
+def forget_mode(cwd: str) -> bool:
+    """Forget the choice remembered for cwd (and its project).
+
+    Returns:
+        True if an entry was removed
+    """
+    modes = _load_project_modes()
+    keys = {str(Path(cwd).resolve()), str(project_root(cwd))}
+    removed = [key for key in keys if modes.pop(key, None)]
+    if removed:
+        _save_project_modes(modes)
+    return bool(removed)
+
+
 # === Session Timing Functions ===
 
 def save_session_start() -> None:
@@ -84,7 +228,7 @@ def save_session_start() -> None:
     state = get_session_state()
     state["session_start"] = datetime.now().isoformat()
     state["session_id"] = _get_current_session_id()
-    SESSION_STATE_FILE.write_text(json.dumps(state))
+    _write_state(state)
 
 
 def get_session_duration() -> timedelta:
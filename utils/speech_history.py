@@ -0,0 +1,254 @@
+"""
+Per-session spoken history with instant replay.
+
+Every spoken reply is stored as one turn of its session: the normalized
+text as spoken and the synthesized audio, captured in play_pcm() before
+post-processing, so a replay goes through the same post-processing as
+the original and needs no transcript read, normalization or provider
+call.
+
+Layout (history.dir, default ~/.cache/claude-tts/history):
+    <session>/head.json     {"next": N, "first": M}
+    <session>/<turn>.json   text, provider, voice, volume, sample rate, complete
+    <session>/<turn>.wav    16-bit mono audio
+
+Turns are numbered from 1 within a session and read by file name, so
+lookup is O(1) however long the session gets. Retention is bounded:
+each append deletes the turn that falls out of the last
+history.max_turns, and when a new session starts recording, sessions
+beyond history.max_sessions are removed (oldest first).
+
+Replay with scripts/tts-replay.py.
+
+Configuration via tts_config.json (history section):
+- enabled: Record spoken replies (default true)
+- dir: History directory (default ~/.cache/claude-tts/history)
+- max_turns: Turns kept per session (default 30)
+- max_sessions: Sessions kept (default 10)
+"""
+
+import contextvars
+import fcntl
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+DEFAULT_HISTORY_DIR = Path.home() / ".cache" / "claude-tts" / "history"
+DEFAULT_MAX_TURNS = 30
+DEFAULT_MAX_SESSIONS = 10
+
+# Recorder of the current thread or asyncio task (playback in
+# asyncio.to_thread() workers records into its caller's turn)
+_recorder = contextvars.ContextVar("claude_tts_recorder", default=None)
+
+
+def _load_history_config() -> dict:
+    """Load the history section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("history", {})
+    except Exception:
+        pass
+    return {}
+
+
+def enabled() -> bool:
+    return _load_history_config().get("enabled", True)
+
+
+def history_dir() -> Path:
+    configured = _load_history_config().get("dir")
+    return Path(configured).expanduser() if configured else DEFAULT_HISTORY_DIR
+
+
+def _session_dir(session: str) -> Path:
+    return history_dir() / (re.sub(r"[^A-Za-z0-9_.-]", "_", str(session)) or "default")
+
+
+def _turn_path(session: str, turn: int, suffix: str) -> Path:
+    return _session_dir(session) / f"{turn:06d}{suffix}"
+
+
+def _read_head(directory: Path) -> dict:
+    try:
+        return json.loads((directory / "head.json").read_text())
+    except (OSError, ValueError):
+        return {"next": 1, "first": 1}
+
+
+@contextmanager
+def _locked(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _prune_sessions(keep: Path) -> None:
+    """Remove the oldest sessions beyond history.max_sessions."""
+    max_sessions = _load_history_config().get("max_sessions", DEFAULT_MAX_SESSIONS)
+    others = [d for d in history_dir().iterdir() if d.is_dir() and d != keep]
+    others.sort(key=lambda d: d.stat().st_mtime, reverse=True)
+    for old in others[max(0, max_sessions - 1):]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def append(session: str, text: str, samples: np.ndarray, sample_rate: int, **meta) -> int:
+    """Store one spoken turn.
+
+    Args:
+        session: Session ID
+        text: Normalized text as spoken
+        samples: float32 mono samples before post-processing
+        sample_rate: Sample rate in Hz
+        **meta: provider, voice, volume, complete, ...
+
+    Returns:
+        The turn number
+    """
+    import audio_output
+
+    directory = _session_dir(session)
+    new_session = not directory.exists()
+    max_turns = max(1, _load_history_config().get("max_turns", DEFAULT_MAX_TURNS))
+    with _locked(directory):
+        head = _read_head(directory)
+        turn = head["next"]
+        audio_output.write_wav(_turn_path(session, turn, ".wav"), samples, sample_rate)
+        entry = {"turn": turn, "session": str(session), "ts": round(time.time(), 3), "text": text,
+                 "sample_rate": sample_rate, "duration": round(len(samples) / sample_rate, 3), **meta}
+        _turn_path(session, turn, ".json").write_text(json.dumps(entry))
+        head["next"] = turn + 1
+        # Usually one turn falls out of the window; never scan the directory
+        while head["first"] <= turn - max_turns:
+            _turn_path(session, head["first"], ".json").unlink(missing_ok=True)
+            _turn_path(session, head["first"], ".wav").unlink(missing_ok=True)
+            head["first"] += 1
+        temp = directory / f"head.{os.getpid()}.tmp"
+        temp.write_text(json.dumps(head))
+        os.replace(temp, directory / "head.json")
+    if new_session:
+        _prune_sessions(directory)
+    return turn
+
+
+def turn_range(session: str) -> range:
+    """Turn numbers currently stored for a session."""
+    head = _read_head(_session_dir(session))
+    return range(head["first"], head["next"])
+
+
+def resolve_turn(session: str, turn: int) -> int:
+    """Map a negative turn (-1 = last) to its number."""
+    return turn if turn > 0 else _read_head(_session_dir(session))["next"] + turn
+
+
+def get(session: str, turn: int) -> dict:
+    """Look up one turn (negative counts back from the last).
+
+    Returns:
+        The turn's metadata, or None if it is not stored
+    """
+    turn = resolve_turn(session, turn)
+    try:
+        return json.loads(_turn_path(session, turn, ".json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def load_audio(entry: dict) -> tuple:
+    """Load a turn's audio.
+
+    Returns:
+        (samples, sample_rate), or None if the audio is missing
+    """
+    import audio_output
+
+    path = _turn_path(entry["session"], entry["turn"], ".wav")
+    if not path.exists():
+        return None
+    return audio_output.read_wav(path)
+
+
+def sessions() -> list:
+    """Session IDs with history, most recently used first."""
+    root = history_dir()
+    if not root.exists():
+        return []
+    dirs = [d for d in root.iterdir() if (d / "head.json").exists()]
+    dirs.sort(key=lambda d: (d / "head.json").stat().st_mtime, reverse=True)
+    return [d.name for d in dirs]
+
+
+class _Recorder:
+    def __init__(self):
+        self.chunks = []
+        self.volume = None
+
+
+@contextmanager
+def recording(text: str, session: str = None, **meta):
+    """Record the audio played on this thread (or task) as the session's next turn.
+
+    Args:
+        text: Normalized text being spoken
+        session: Session ID (default: current session)
+        **meta: provider, voice, ... stored with the turn
+    """
+    if not enabled():
+        yield
+        return
+    if session is None:
+        from session_state import _get_current_session_id
+        session = _get_current_session_id()
+    recorder = _Recorder()
+    previous = _recorder.get()
+    _recorder.set(recorder)
+    try:
+        yield
+    finally:
+        _recorder.set(previous)
+        if recorder.chunks:
+            try:
+                _save(session, text, recorder, meta)
+            except Exception as e:
+                print(f"Could not save speech history: {e}", file=sys.stderr)
+
+
+def capture(samples: np.ndarray, sample_rate: int, volume: float) -> None:
+    """Keep a copy of a chunk about to be played (no-op outside recording())."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return
+    recorder.chunks.append((samples.copy(), sample_rate))
+    if recorder.volume is None:
+        recorder.volume = volume
+
+
+def _save(session: str, text: str, recorder: _Recorder, meta: dict) -> None:
+    import audio_mixer
+    import playback_registry
+
+    sample_rate = recorder.chunks[0][1]
+    samples = np.concatenate([audio_mixer.resample(chunk, rate, sample_rate)
+                              for chunk, rate in recorder.chunks])
+    # A reply cut off by barge-in keeps the audio rendered up to that point
+    complete = not playback_registry.cancelled()
+    append(session, text, samples, sample_rate, volume=recorder.volume, complete=complete, **meta)
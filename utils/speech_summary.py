@@ -0,0 +1,193 @@
+"""
+Summary speech mode: speak the gist of a long reply.
+
+With hooks.stop.speech_mode set to "summary", the Stop hook speaks only
+the parts of a long reply a listener needs, picked by heuristics (no
+model), in this order of priority:
+1. the opening paragraph
+2. the closing paragraph
+3. sentences and list items reporting an outcome ("fixed", "added",
+   "failed", ...)
+4. headings, spoken only before something picked from their section
+
+Code blocks, tables and quotes are never picked. Candidates are taken
+by priority until hooks.stop.summary_max_chars is reached and spoken in
+reply order; replies that already fit are spoken in full. A heading
+counts against the budget only if it is spoken. If nothing but
+headings qualifies, the first list items are spoken instead, or else
+the start of the reply.
+
+Selection is deterministic and linear in the reply length: one pass
+over the lines, then one split and one regex search per paragraph, all
+with patterns anchored like the normalizer's. It costs far less than
+synthesizing the text it drops (see scripts/test-normalizer-perf.py).
+"""
+
+import re
+
+
+DEFAULT_MAX_CHARS = 500
+# Sentences kept from the opening and closing paragraphs
+EDGE_SENTENCES = 2
+
+OUTCOME_WORDS = (
+    "added", "adds", "broke", "broken", "built", "changed", "committed", "created",
+    "deleted", "deployed", "failed", "failing", "fails", "fixed", "fixes", "implemented",
+    "installed", "merged", "moved", "passed", "passes", "passing", "pushed", "refactored",
+    "released", "removed", "renamed", "replaced", "resolved", "reverted", "skipped",
+    "succeeded", "updated", "upgraded",
+)
+
+PRIORITY_OPENING = 0
+PRIORITY_CLOSING = 1
+PRIORITY_OUTCOME = 2
+PRIORITY_HEADING = 3
+
+# Compiled once; each match is anchored at its first character
+_FENCE = re.compile(r'(?:```|~~~)')
+_HEADING = re.compile(r'#{1,6}\s+')
+_LIST_ITEM = re.compile(r'(?:[-*+]|\d{1,3}[.)])\s+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_OUTCOME = re.compile(r'\b(?:' + '|'.join(OUTCOME_WORDS) + r')\b', re.IGNORECASE)
+
+
+def _blocks(text: str) -> list:
+    """Split a markdown reply into speakable blocks.
+
+    Returns:
+        (kind, text) pairs in reply order; kind is paragraph, item or heading
+    """
+    blocks = []
+    paragraph = []
+    in_fence = False
+    for line in text.split("\n"):
+        line = line.strip()
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif in_fence:
+            continue
+        elif line and not line.startswith(("|", ">")):
+            heading = _HEADING.match(line)
+            item = None if heading else _LIST_ITEM.match(line)
+            if heading is None and item is None:
+                paragraph.append(line)
+                continue
+            if paragraph:
+                blocks.append(("paragraph", " ".join(paragraph)))
+                paragraph = []
+            if heading:
+                blocks.append(("heading", line[heading.end():].strip("#* ")))
+            else:
+                blocks.append(("item", line[item.end():]))
+            continue
+        # Blank line, fence, table row or quote ends the paragraph
+        if paragraph:
+            blocks.append(("paragraph", " ".join(paragraph)))
+            paragraph = []
+    if paragraph:
+        blocks.append(("paragraph", " ".join(paragraph)))
+    return blocks
+
+
+def _candidates(blocks: list) -> list:
+    """(priority, block, sentence, text) for every sentence worth speaking."""
+    paragraphs = [i for i, (kind, _) in enumerate(blocks) if kind == "paragraph"]
+    opening = paragraphs[0] if paragraphs else None
+    closing = paragraphs[-1] if len(paragraphs) > 1 else None
+    candidates = []
+    for i, (kind, body) in enumerate(blocks):
+        if kind == "heading":
+            if body:
+                candidates.append((PRIORITY_HEADING, i, 0, body if body[-1] in ".!?:" else body + "."))
+            continue
+        for j, sentence in enumerate(_SENTENCE_END.split(body)):
+            if i == opening and j < EDGE_SENTENCES:
+                candidates.append((PRIORITY_OPENING, i, j, sentence))
+            elif i == closing and j < EDGE_SENTENCES:
+                candidates.append((PRIORITY_CLOSING, i, j, sentence))
+            elif _OUTCOME.search(sentence):
+                candidates.append((PRIORITY_OUTCOME, i, j, sentence))
+    return candidates
+
+
+def _cut(text: str, max_chars: int) -> str:
+    """Cut text to max_chars at a word boundary."""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars]
+
+
+def _section_chosen(blocks: list, heading: int, chosen: list) -> bool:
+    """Check whether anything under a heading (up to the next one) was picked."""
+    end = next((i for i in range(heading + 1, len(blocks)) if blocks[i][0] == "heading"), len(blocks))
+    return any(heading < block < end for block, _, _ in chosen)
+
+
+def _fallback(text: str, blocks: list, max_chars: int) -> str:
+    """The first list items that fit, or the start of the reply."""
+    lines = []
+    used = 0
+    for kind, body in blocks:
+        if kind != "item":
+            continue
+        if used + len(body) > max_chars:
+            if lines:
+                break
+            body = _cut(body, max_chars)
+        lines.append(body)
+        used += len(body) + 1
+    return "\n".join(lines) if lines else _cut(text.strip(), max_chars)
+
+
+def summarize(text: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    """Pick the speakable gist of a reply.
+
+    Args:
+        text: Raw reply text (markdown), before clean_text_for_speech()
+        max_chars: Longest summary; replies this short are returned as is
+
+    Returns:
+        Summary as markdown, blocks on separate lines (the reply itself if
+        it fits or nothing in it qualifies)
+    """
+    if len(text) <= max_chars:
+        return text
+    blocks = _blocks(text)
+    candidates = sorted(_candidates(blocks))
+    if not candidates:
+        return text
+
+    chosen = []
+    used = 0
+    for priority, block, index, sentence in candidates:
+        if priority == PRIORITY_HEADING:
+            # Lowest priority, so its section is settled by now
+            if not _section_chosen(blocks, block, chosen) or used + len(sentence) > max_chars:
+                continue
+        elif used + len(sentence) > max_chars:
+            if chosen:
+                continue
+            # Always say something: the opening, cut at a word boundary
+            sentence = _cut(sentence, max_chars)
+        chosen.append((block, index, sentence))
+        used += len(sentence) + 1
+    if not chosen:
+        return _fallback(text, blocks, max_chars)
+
+    lines = []
+    last_block = None
+    heading = None
+    for block, _, sentence in sorted(chosen):
+        if blocks[block][0] == "heading":
+            heading = sentence
+            continue
+        if heading is not None:
+            lines.append(heading)
+            heading = None
+        if block == last_block:
+            lines[-1] += " " + sentence
+        else:
+            lines.append(sentence)
+        last_block = block
+    return "\n".join(lines)
@@ -0,0 +1,306 @@
+"""
+Text normalization for speech.
+
+Converts Claude's markdown replies into speakable text: code blocks are
+announced instead of read, paths and URLs are shortened, numbers and
+units are expanded and markdown syntax is stripped.
+
+Every pattern runs in linear time. Patterns that start with a repeatable
+token are anchored with a lookbehind so the regex engine only tries them
+at the start of a run, and character classes stop at the next delimiter,
+so asterisk runs, long whitespace, huge table lines or minified blobs
+cannot trigger quadratic backtracking. On top of that, input is capped
+per line (normalizer.max_line_chars) and in total
+(normalizer.max_chars), truncating at a word boundary.
+"""
+
+import json
+import re
+from pathlib import Path
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+DEFAULT_MAX_LINE_CHARS = 2000
+DEFAULT_MAX_CHARS = 20000
+# Characters per chunk when speech is synthesized piecewise
+DEFAULT_CHUNK_CHARS = 200
+TRUNCATED = " and so on."
+
+# Largest number spelled out; bigger values are left as digits
+MAX_SPOKEN_NUMBER = 999_999_999
+
+ONES = ["", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+        "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+        "seventeen", "eighteen", "nineteen"]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+# Compiled once; see the module docstring for why each is linear
+_FILE_EXT = re.compile(r'\.([a-zA-Z]{1,5})\b')
+_DECIMAL = re.compile(r'(?<!\d)(\d+)\.(\d+)')
+_HOME = re.compile(r'~/')
+_SLASH = re.compile(r'([a-zA-Z0-9])/([a-zA-Z0-9])')
+_HIDDEN_FILE = re.compile(r'(?<![a-zA-Z0-9])\.([a-zA-Z])')
+_HYPHEN = re.compile(r'([a-zA-Z0-9])-([a-zA-Z0-9])')
+# The second alternative catches a symbol whose leading space an earlier match consumed
+_DASH = re.compile(r'(?<!\s)\s*[—–]\s*|[—–]\s*')
+_ARROW = re.compile(r'(?<!\s)\s*→\s*|→\s*')
+_ASCII_ARROW = re.compile(r'(?<!\s)\s*->\s*|->\s*')
+_SIZES = [
+    (re.compile(rf'\b(\d+(?:\s+point\s+\d+)?)\s*{unit}\b', re.IGNORECASE), word)
+    for unit, word in (("KB", "kilobytes"), ("MB", "megabytes"), ("GB", "gigabytes"), ("TB", "terabytes"))
+]
+_GROUPED_NUMBER = re.compile(r'\b\d{1,3}(?:,\d{3})+\b')
+# An unterminated fence runs to the end of the text, as in markdown
+_CODE_BLOCK = re.compile(r'```[\s\S]*?(?:```|\Z)')
+_INLINE_CODE = re.compile(r'`([^`]+)`')
+_PATH = re.compile(r'/[a-zA-Z0-9\-_.\/]+(?:\.[a-z]+)?')
+_URL = re.compile(r'https?://\S+')
+_EMPHASIS = re.compile(r'(?<!\*)\*+([^*]+)\*+')
+_HEADER = re.compile(r'^#+\s*', re.MULTILINE)
+_LINK = re.compile(r'\[([^\[\]]+)\]\([^()]+\)')
+_LIST_MARKER = re.compile(r'^[ \t]*[-*]\s+', re.MULTILINE)
+_TABLE_ROW = re.compile(r'\|[^\n]+\|')
+_TABLE_RULE = re.compile(r'(?<![-|])[-|]+\n')
+_SPACES = re.compile(r' +')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?;:])\s+|\n+')
+
+
+def _load_normalizer_config() -> dict:
+    """Load the normalizer section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("normalizer", {})
+    except Exception:
+        pass
+    return {}
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to at most limit chars, preferring a word boundary."""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", limit * 3 // 4, limit)
+    return text[:cut if cut > 0 else limit].rstrip() + TRUNCATED
+
+
+def cap_input(text: str, max_line_chars: int = None, max_chars: int = None) -> str:
+    """Bound input size per line and in total.
+
+    Args:
+        text: Raw reply text
+        max_line_chars: Longest line kept (default from config)
+        max_chars: Longest text kept (default from config)
+
+    Returns:
+        Text with over-long lines and the overall length truncated
+    """
+    if max_line_chars is None or max_chars is None:
+        config = _load_normalizer_config()
+        if max_line_chars is None:
+            max_line_chars = config.get("max_line_chars", DEFAULT_MAX_LINE_CHARS)
+        if max_chars is None:
+            max_chars = config.get("max_chars", DEFAULT_MAX_CHARS)
+
+    if len(text) > max_chars:
+        # Drop whole lines past the limit where possible
+        cut = text.rfind("\n", 0, max_chars)
+        text = text[:cut] if cut > max_chars // 2 else _truncate(text, max_chars)
+
+    if len(text) > max_line_chars:
+        text = "\n".join(
+            _truncate(line, max_line_chars) if len(line) > max_line_chars else line
+            for line in text.split("\n")
+        )
+    return text
+
+
+def _shorten_path(match: re.Match) -> str:
+    """Convert file path to speakable short form.
+
+    /Users/nick/.claude/hooks/tts_config.json
+    -> "tts config dot json in the hooks folder"
+    """
+    path = match.group(0)
+    parts = [p for p in path.split('/') if p]
+    if len(parts) >= 2:
+        filename = parts[-1]
+        folder = parts[-2]
+        # Make extension speakable
+        filename = re.sub(r'\.([a-z]+)$', r' dot \1', filename)
+        # Replace underscores and hyphens with spaces
+        filename = filename.replace('_', ' ').replace('-', ' ')
+        folder = folder.replace('_', ' ').replace('-', ' ')
+        return f"{filename} in the {folder} folder"
+    elif len(parts) == 1:
+        filename = parts[0]
+        filename = re.sub(r'\.([a-z]+)$', r' dot \1', filename)
+        return filename.replace('_', ' ').replace('-', ' ')
+    return ""
+
+
+def _shorten_url(match: re.Match) -> str:
+    """Convert URL to speakable short form.
+
+    https://github.com/anthropics/claude-code/issues
+    -> "github dot com"
+    """
+    url = match.group(0)
+    domain_match = re.search(r'https?://([^/]+)', url)
+    if domain_match:
+        domain = domain_match.group(1)
+        domain = re.sub(r'^www\.', '', domain)
+        # Make dots speakable
+        domain = domain.replace('.', ' dot ')
+        return domain
+    return "a link"
+
+
+def _clean_inline_code(match: re.Match) -> str:
+    """Clean inline code for speech."""
+    code = match.group(1)
+    return code.replace('_', ' ')
+
+
+def _under_hundred(n: int) -> str:
+    if n < 20:
+        return ONES[n]
+    return TENS[n // 10] + (" " + ONES[n % 10] if n % 10 else "")
+
+
+def _under_thousand(n: int) -> str:
+    if n < 100:
+        return _under_hundred(n)
+    return ONES[n // 100] + " hundred" + (" and " + _under_hundred(n % 100) if n % 100 else "")
+
+
+def _number_to_words(match: re.Match) -> str:
+    """Convert a comma-separated number to words."""
+    num_str = match.group(0).replace(',', '')
+    if len(num_str) > len(str(MAX_SPOKEN_NUMBER)):
+        return match.group(0)
+    num = int(num_str)
+    if num == 0:
+        return "zero"
+    if num > MAX_SPOKEN_NUMBER:
+        return match.group(0)
+
+    parts = []
+    if num >= 1000000:
+        parts.append(_under_thousand(num // 1000000) + " million")
+        num %= 1000000
+    if num >= 1000:
+        parts.append(_under_thousand(num // 1000) + " thousand")
+        num %= 1000
+    if num > 0:
+        if parts and num < 100:
+            parts.append("and " + _under_hundred(num))
+        else:
+            parts.append(_under_thousand(num))
+
+    return " ".join(parts)
+
+
+def clean_text_for_speech(text: str, max_line_chars: int = None, max_chars: int = None) -> str:
+    """Clean text for natural speech output.
+
+    Converts technical elements to speakable form. Fenced code is
+    replaced before the input is capped, so a cut never splits a block
+    into speakable code and its budget goes to prose. Runs in time
+    linear in the input size (one pass for fences, the rest capped).
+
+    Args:
+        text: Raw reply text (markdown)
+        max_line_chars: Longest line kept (default from config)
+        max_chars: Longest text kept (default from config)
+
+    Returns:
+        Speakable text
+    """
+    # Replace code blocks with announcement
+    text = _CODE_BLOCK.sub(' Code block omitted. ', text)
+    text = cap_input(text, max_line_chars, max_chars)
+
+    # Convert file extensions to speakable form
+    text = _FILE_EXT.sub(r' dot \1', text)
+
+    # Make decimal numbers speakable
+    text = _DECIMAL.sub(r'\1 point \2', text)
+
+    # Convert tilde to "home" for home directory paths
+    text = _HOME.sub('home slash ', text)
+
+    # Convert path slashes to spaces
+    text = _SLASH.sub(r'\1 \2', text)
+
+    # Convert leading dots to "dot " for hidden files
+    text = _HIDDEN_FILE.sub(r'dot \1', text)
+
+    # Convert hyphens in names to spaces
+    text = _HYPHEN.sub(r'\1 \2', text)
+
+    # Convert em/en dashes to commas
+    text = _DASH.sub(', ', text)
+
+    # Convert arrows to "to"
+    text = _ARROW.sub(' to ', text)
+    text = _ASCII_ARROW.sub(' to ', text)
+
+    # Expand data size abbreviations
+    for pattern, word in _SIZES:
+        text = pattern.sub(rf'\1 {word}', text)
+
+    # Convert comma-separated numbers to words
+    text = _GROUPED_NUMBER.sub(_number_to_words, text)
+
+    # Clean inline code
+    text = _INLINE_CODE.sub(_clean_inline_code, text)
+    # Replace file paths with shortened speakable form
+    text = _PATH.sub(_shorten_path, text)
+    # Replace URLs with shortened speakable form
+    text = _URL.sub(_shorten_url, text)
+    # Remove markdown bold/italic but keep text
+    text = _EMPHASIS.sub(r'\1', text)
+    # Remove markdown headers
+    text = _HEADER.sub('', text)
+    # Remove markdown links but keep text
+    text = _LINK.sub(r'\1', text)
+    # Remove list dashes at start of lines
+    text = _LIST_MARKER.sub('', text)
+    # Remove table formatting
+    text = _TABLE_ROW.sub('', text)
+    text = _TABLE_RULE.sub('', text)
+    # Clean up multiple spaces
+    text = _SPACES.sub(' ', text)
+    # Clean up multiple newlines
+    text = _BLANK_LINES.sub('\n', text)
+
+    return text.strip()
+
+
+def split_sentences(text: str) -> list:
+    """Split speakable text into sentences (at .!?;: followed by space, or newlines)."""
+    return [s for s in _SENTENCE_BREAK.split(text) if s.strip()]
+
+
+def sentence_chunks(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> list:
+    """Group whole sentences into chunks of about max_chars characters.
+
+    Used to synthesize and schedule long replies piecewise (the daemon,
+    the async providers); a single sentence longer than max_chars stays
+    one chunk.
+    """
+    chunks = []
+    current = ""
+    for sentence in split_sentences(text):
+        sentence = sentence.strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,432 @@
+"""
+Live transcript watcher: speak reply text as soon as it is written.
+
+The Stop hook only fires once the whole turn is done, although Claude's
+text blocks land in the session transcript (JSONL) as they finish. With
+watcher.enabled, UserPromptSubmit starts one watcher process per
+session that tails the transcript from where it was at that prompt and
+speaks every finished assistant text block right away, through the
+daemon or the async pipeline (tts_router.speak_async). Stop then only
+flushes: it waits until the watcher has taken everything written so far.
+
+No text is spoken twice: the transcript offset read so far is kept per
+session in a small JSON file guarded by flock, and whoever advances it
+(the watcher, or Stop if the watcher is not keeping up) owns the lines
+it passed. Only complete lines are read; a half-written line waits for
+the next read. A new user prompt in the transcript drops blocks still
+waiting to be spoken, and barge-in cuts off the one being spoken.
+
+The transcript is watched with inotify on Linux and kqueue on macOS,
+else polled by size every watcher.poll_ms. The watcher exits when the
+Claude Code process that ran the hook is gone, or after
+watcher.idle_exit_minutes without new transcript lines.
+
+Configuration via tts_config.json (watcher section):
+- enabled: Speak replies while they are written (default false)
+- poll_ms: Polling interval without inotify/kqueue (default 100)
+- idle_exit_minutes: Exit after this long without new lines (default 30)
+- flush_timeout_ms: How long Stop waits for the watcher (default 2000)
+
+CLAUDE_TTS_WATCH_DIR overrides the state directory.
+
+Usage:
+    python3 transcript_watcher.py watch --session ID --transcript PATH --owner PID
+"""
+
+import asyncio
+import ctypes
+import fcntl
+import json
+import os
+import re
+import select
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import playback_registry
+import tts_metrics
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+WATCH_DIR = Path(os.environ.get("CLAUDE_TTS_WATCH_DIR", f"/tmp/claude-tts-watch-{os.getuid()}"))
+DEFAULT_POLL_MS = 100
+DEFAULT_IDLE_EXIT_MINUTES = 30
+DEFAULT_FLUSH_TIMEOUT_MS = 2000
+# With file events, the session owner and idle time are still checked this often
+CHECK_INTERVAL = 1.0
+# Processes between Claude Code and the hook (hook commands run via a shell or uv)
+WRAPPERS = {"sh", "bash", "zsh", "dash", "fish", "env", "uv", "uvx"}
+
+# sys/inotify.h
+IN_MODIFY = 0x002
+IN_MOVE_SELF = 0x800
+IN_DELETE_SELF = 0x400
+
+
+def _load_watcher_config() -> dict:
+    """Load the watcher section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("watcher", {})
+    except Exception:
+        pass
+    return {}
+
+
+def enabled() -> bool:
+    """Check whether replies are spoken by the watcher."""
+    return _load_watcher_config().get("enabled", False)
+
+
+def _paths(session: str) -> tuple:
+    """(state file, lock held by the running watcher) for a session."""
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", session)
+    return WATCH_DIR / f"{name}.json", WATCH_DIR / f"{name}.lock"
+
+
+@contextmanager
+def _locked_state(session: str):
+    """Yield the session's watcher state under an exclusive lock, then save it."""
+    path, _ = _paths(session)
+    WATCH_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    path.touch(mode=0o600, exist_ok=True)
+    with open(path, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _entry_event(entry: dict):
+    """("text", text) for assistant text, ("prompt", "") for a user prompt, else None."""
+    message = entry.get("message")
+    content = message.get("content", []) if isinstance(message, dict) else []
+    if isinstance(content, str):
+        content = [content]
+    texts = []
+    for block in content:
+        if isinstance(block, dict) and block.get("type") == "text":
+            texts.append(block.get("text", ""))
+        elif isinstance(block, str):
+            texts.append(block)
+    if entry.get("type") == "user" and texts:
+        # Tool results are user entries too, but carry no text
+        return "prompt", ""
+    if entry.get("type") == "assistant" and any(text.strip() for text in texts):
+        return "text", "\n".join(texts)
+    return None
+
+
+def claim(session: str, transcript: str):
+    """Take the complete lines written since the last claim.
+
+    Returns:
+        ("text", text) and ("prompt", "") events in transcript order, or
+        None if no watcher was ever started for this session and transcript
+    """
+    with _locked_state(session) as state:
+        if state.get("transcript") != transcript:
+            return None
+        offset = state.get("offset", 0)
+        if _size(transcript) < offset:
+            # Rewritten in place: never go back over what was already read
+            state["offset"] = _size(transcript)
+            return []
+        try:
+            with open(transcript, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return []
+        end = data.rfind(b"\n") + 1
+        state["offset"] = offset + end
+    events = []
+    for line in data[:end].splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        event = _entry_event(entry) if isinstance(entry, dict) else None
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def running(session: str) -> bool:
+    """Check whether a watcher holds the session's lock."""
+    _, lock_path = _paths(session)
+    try:
+        with open(lock_path, "r") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        return False
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True
+
+
+def _parent(pid: int) -> tuple:
+    """(parent pid, command name) of a process, or (0, "")."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        return int(stat[stat.rindex(")") + 2:].split()[1]), stat[stat.index("(") + 1:stat.rindex(")")]
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        out = subprocess.run(["ps", "-o", "ppid=,comm=", "-p", str(pid)],
+                             capture_output=True, text=True, timeout=1).stdout.split(None, 1)
+        return int(out[0]), os.path.basename(out[1].strip())
+    except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+        return 0, ""
+
+
+def session_owner() -> int:
+    """PID of the process that ran this hook (Claude Code), past any wrapping shell or uv."""
+    pid = os.getppid()
+    ppid, name = _parent(pid)
+    while name in WRAPPERS and ppid > 1:
+        pid = ppid
+        ppid, name = _parent(pid)
+    return pid
+
+
+def ensure_running(session: str, transcript: str) -> bool:
+    """Start the session's watcher unless it is already running (UserPromptSubmit).
+
+    A new transcript is read from its current end, so earlier turns are
+    not spoken again.
+
+    Returns:
+        True if a watcher is running or was started
+    """
+    if not enabled() or not session or not transcript:
+        return False
+    transcript = os.path.expanduser(transcript)
+    with _locked_state(session) as state:
+        if state.get("transcript") != transcript:
+            state.clear()
+            state.update(transcript=transcript, offset=_size(transcript))
+        if running(session):
+            return True
+        state["owner"] = session_owner()
+    cmd = [sys.executable, str(Path(__file__).resolve()), "watch", "--session", session,
+           "--transcript", transcript, "--owner", str(state["owner"])]
+    try:
+        with open(WATCH_DIR / "watcher.log", "a") as log:
+            subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                             start_new_session=True, close_fds=True)
+        return True
+    except OSError as e:
+        print(f"Failed to start transcript watcher: {e}", file=sys.stderr)
+        return False
+
+
+def finish(session: str, transcript: str, timeout: float = None) -> bool:
+    """Wait for the watcher to take everything written so far (Stop).
+
+    Args:
+        session: Session ID
+        transcript: Transcript path from the hook payload
+        timeout: Seconds to wait (default watcher.flush_timeout_ms)
+
+    Returns:
+        True if the watcher has it; False if it is not running or fell
+        behind, and the caller should claim() and speak the rest itself
+    """
+    if not running(session):
+        return False
+    if timeout is None:
+        timeout = _load_watcher_config().get("flush_timeout_ms", DEFAULT_FLUSH_TIMEOUT_MS) / 1000
+    end = _size(transcript)
+    deadline = time.monotonic() + timeout
+    while True:
+        with _locked_state(session) as state:
+            if state.get("transcript") == transcript and state.get("offset", 0) >= end:
+                return True
+        if time.monotonic() > deadline or not running(session):
+            return False
+        time.sleep(playback_registry.POLL_INTERVAL)
+
+
+class _Changes:
+    """Wakes up when the transcript is written: inotify on Linux, kqueue
+    on macOS, else after the polling interval."""
+
+    def __init__(self, path: str, poll: float):
+        self.path = path
+        self.poll = poll
+        self.fd = None
+        self.kqueue = None
+        self.file = None
+
+    def _watch(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+                if fd >= 0 and libc.inotify_add_watch(
+                        fd, os.fsencode(self.path), IN_MODIFY | IN_MOVE_SELF | IN_DELETE_SELF) >= 0:
+                    self.fd = fd
+                elif fd >= 0:
+                    os.close(fd)
+            except (OSError, AttributeError):
+                pass
+        elif hasattr(select, "kqueue"):
+            try:
+                self.file = open(self.path, "rb")
+                self.kqueue = select.kqueue()
+            except OSError:
+                self.file = self.kqueue = None
+
+    def wait(self) -> None:
+        """Block until the file may have changed (at most CHECK_INTERVAL)."""
+        if self.fd is None and self.kqueue is None:
+            self._watch()
+        if self.fd is not None:
+            if select.select([self.fd], [], [], CHECK_INTERVAL)[0]:
+                try:
+                    os.read(self.fd, 4096)
+                except BlockingIOError:
+                    pass
+        elif self.kqueue is not None:
+            event = select.kevent(self.file.fileno(), filter=select.KQ_FILTER_VNODE,
+                                  flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                                  fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND | select.KQ_NOTE_DELETE)
+            self.kqueue.control([event], 1, CHECK_INTERVAL)
+        else:
+            time.sleep(self.poll)
+
+
+async def _speak(text: str, session: str) -> None:
+    """Normalize and speak one text block like the Stop hook would.
+
+    Blocks are spoken in full: summary mode needs the whole reply, which
+    the watcher never has at once.
+    """
+    import speech_history
+    import tts_daemon
+    import tts_router
+    from session_state import get_tts_mode
+    from text_normalizer import clean_text_for_speech
+
+    mode = get_tts_mode()
+    if mode == "off":
+        return
+    with tts_metrics.timed("text_clean") as stage:
+        text = clean_text_for_speech(text)
+        stage["text_len"] = len(text)
+    if not text:
+        return
+    if await asyncio.to_thread(tts_daemon.speak, "assistant", text, mode, "watcher") is not None:
+        return
+    with speech_history.recording(text, session=session, provider=mode):
+        await tts_router.speak_async("assistant", text, mode, session=session)
+
+
+async def _speaker(pending: asyncio.Queue, session: str) -> None:
+    while True:
+        text = await pending.get()
+        try:
+            await _speak(text, session)
+        except Exception as e:
+            print(f"Watcher could not speak: {e}", file=sys.stderr)
+
+
+async def _watch(session: str, transcript: str, owner: int) -> None:
+    config = _load_watcher_config()
+    idle_exit = config.get("idle_exit_minutes", DEFAULT_IDLE_EXIT_MINUTES) * 60
+    changes = _Changes(transcript, config.get("poll_ms", DEFAULT_POLL_MS) / 1000)
+    pending = asyncio.Queue()
+    speaker = asyncio.create_task(_speaker(pending, session))
+    last_line = time.monotonic()
+    try:
+        while True:
+            start = time.perf_counter()
+            events = claim(session, transcript)
+            if events is None:
+                print("Transcript changed hands, exiting", file=sys.stderr)
+                return
+            if events:
+                last_line = time.monotonic()
+            blocks = [text for kind, text in events if kind == "text"]
+            if blocks:
+                tts_metrics.record("watch_claim", (time.perf_counter() - start) * 1000,
+                                   blocks=len(blocks), text_len=sum(len(text) for text in blocks))
+            for kind, text in events:
+                if kind == "prompt":
+                    # A new turn: whatever is still queued is stale
+                    while not pending.empty():
+                        pending.get_nowait()
+                else:
+                    pending.put_nowait(text)
+            if not playback_registry._pid_alive(owner):
+                print(f"Session owner {owner} exited", file=sys.stderr)
+                return
+            if time.monotonic() - last_line > idle_exit:
+                print(f"No transcript lines for {idle_exit:.0f}s, exiting", file=sys.stderr)
+                return
+            await asyncio.to_thread(changes.wait)
+    finally:
+        playback_registry.cancel_local(session, "stop")
+        speaker.cancel()
+        await asyncio.wait([speaker])
+
+
+def watch(session: str, transcript: str, owner: int) -> None:
+    """Run the session's watcher until its owner exits or it goes idle (one per session)."""
+    _, lock_path = _paths(session)
+    WATCH_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    lock_file = open(lock_path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return  # Another watcher has this session
+
+    from session_state import set_session_id
+    set_session_id(session)
+    tts_metrics.set_context(hook="watcher", session=session)
+    print(f"Watcher {os.getpid()} for session {session}: {transcript}", file=sys.stderr, flush=True)
+    try:
+        asyncio.run(_watch(session, transcript, owner))
+    finally:
+        lock_file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Speak Claude's replies as they are written")
+    parser.add_argument("command", choices=["watch"])
+    parser.add_argument("--session", required=True)
+    parser.add_argument("--transcript", required=True)
+    parser.add_argument("--owner", type=int, required=True, help="Exit when this process does")
+    args = parser.parse_args()
+    watch(args.session, args.transcript, args.owner)
@@ -0,0 +1,785 @@
+"""
+Long-lived synthesis daemon shared by all sessions.
+
+Hooks are short-lived processes, so every Stop hook would otherwise pay
+for loading Kokoro (or a fresh TLS handshake) before the first word.
+The daemon keeps the model, espeak and provider connections warm and
+speaks on behalf of the hooks over a Unix socket.
+
+Lifecycle:
+- UserPromptSubmit calls warmup(mode) while Claude is thinking. If the
+  daemon is down it is spawned detached; otherwise it is asked to warm
+  the mode's provider. Warm-up is idempotent and rate-limited.
+- Stop (and acknowledgments) call speak(); None means "not handled",
+  and the hook synthesizes in-process as before.
+- Kokoro replies are synthesized in chunks of whole sentences on a
+  worker thread (one chunk ahead) and each chunk is played in its own
+  turn on the audio device. Turns go to system phrases first, then
+  round-robin across sessions, so a long reply in one session yields to
+  other sessions between chunks. With the audio mixer running
+  (audio_mixer), system phrases skip the queue and are mixed over the
+  current reply, which is ducked under them. At most daemon.max_concurrent_inferences
+  ONNX inferences run at once. If the model batches (kokoro_batch),
+  chunks that are ready at the same time share one inference call.
+- The daemon exits after daemon.idle_exit_minutes without requests.
+- Kokoro is unloaded after daemon.model_idle_minutes without Kokoro
+  requests and reloaded transparently by the next one. Above
+  daemon.max_rss_mb, RAM caches are dropped first, then the model.
+
+Protocol: one JSON object per line each way.
+    {"op": "ping" | "warmup" | "speak" | "cancel" | "stats" | "shutdown", ...}
+
+"cancel" is the barge-in path (playback_registry): it ends the session's
+current utterance and drops its speak requests still queued before it.
+
+Configuration via tts_config.json (daemon section), or CLAUDE_TTS_DAEMON=0
+to disable. CLAUDE_TTS_DAEMON_SOCKET overrides the socket path.
+
+Usage:
+    python3 tts_daemon.py serve [--warmup kokoro]
+    python3 tts_daemon.py ping|stats|stop
+"""
+
+import fcntl
+import gc
+import json
+import os
+import queue
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+SOCKET_PATH = Path(os.environ.get("CLAUDE_TTS_DAEMON_SOCKET", f"/tmp/claude-tts-daemon-{os.getuid()}.sock"))
+LOCK_PATH = SOCKET_PATH.with_suffix(".lock")
+LOG_PATH = Path("/tmp/claude-tts-daemon.log")
+WARMUP_STAMP = Path.home() / ".cache" / "claude-tts" / "warmup.json"
+
+DEFAULT_IDLE_EXIT_MINUTES = 60
+DEFAULT_WARMUP_INTERVAL = 30
+DEFAULT_PHRASE_CACHE_SIZE = 64
+DEFAULT_MODEL_IDLE_MINUTES = 15
+DEFAULT_MAX_RSS_MB = 1024
+DEFAULT_MAX_CONCURRENT_INFERENCES = 1
+DEFAULT_CHUNK_CHARS = 200
+# Cloud connections are re-opened after this long; servers drop idle ones
+CONNECTION_KEEPALIVE = 60
+CONNECT_TIMEOUT = 0.2
+SPEAK_TIMEOUT = 600
+
+
+def _load_daemon_config() -> dict:
+    """Load the daemon section from tts_config.json."""
+    try:
+        config_path = HOOKS_DIR / "tts_config.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                return json.load(f).get("daemon", {})
+    except Exception:
+        pass
+    return {}
+
+
+def enabled() -> bool:
+    """Check whether hooks should use the daemon."""
+    if os.environ.get("CLAUDE_TTS_DAEMON") == "0":
+        return False
+    return _load_daemon_config().get("enabled", True)
+
+
+def _session_id() -> str:
+    try:
+        from session_state import _get_current_session_id
+        return _get_current_session_id()
+    except Exception:
+        return ""
+
+
+# === Client ===
+
+def request(op: str, timeout: float = CONNECT_TIMEOUT, wait: bool = True, **fields):
+    """Send one request to the daemon.
+
+    Args:
+        op: Operation (ping, warmup, speak, cancel, stats, shutdown)
+        timeout: Seconds to wait for the reply
+        wait: Read the reply; False sends and returns immediately
+        **fields: Request fields
+
+    Returns:
+        Reply dict ({} if not waiting), or None if the daemon is not reachable
+    """
+    fields["op"] = op
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(SOCKET_PATH))
+            sock.sendall(json.dumps(fields).encode() + b"\n")
+            if not wait:
+                return {}
+            sock.settimeout(timeout)
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+
+def is_running() -> bool:
+    """Check whether a daemon answers on the socket."""
+    return request("ping") is not None
+
+
+def spawn(warmup_mode: str = None) -> bool:
+    """Start the daemon detached from the calling hook.
+
+    A second daemon started concurrently exits on the lock, so racing
+    sessions are harmless.
+    """
+    cmd = [sys.executable, str(Path(__file__).resolve()), "serve"]
+    if warmup_mode:
+        cmd += ["--warmup", warmup_mode]
+    try:
+        with open(LOG_PATH, "a") as log:
+            subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                             start_new_session=True, close_fds=True)
+        return True
+    except OSError as e:
+        print(f"Failed to start TTS daemon: {e}", file=sys.stderr)
+        return False
+
+
+def _warmup_due(mode: str, interval: float) -> bool:
+    """Rate-limit warm-ups per mode across all hook processes."""
+    now = time.time()
+    try:
+        stamps = json.loads(WARMUP_STAMP.read_text())
+    except (OSError, ValueError):
+        stamps = {}
+    if now - stamps.get(mode, 0) < interval:
+        return False
+    stamps[mode] = now
+    try:
+        WARMUP_STAMP.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=WARMUP_STAMP.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(stamps, f)
+        os.replace(temp_path, WARMUP_STAMP)
+    except OSError:
+        pass
+    return True
+
+
+def warmup(mode: str) -> None:
+    """Prepare the synthesis path for mode without blocking.
+
+    Spawns the daemon if it is down; otherwise asks it to warm up,
+    at most once per daemon.warmup_interval_seconds.
+    """
+    if mode == "off" or not enabled():
+        return
+    config = _load_daemon_config()
+    if not is_running():
+        spawn(mode)
+        return
+    if _warmup_due(mode, config.get("warmup_interval_seconds", DEFAULT_WARMUP_INTERVAL)):
+        request("warmup", wait=False, mode=mode)
+
+
+def speak(voice_type: str, text: str, mode: str, hook: str = None, voice: dict = None):
+    """Speak through the daemon if it is running.
+
+    Args:
+        voice_type: "assistant" or "system"
+        text: Text to speak
+        mode: TTS mode (kokoro, elevenlabs, openai)
+        hook: Calling hook, for metrics
+        voice: Overrides for the voice type's kokoro_voice/speed (Kokoro only)
+
+    Returns:
+        True/False from the daemon, or None if it did not handle the request
+    """
+    if not enabled():
+        return None
+    reply = request("speak", timeout=SPEAK_TIMEOUT, voice_type=voice_type, text=text,
+                    mode=mode, session=_session_id(), hook=hook, voice=voice)
+    if reply is None or "error" in reply:
+        return None
+    return bool(reply.get("ok"))
+
+
+# === Server ===
+
+_started = time.time()
+_last_request = time.time()
+_warmed = {}
+_requests = 0
+_phrase_cache = OrderedDict()
+# Last Kokoro request, for idle unloading
+_model_used = 0.0
+_memory_events = {"unloads": 0, "cache_drops": 0}
+# Session -> time of the last barge-in; older queued speech is dropped
+_cancelled_at = {}
+# Guards model load/unload, warm-up and the phrase cache
+_model_lock = threading.Lock()
+# Caps concurrent Kokoro inferences (sized from config in serve())
+_inference = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENT_INFERENCES)
+_server = None
+
+
+class _FairScheduler:
+    """Grants the audio device one chunk at a time.
+
+    System phrases are served first; everything else round-robin across
+    sessions and in arrival order within a session.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy = False
+        self._priority = deque()
+        # session -> waiting tickets; dict order is the round-robin order
+        self._sessions = OrderedDict()
+
+    def _next(self):
+        if self._priority:
+            return self._priority[0]
+        for tickets in self._sessions.values():
+            return tickets[0]
+        return None
+
+    def _depth(self) -> int:
+        return len(self._priority) + sum(len(t) for t in self._sessions.values())
+
+    def snapshot(self) -> dict:
+        """Current queue: waiting turns overall, per session and with priority."""
+        with self._cond:
+            return {
+                "busy": self._busy,
+                "depth": self._depth(),
+                "priority": len(self._priority),
+                "sessions": {s: len(t) for s, t in self._sessions.items()},
+            }
+
+    @contextmanager
+    def turn(self, session: str, priority: bool = False):
+        """Hold the device for one chunk; records queue_wait and queue_depth."""
+        import tts_metrics
+
+        ticket = object()
+        start = time.perf_counter()
+        with self._cond:
+            if priority:
+                self._priority.append(ticket)
+            else:
+                self._sessions.setdefault(session, deque()).append(ticket)
+            depth = self._depth()
+            while self._busy or self._next() is not ticket:
+                self._cond.wait()
+            if priority:
+                self._priority.popleft()
+            else:
+                tickets = self._sessions.pop(session)
+                tickets.popleft()
+                if tickets:
+                    # Back of the line behind the other sessions
+                    self._sessions[session] = tickets
+            self._busy = True
+        tts_metrics.record("queue_wait", (time.perf_counter() - start) * 1000,
+                           session=session, priority=priority, queue_depth=depth)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+
+_scheduler = _FairScheduler()
+
+
+@contextmanager
+def _device_turn(session: str, priority: bool):
+    """A turn on the audio device; with the mixer, system phrases need none."""
+    import audio_mixer
+
+    if priority and audio_mixer.active():
+        with audio_mixer.cue():
+            yield
+        return
+    with _scheduler.turn(session, priority):
+        yield
+
+
+def _inference_slot():
+    """The inference cap, unless the batch collector already applies it.
+
+    With coalescing, create() runs outside any daemon lock and only its
+    ONNX calls go through the collector; G2P, the phoneme cache and
+    voice loading are serialized inside kokoro_tts.
+    """
+    import kokoro_batch
+    return nullcontext() if kokoro_batch.coalescing() else _inference
+
+
+def _render_system_phrase(text: str, voice: dict):
+    """Render a Kokoro system phrase, from the RAM cache when possible.
+
+    Caller holds _model_lock.
+    """
+    import kokoro_tts
+
+    key = (voice["kokoro_voice"], voice["speed"], text)
+    if key in _phrase_cache:
+        _phrase_cache.move_to_end(key)
+        return _phrase_cache[key]
+    with _inference_slot():
+        result = kokoro_tts.create(text, voice=voice["kokoro_voice"], speed=voice["speed"])
+    if result is not None:
+        _phrase_cache[key] = result
+        max_size = _load_daemon_config().get("phrase_cache_size", DEFAULT_PHRASE_CACHE_SIZE)
+        while len(_phrase_cache) > max_size:
+            _phrase_cache.popitem(last=False)
+    return result
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        pass
+    try:
+        # macOS has no /proc; ps reports RSS in KB
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(os.getpid())],
+                             capture_output=True, text=True, timeout=2).stdout
+        return int(out.strip()) / 1024
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KB on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _drop_caches() -> None:
+    """Drop RAM caches that are rebuilt on demand. Caller holds _model_lock."""
+    import phoneme_cache
+
+    _phrase_cache.clear()
+    phoneme_cache.release()
+    _memory_events["cache_drops"] += 1
+    gc.collect()
+    try:
+        # Hand freed heap back to the OS (glibc only)
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _unload_model(reason: str) -> bool:
+    """Unload Kokoro and its caches. Caller holds _model_lock.
+
+    Returns:
+        True if a model was loaded
+    """
+    import tts_metrics
+
+    kokoro_tts = sys.modules.get("kokoro_tts")
+    if kokoro_tts is None or not kokoro_tts.is_loaded():
+        return False
+    before = _rss_mb()
+    kokoro_tts.unload()
+    _warmed.pop("kokoro", None)
+    _drop_caches()
+    _memory_events["unloads"] += 1
+    after = _rss_mb()
+    tts_metrics.record("unload", 0, provider="kokoro", reason=reason,
+                       rss_mb=round(after), freed_mb=round(before - after))
+    print(f"Unloaded Kokoro ({reason}): RSS {before:.0f} -> {after:.0f} MB", file=sys.stderr)
+    return True
+
+
+def _enforce_memory_cap() -> None:
+    """Shed memory above daemon.max_rss_mb: caches first, then the model.
+
+    Caller holds _model_lock.
+    """
+    max_rss = _load_daemon_config().get("max_rss_mb", DEFAULT_MAX_RSS_MB)
+    if not max_rss or _rss_mb() <= max_rss:
+        return
+    _drop_caches()
+    if _rss_mb() > max_rss and _unload_model("max_rss") and _rss_mb() > max_rss:
+        print(f"RSS still above daemon.max_rss_mb ({max_rss} MB) with nothing loaded", file=sys.stderr)
+
+
+def _is_warm(mode: str) -> bool:
+    if mode == "kokoro":
+        return mode in _warmed
+    return time.time() - _warmed.get(mode, 0) < CONNECTION_KEEPALIVE
+
+
+def _warm(mode: str) -> dict:
+    """Warm one mode's provider. Idempotent: repeated calls are no-ops."""
+    global _model_used
+    import tts_metrics
+
+    if mode == "kokoro":
+        _model_used = time.time()
+    if _is_warm(mode):
+        return {"ok": True, "warm": True}
+
+    start = time.perf_counter()
+    ok = False
+    with _model_lock:
+        if _is_warm(mode):
+            return {"ok": True, "warm": True}
+        tts_metrics.set_thread_context(hook="daemon")
+        if mode == "kokoro":
+            import kokoro_tts
+            import tts_router
+            voice = tts_router.get_voice("assistant")
+            # One dummy inference primes ONNX allocations and espeak
+            with _inference_slot():
+                ok = kokoro_tts.create("Ready.", voice=voice["kokoro_voice"], speed=voice["speed"]) is not None
+            import kokoro_batch
+            if ok and not kokoro_batch.coalescing():
+                # First warm-up: probe (once per model) whether batched calls work
+                style = kokoro_tts.get_voice_style(voice["kokoro_voice"])
+                with _inference:
+                    batching = kokoro_batch.supports_batching(kokoro_tts.get_kokoro(), style, probe=True)
+                if batching:
+                    kokoro_batch.enable_coalescing(_inference)
+            if ok:
+                phrases = _acknowledgment_phrases()
+                system_voice = tts_router.get_voice("system")
+                for phrase in phrases[:_load_daemon_config().get("phrase_cache_size", DEFAULT_PHRASE_CACHE_SIZE)]:
+                    _render_system_phrase(phrase, system_voice)
+        elif mode == "elevenlabs":
+            import elevenlabs_tts
+            ok = elevenlabs_tts.warmup()
+        elif mode == "openai":
+            import openai_tts
+            ok = openai_tts.warmup()
+        _enforce_memory_cap()
+    ms = (time.perf_counter() - start) * 1000
+    if ok:
+        _warmed[mode] = time.time()
+        tts_metrics.record("warmup", ms, provider=mode)
+    return {"ok": ok, "warm": False, "ms": round(ms, 1)}
+
+
+def _acknowledgment_phrases() -> list:
+    """Phrases the UserPromptSubmit hook picks from."""
+    try:
+        config = json.loads((HOOKS_DIR / "tts_config.json").read_text())
+        return config.get("hooks", {}).get("user_prompt_submit", {}).get("phrases", [])
+    except Exception:
+        return []
+
+
+def _synthesize_ahead(utterance, text: str, voice: dict, tags: dict):
+    """Yield (samples, sample_rate, chunk_text) for each sentence chunk.
+
+    A worker thread synthesizes one chunk ahead of playback, holding an
+    inference slot per chunk, and stops early on barge-in.
+    """
+    import kokoro_tts
+    import playback_registry
+    import text_normalizer
+    import tts_metrics
+
+    ready = queue.Queue(maxsize=1)
+    done = threading.Event()
+
+    def offer(item) -> None:
+        # Give up if the consumer has gone away
+        while not done.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def work() -> None:
+        global _model_used
+        playback_registry.bind(utterance)
+        tts_metrics.set_thread_context(**tags)
+        try:
+            chunk_chars = _load_daemon_config().get("chunk_chars", DEFAULT_CHUNK_CHARS)
+            for chunk in text_normalizer.sentence_chunks(text, chunk_chars):
+                with _inference_slot():
+                    if utterance.cancelled:
+                        break
+                    _model_used = time.time()
+                    result = kokoro_tts.create(chunk, voice=voice["kokoro_voice"], speed=voice["speed"])
+                if result is None:
+                    break
+                offer((*result, chunk))
+        except Exception as e:
+            print(f"Daemon synthesis failed: {e}", file=sys.stderr)
+        finally:
+            offer(None)
+
+    threading.Thread(target=work, daemon=True).start()
+    try:
+        while True:
+            item = ready.get()
+            if item is None:
+                return
+            yield item
+    finally:
+        done.set()
+
+
+def _speak_kokoro(utterance, req: dict, priority: bool, received: float):
+    """Speak with Kokoro chunk by chunk, one device turn per chunk.
+
+    Returns:
+        True/False, or None if nothing was synthesized (caller falls back)
+    """
+    global _model_used
+    import audio_output
+    import kokoro_tts
+    import tts_router
+
+    voice_type = req.get("voice_type", "assistant")
+    text = req.get("text", "")
+    session = req.get("session", "")
+    voice = tts_router.get_voice(voice_type)
+    voice.update({k: v for k, v in (req.get("voice") or {}).items() if k in ("kokoro_voice", "speed")})
+    _model_used = time.time()
+    if kokoro_tts.get_kokoro() is None:
+        return None
+
+    if voice_type == "system":
+        with _model_lock:
+            result = _render_system_phrase(text, voice)
+        # play_pcm post-processes in place; keep the cached copy intact
+        chunks = [(result[0].copy(), result[1], text)] if result is not None else []
+    else:
+        tags = {"hook": req.get("hook") or "daemon", "session": session}
+        chunks = _synthesize_ahead(utterance, text, voice, tags)
+
+    ok = None
+    for samples, sample_rate, chunk_text in chunks:
+        if _cancelled_at.get(session, 0) >= received:
+            utterance.cancel("stop")
+        if utterance.cancelled:
+            # Let the worker notice and finish
+            ok = True
+            continue
+        with _device_turn(session, priority):
+            played = audio_output.play_pcm(samples, sample_rate, volume=voice["volume"], text=chunk_text)
+        ok = played and ok is not False
+    if ok is None and utterance.cancelled:
+        return True
+    return ok
+
+
+def _history(voice_type: str, text: str, session: str, mode: str):
+    """Record replies (not system phrases) for replay."""
+    import speech_history
+
+    if voice_type != "assistant":
+        return nullcontext()
+    return speech_history.recording(text, session=session or None, provider=mode)
+
+
+def _speak(req: dict) -> dict:
+    """Speak text: Kokoro in scheduled chunks, other modes via the router
+    (with its fallback chain) in a single device turn."""
+    import playback_registry
+    import tts_metrics
+    import tts_router
+
+    received = time.time()
+    mode = req.get("mode")
+    voice_type = req.get("voice_type", "assistant")
+    text = req.get("text", "")
+    session = req.get("session", "")
+    priority = voice_type == "system"
+    if _cancelled_at.get(session, 0) >= received:
+        return {"ok": True, "cancelled": True}
+    tts_metrics.set_thread_context(hook=req.get("hook") or "daemon", session=session)
+    try:
+        with playback_registry.utterance(text, session=session or None, daemon=True) as utterance, \
+                _history(voice_type, text, session, mode):
+            if mode == "kokoro":
+                ok = _speak_kokoro(utterance, req, priority, received)
+                if ok is not None:
+                    return {"ok": ok}
+            with _device_turn(session, priority):
+                if utterance.cancelled or _cancelled_at.get(session, 0) >= received:
+                    return {"ok": True, "cancelled": True}
+                return {"ok": tts_router.speak(voice_type, text, mode=mode)}
+    finally:
+        with _model_lock:
+            _enforce_memory_cap()
+
+
+def _cancel(req: dict) -> dict:
+    """Barge-in: stop the session's utterance without waiting for its turn."""
+    import playback_registry
+
+    session = req.get("session", "")
+    _cancelled_at[session] = time.time()
+    return {"ok": playback_registry.cancel_local(session, req.get("mode"))}
+
+
+def _stats() -> dict:
+    return {
+        "ok": True,
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - _started, 1),
+        "idle_s": round(time.time() - _last_request, 1),
+        "requests": _requests,
+        "warm": sorted(_warmed),
+        "phrase_cache": len(_phrase_cache),
+        "queue": _scheduler.snapshot(),
+        "max_concurrent_inferences": _load_daemon_config().get(
+            "max_concurrent_inferences", DEFAULT_MAX_CONCURRENT_INFERENCES),
+        "memory": _memory_stats(),
+        "batching": sys.modules["kokoro_batch"].stats() if "kokoro_batch" in sys.modules else None,
+        "mixer": sys.modules["audio_mixer"].stats() if "audio_mixer" in sys.modules else None,
+    }
+
+
+def _memory_stats() -> dict:
+    import phoneme_cache
+
+    kokoro_tts = sys.modules.get("kokoro_tts")
+    return {
+        "rss_mb": round(_rss_mb(), 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "max_rss_mb": _load_daemon_config().get("max_rss_mb", DEFAULT_MAX_RSS_MB),
+        "model_loaded": bool(kokoro_tts and kokoro_tts.is_loaded()),
+        "model_idle_s": round(time.time() - _model_used, 1) if _model_used else None,
+        "phoneme_cache": phoneme_cache.resident_entries(),
+        **_memory_events,
+    }
+
+
+def handle(req: dict) -> dict:
+    """Dispatch one request."""
+    global _last_request, _requests
+    _last_request = time.time()
+    _requests += 1
+    op = req.get("op")
+    if op == "ping":
+        return {"ok": True, "pid": os.getpid()}
+    if op == "warmup":
+        return _warm(req.get("mode", "kokoro"))
+    if op == "speak":
+        return _speak(req)
+    if op == "cancel":
+        return _cancel(req)
+    if op == "stats":
+        return _stats()
+    if op == "shutdown":
+        # _Handler shuts the server down once this reply is written
+        return {"ok": True, "shutdown": True}
+    return {"error": f"unknown op: {op}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            reply = handle(json.loads(line))
+        except Exception as e:
+            print(f"Daemon request failed: {e}", file=sys.stderr)
+            reply = {"error": str(e)}
+        try:
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+        except OSError:
+            pass  # Fire-and-forget client already hung up
+        if reply.get("shutdown"):
+            threading.Thread(target=_server.shutdown, daemon=True).start()
+
+
+def _idle_watch(idle_exit: float, model_idle: float) -> None:
+    """Unload Kokoro after model_idle seconds without Kokoro requests, and
+    shut down after idle_exit seconds without any request."""
+    while True:
+        time.sleep(min(60, idle_exit, model_idle or 60))
+        if time.time() - _last_request > idle_exit:
+            print(f"Idle for {idle_exit:.0f}s, exiting", file=sys.stderr)
+            _server.shutdown()
+            return
+        if model_idle and time.time() - _model_used > model_idle:
+            with _model_lock:
+                if time.time() - _model_used > model_idle:
+                    _unload_model("idle")
+
+
+def serve(warmup_mode: str = None) -> None:
+    """Run the daemon until idle timeout or shutdown (one per user)."""
+    global _server, _inference
+    lock_file = open(LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return  # Another daemon owns the socket
+
+    # We hold the lock, so any existing socket file is stale
+    SOCKET_PATH.unlink(missing_ok=True)
+    socketserver.ThreadingUnixStreamServer.daemon_threads = True
+    _server = socketserver.ThreadingUnixStreamServer(str(SOCKET_PATH), _Handler)
+    os.chmod(SOCKET_PATH, 0o600)
+
+    config = _load_daemon_config()
+    _inference = threading.BoundedSemaphore(
+        max(1, config.get("max_concurrent_inferences", DEFAULT_MAX_CONCURRENT_INFERENCES)))
+    idle_exit = config.get("idle_exit_minutes", DEFAULT_IDLE_EXIT_MINUTES) * 60
+    model_idle = config.get("model_idle_minutes", DEFAULT_MODEL_IDLE_MINUTES) * 60
+    threading.Thread(target=_idle_watch, args=(idle_exit, model_idle), daemon=True).start()
+    if warmup_mode:
+        threading.Thread(target=_warm, args=(warmup_mode,), daemon=True).start()
+    import audio_mixer
+    audio_mixer.start()
+
+    print(f"TTS daemon {os.getpid()} listening on {SOCKET_PATH}", file=sys.stderr, flush=True)
+    try:
+        _server.serve_forever()
+    finally:
+        _server.server_close()
+        SOCKET_PATH.unlink(missing_ok=True)
+        lock_file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Claude Code TTS synthesis daemon")
+    parser.add_argument("command", choices=["serve", "ping", "stats", "stop"])
+    parser.add_argument("--warmup", help="Mode to warm up on start (kokoro, elevenlabs, openai)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.warmup)
+    else:
+        op = {"ping": "ping", "stats": "stats", "stop": "shutdown"}[args.command]
+        reply = request(op, timeout=5)
+        if reply is None:
+            print("TTS daemon not running")
+            sys.exit(1)
+        print(json.dumps(reply, indent=2))
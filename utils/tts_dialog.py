@@ -1,36 +1,79 @@
 """
 TTS mode selection dialog for Claude Code hooks.
-Provides macOS AppleScript dialogs for TTS provider selection.
+Provides macOS AppleScript dialogs (zenity/kdialog on Linux) for TTS
+provider selection, and a terminal selector for machines without one.
+
+The SessionStart hook never waits for a dialog: select_async() runs it in
+a detached process that applies the choice to session state when the
+user answers, remembers it for the project, and speaks the announcement.
+
+Usage:
+    python3 tts_dialog.py select [--directory] [--forget]
+    python3 tts_dialog.py resolve --session ID --cwd DIR (--dialog | --mode MODE) [--announce] [--probe]
 """
 
+import os
 import subprocess
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# Add utils to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import capabilities
+
+HOOKS_DIR = Path(__file__).parent.parent
+DEBUG_LOG = Path("/tmp/claude-tts-debug.log")
+
+CHOICES = [
+    ("kokoro", "Kokoro - Free, Local Neural TTS"),
+    ("elevenlabs", "ElevenLabs - Premium Cloud Voices"),
+    ("openai", "OpenAI - Cloud TTS"),
+    ("off", "Silent - No Audio"),
+]
 
-def log_debug(msg: str, log_file: Path = Path("/tmp/claude-tts-debug.log")) -> None:
+
+def log_debug(msg: str, log_file: Path = DEBUG_LOG) -> None:
     """Write debug message to log file."""
     with open(log_file, "a") as f:
         f.write(f"[{datetime.now()}] {msg}\n")
 
 
-def select_tts_mode(timeout: int = 15, default: str = "off", log_file: Path = None) -> str:
-    """
-    Show macOS dialog to select TTS mode.
+def _linux_dialog_command() -> list:
+    """zenity or kdialog command for the selection list, if a display is available."""
+    if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        return None
+    if capabilities.binary("zenity"):
+        cmd = ["zenity", "--list", "--title", "Claude Code TTS", "--text", "Select TTS Provider:",
+               "--column", "Mode", "--column", "Provider", "--height", "260"]
+        for mode, label in CHOICES:
+            cmd += [mode, label]
+        return cmd
+    if capabilities.binary("kdialog"):
+        cmd = ["kdialog", "--title", "Claude Code TTS", "--menu", "Select TTS Provider:"]
+        for mode, label in CHOICES:
+            cmd += [mode, label]
+        return cmd
+    return None
 
-    Args:
-        timeout: Dialog timeout in seconds
-        default: Default mode if dialog times out or is cancelled
-        log_file: Optional log file path
 
-    Returns:
-        Selected TTS mode: "kokoro", "elevenlabs", "openai", or "off"
-    """
-    script = '''set choices to {"Kokoro - Free, Local Neural TTS", "ElevenLabs - Premium Cloud Voices", "OpenAI - Cloud TTS", "Silent - No Audio"}
+def dialog_available() -> bool:
+    """Check whether a graphical selection dialog can be shown."""
+    if sys.platform == "darwin":
+        return capabilities.binary("osascript") is not None
+    return _linux_dialog_command() is not None
+
+
+def _run_dialog(timeout: int, log_file: Path = None):
+    """Show the dialog and return the chosen mode, or None without an answer."""
+    if sys.platform == "darwin":
+        items = ", ".join(f'"{label}"' for _, label in CHOICES)
+        script = f'''set choices to {{{items}}}
 try
-    set selectedItem to choose from list choices with prompt "Select TTS Provider:" default items {"Kokoro - Free, Local Neural TTS"} with title "Claude Code TTS"
+    set selectedItem to choose from list choices with prompt "Select TTS Provider:" default items {{"{CHOICES[0][1]}"}} with title "Claude Code TTS"
     if selectedItem is false then
-        return "off"
+        return ""
     else
         set choice to item 1 of selectedItem
         if choice contains "Kokoro" then
@@ -44,36 +87,159 @@ try
         end if
     end if
 on error
-    return "off"
+    return ""
 end try'''
+        cmd = ["osascript", "-e", script]
+    else:
+        cmd = _linux_dialog_command()
+        if cmd is None:
+            return None
 
     try:
         if log_file:
             log_debug(f"Running TTS dialog with {timeout}s timeout...", log_file)
 
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
 
         mode = result.stdout.strip().lower()
         if log_file:
             log_debug(f"TTS mode selected: {mode}", log_file)
 
-        if mode in ("kokoro", "elevenlabs", "openai", "off"):
+        if mode in dict(CHOICES):
             return mode
-        return default
+        return None
 
     except subprocess.TimeoutExpired:
         if log_file:
             log_debug(f"Dialog timed out after {timeout}s", log_file)
-        return default
+        return None
     except Exception as e:
         if log_file:
             log_debug(f"Dialog exception: {e}", log_file)
-        return default
+        return None
+
+
+def select_tts_mode(timeout: int = 15, default: str = "off", log_file: Path = None) -> str:
+    """
+    Show dialog to select TTS mode (blocks until answered).
+
+    Args:
+        timeout: Dialog timeout in seconds
+        default: Default mode if dialog times out or is cancelled
+        log_file: Optional log file path
+
+    Returns:
+        Selected TTS mode: "kokoro", "elevenlabs", "openai", or "off"
+    """
+    return _run_dialog(timeout, log_file) or default
+
+
+def select_async(session_id: str, cwd: str, dialog: bool = True, mode: str = None,
+                 timeout: int = 15, scope: str = "project", announce: bool = False,
+                 probe: bool = False) -> bool:
+    """Resolve the session's mode in a detached process.
+
+    Args:
+        session_id: Session the choice applies to
+        cwd: Session working directory (where a choice is remembered)
+        dialog: Ask the user; otherwise mode is already decided
+        mode: Decided mode (only announced)
+        timeout: Dialog timeout in seconds
+        scope: Remember the answer per "project", "directory", or "off"
+        announce: Speak "TTS enabled" once the mode is known
+        probe: Take the session's capability snapshot first
+
+    Returns:
+        True if the process was started
+    """
+    cmd = [sys.executable, str(Path(__file__).resolve()), "resolve",
+           "--session", str(session_id or ""), "--cwd", cwd or "",
+           "--timeout", str(timeout), "--scope", scope]
+    cmd += ["--dialog"] if dialog else ["--mode", mode or "off"]
+    if announce:
+        cmd.append("--announce")
+    if probe:
+        cmd.append("--probe")
+    try:
+        with open(DEBUG_LOG, "a") as log:
+            subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                             start_new_session=True, close_fds=True)
+        return True
+    except OSError as e:
+        print(f"Failed to start TTS mode selection: {e}", file=sys.stderr)
+        return False
+
+
+def announce(mode: str) -> bool:
+    """Speak the session start announcement for mode."""
+    import playback_registry
+    import tts_daemon
+
+    text = f"TTS enabled. Using {mode} mode."
+    if mode == "kokoro":
+        spoke = tts_daemon.speak("system", text, mode, hook="session_start")
+        if spoke is not None:
+            return spoke
+    from tts_router import speak
+    with playback_registry.utterance(text):
+        return speak("system", text, mode=mode)
+
+
+def _resolve(args) -> None:
+    """Background half of the SessionStart hook."""
+    from session_state import apply_tts_mode, remember_mode, set_session_id
+
+    set_session_id(args.session)
+    if args.probe:
+        import tts_metrics
+        tts_metrics.set_context(hook="session_start", session=args.session)
+        with tts_metrics.timed("capabilities"):
+            capabilities.refresh()
+    mode = args.mode
+    if args.dialog:
+        mode = _run_dialog(args.timeout, DEBUG_LOG)
+        if mode is None:
+            # Unanswered: the default applied at session start stands
+            return
+        if not apply_tts_mode(mode, args.session):
+            log_debug(f"Dialog answer {mode} dropped: a newer session started")
+            return
+        if args.scope != "off":
+            remember_mode(args.cwd, mode, args.scope)
+
+    if args.announce and mode != "off":
+        try:
+            announce(mode)
+        except Exception as e:
+            log_debug(f"Announcement failed: {e}")
+
+
+def terminal_select(cwd: str, scope: str = "project") -> str:
+    """Choose the mode from a terminal menu.
+
+    Applies to the running session and is remembered for cwd's project
+    (or cwd only with scope "directory").
+
+    Returns:
+        Chosen mode, or None if cancelled
+    """
+    from session_state import apply_tts_mode, get_tts_mode, remember_mode
+
+    current = get_tts_mode()
+    for i, (mode, label) in enumerate(CHOICES, 1):
+        marker = "*" if mode == current else " "
+        print(f" {marker} {i}. {label}")
+    try:
+        answer = input("Select TTS provider [1-4]: ").strip()
+    except (EOFError, KeyboardInterrupt):
+        print()
+        return None
+    if not answer.isdigit() or not 1 <= int(answer) <= len(CHOICES):
+        return None
+    mode = CHOICES[int(answer) - 1][0]
+    apply_tts_mode(mode)
+    remember_mode(cwd, mode, scope)
+    return mode
 
 
 def show_notification(title: str, message: str) -> bool:
@@ -93,3 +259,45 @@ def show_notification(title: str, message: str) -> bool:
         return True
     except Exception:
         return False
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Claude Code TTS mode selection")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    select = sub.add_parser("select", help="Choose the TTS mode in the terminal")
+    select.add_argument("--directory", action="store_true",
+                        help="Remember for this directory only, not the whole project")
+    select.add_argument("--forget", action="store_true",
+                        help="Forget the remembered choice for this directory/project")
+
+    resolve = sub.add_parser("resolve", help=argparse.SUPPRESS)
+    resolve.add_argument("--session", default="")
+    resolve.add_argument("--cwd", default="")
+    resolve.add_argument("--timeout", type=int, default=15)
+    resolve.add_argument("--scope", default="project")
+    resolve.add_argument("--dialog", action="store_true")
+    resolve.add_argument("--mode")
+    resolve.add_argument("--announce", action="store_true")
+    resolve.add_argument("--probe", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "resolve":
+        _resolve(args)
+        return
+
+    cwd = os.getcwd()
+    if args.forget:
+        from session_state import forget_mode
+        print("Forgotten." if forget_mode(cwd) else "Nothing remembered here.")
+        return
+    mode = terminal_select(cwd, "directory" if args.directory else "project")
+    if mode is None:
+        sys.exit(1)
+    print(f"TTS mode: {mode}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Structured per-stage latency metrics.
+
+Hooks and providers append one JSON line per timed stage to a local
+metrics file, tagged with hook, provider, voice, session and text length.
+scripts/tts-stats.py aggregates them into percentiles.
+
+Stages:
+- config_load, transcript_read, text_clean: hook-side work
+- watch_claim, watch_flush: transcript watcher reads and the Stop hook's
+  hand-off to it (tagged with handed_off)
+- warmup: daemon model load / connection warm-up
+- queue_wait: daemon wait for the audio device (tagged with queue_depth)
+- g2p, synthesis: provider work (duration of the stage)
+- first_audio, playback_end: latency since the utterance began
+- hook: total hook runtime
+
+Configuration via tts_config.json:
+- metrics.enabled: Record metrics (default true)
+- metrics.file: Metrics file (default ~/.cache/claude-tts/metrics.jsonl)
+- metrics.max_bytes: Rotate to <file>.1 past this size (default 5MB)
+
+Set CLAUDE_TTS_METRICS=0 to disable without editing the config.
+"""
+
+import contextvars
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+HOOKS_DIR = Path(__file__).parent.parent
+DEFAULT_METRICS_FILE = Path.home() / ".cache" / "claude-tts" / "metrics.jsonl"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+# Tags added to every record (hook name, session, ...)
+_context = {}
+# Per-thread (and per asyncio task) state, so concurrent daemon requests
+# and async pipelines don't mix their tags: context (tags over _context),
+# and the utterance start, tags and marks for first_audio / playback_end
+_thread_context = contextvars.ContextVar("claude_tts_metrics_context", default=None)
+_utterance_state = contextvars.ContextVar("claude_tts_metrics_utterance", default=None)
+_config = None
+
+
+def _utterance() -> dict:
+    utterance = _utterance_state.get()
+    if utterance is None:
+        utterance = isolate()
+    return utterance
+
+
+def isolate() -> dict:
+    """Give the current context its own utterance state.
+
+    Tasks share their creator's state; an async pipeline calls this before
+    starting its own tasks so they share its state and no one else's.
+    """
+    utterance = {"start": None, "tags": {}, "marks": set()}
+    _utterance_state.set(utterance)
+    return utterance
+
+
+def _load_metrics_config() -> dict:
+    """Load the metrics section from tts_config.json (once per process)."""
+    global _config
+    if _config is None:
+        _config = {}
+        try:
+            config_path = HOOKS_DIR / "tts_config.json"
+            if config_path.exists():
+                with open(config_path) as f:
+                    _config = json.load(f).get("metrics", {})
+        except Exception:
+            pass
+    return _config
+
+
+def enabled() -> bool:
+    """Check whether metrics are recorded."""
+    if os.environ.get("CLAUDE_TTS_METRICS") == "0":
+        return False
+    return _load_metrics_config().get("enabled", True)
+
+
+def metrics_file() -> Path:
+    """Get the metrics file path."""
+    path = _load_metrics_config().get("file")
+    return Path(os.path.expanduser(path)) if path else DEFAULT_METRICS_FILE
+
+
+def set_context(**tags) -> None:
+    """Set tags added to every record from this process (e.g. hook="stop")."""
+    if "session" not in _context and "session" not in tags:
+        try:
+            from session_state import _get_current_session_id
+            tags["session"] = _get_current_session_id()
+        except Exception:
+            pass
+    _context.update(tags)
+
+
+def set_thread_context(**tags) -> None:
+    """Set tags for records from the current thread only (daemon workers)."""
+    _thread_context.set(dict(tags))
+
+
+def context_tags() -> dict:
+    """Tags added to records from the current thread (hook, session, ...)."""
+    return {**_context, **(_thread_context.get() or {})}
+
+
+def record(stage: str, ms: float, **tags) -> None:
+    """Append one timing record.
+
+    Args:
+        stage: Stage name (config_load, synthesis, ...)
+        ms: Duration or latency in milliseconds
+        **tags: provider, voice, text_len, ...
+    """
+    if not enabled():
+        return
+    entry = {"ts": round(time.time(), 3), "stage": stage, "ms": round(ms, 2)}
+    entry.update(_context)
+    entry.update(_thread_context.get() or {})
+    entry.update(tags)
+    try:
+        path = metrics_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        max_bytes = _load_metrics_config().get("max_bytes", DEFAULT_MAX_BYTES)
+        if path.exists() and path.stat().st_size > max_bytes:
+            os.replace(path, path.with_name(path.name + ".1"))
+        # One write per line in append mode, so concurrent hooks don't interleave
+        with open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def timed(stage: str, **tags):
+    """Time a block and record it as one stage.
+
+    Yields a dict; tags added to it (e.g. text_len) are recorded too.
+    """
+    extra = dict(tags)
+    start = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        record(stage, (time.perf_counter() - start) * 1000, **extra)
+
+
+def begin_utterance(provider: str, voice: str = None, text_len: int = None) -> None:
+    """Start the clock for first_audio and playback_end of one utterance."""
+    utterance = _utterance()
+    utterance["start"] = time.perf_counter()
+    utterance["tags"] = {"provider": provider, "voice": voice, "text_len": text_len}
+    utterance["marks"].clear()
+
+
+def utterance_tags() -> dict:
+    """Tags of the current utterance (provider, voice, text_len)."""
+    return dict(_utterance()["tags"])
+
+
+def mark(stage: str) -> None:
+    """Record latency from begin_utterance() to now (first_audio, playback_end).
+
+    Each stage is recorded at most once per utterance.
+    """
+    utterance = _utterance()
+    if utterance["start"] is None or stage in utterance["marks"]:
+        return
+    utterance["marks"].add(stage)
+    record(stage, (time.perf_counter() - utterance["start"]) * 1000, **utterance["tags"])
@@ -11,7 +11,16 @@ Unified TTS router with mode-aware provider selection.
 Routing logic:
 1. Read TTS mode from session_state
 2. Route to provider: kokoro/elevenlabs/openai/off
-3. Fallback chain: Primary -> macOS say
+3. Fallback chain: Primary -> macOS say (espeak-ng off macOS)
+   (cloud requests over the rate limit: Primary -> Kokoro -> local fallback)
+
+Providers the capability snapshot (capabilities.py) marks unusable, e.g.
+without an API key or model files, go straight to the fallback.
+
+speak_async() is the asyncio counterpart of speak(): the same routing
+over the providers' synthesize() streams, with later chunks synthesized
+and downloaded while earlier ones play. Pipelines for several sessions
+can run concurrently on one event loop.
 
 Voice configuration:
 - "assistant": Primary voice for Claude's responses
@@ -25,7 +34,11 @@ from pathlib import Path
 # Add utils to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+import capabilities
+import espeak_tts
 import macos_say
+import playback_registry
+import rate_limiter
 
 HOOKS_DIR = Path(__file__).parent.parent
 
@@ -60,7 +73,9 @@ def get_voice(voice_type: str) -> dict:
             "voice_id": cfg.get("elevenlabs_voice_id"),
             "openai_voice": cfg.get("openai_voice", "onyx"),
             "macos_voice": cfg.get("macos_voice", "Samantha"),
+            "espeak_voice": cfg.get("espeak_voice", espeak_tts.DEFAULT_VOICE),
             "speed": cfg.get("speed", 1.0),
+            "volume": cfg.get("volume", 1.0),
         }
     # Default fallback
     return {
@@ -68,7 +83,9 @@ def get_voice(voice_type: str) -> dict:
         "voice_id": "21m00Tcm4TlvDq8ikWAM",  # Rachel
         "openai_voice": "onyx",
         "macos_voice": "Samantha",
-        "speed": 1.0
+        "espeak_voice": espeak_tts.DEFAULT_VOICE,
+        "speed": 1.0,
+        "volume": 1.0
     }
 
 
@@ -129,59 +146,185 @@ def speak(voice_type: str, text: str, mode: str = None) -> bool:
     elif mode == "openai":
         return _speak_openai(text, voice_config)
     else:
-        # Unknown mode - fallback to macOS
-        return _speak_macos(text, voice_config)
+        # Unknown mode - local fallback
+        return _speak_fallback(text, voice_config)
 
 
 def _speak_kokoro(text: str, voice_config: dict) -> bool:
-    """Speak using Kokoro with macOS fallback."""
-    if KOKORO_AVAILABLE and voice_config.get("kokoro_voice"):
+    """Speak using Kokoro with local fallback."""
+    if KOKORO_AVAILABLE and capabilities.usable("kokoro") and voice_config.get("kokoro_voice"):
         success = kokoro_tts.speak(
             text,
             voice=voice_config.get("kokoro_voice", "bf_emma"),
-            speed=voice_config.get("speed", 1.0)
+            speed=voice_config.get("speed", 1.0),
+            volume=voice_config.get("volume", 1.0)
         )
         if success:
             return True
-        print("Kokoro failed, falling back to macOS", file=sys.stderr)
+        print("Kokoro failed, falling back to local TTS", file=sys.stderr)
 
-    return _speak_macos(text, voice_config)
+    return _speak_fallback(text, voice_config)
 
 
 def _speak_elevenlabs(text: str, voice_config: dict) -> bool:
-    """Speak using ElevenLabs with macOS fallback."""
-    if ELEVENLABS_AVAILABLE and voice_config.get("voice_id"):
+    """Speak using ElevenLabs with local fallback."""
+    if ELEVENLABS_AVAILABLE and capabilities.usable("elevenlabs") and voice_config.get("voice_id"):
         success = elevenlabs_tts.speak(
             text,
             voice_config.get("voice_id"),
             speed=voice_config.get("speed", 1.0),
+            volume=voice_config.get("volume", 1.0),
         )
         if success:
             return True
-        print("ElevenLabs failed, falling back to macOS", file=sys.stderr)
+        if rate_limiter.overflow_mode("elevenlabs") == "kokoro":
+            return _speak_kokoro(text, voice_config)
+        print("ElevenLabs failed, falling back to local TTS", file=sys.stderr)
 
-    return _speak_macos(text, voice_config)
+    return _speak_fallback(text, voice_config)
 
 
 def _speak_openai(text: str, voice_config: dict) -> bool:
-    """Speak using OpenAI TTS with macOS fallback."""
-    if OPENAI_AVAILABLE and voice_config.get("openai_voice"):
+    """Speak using OpenAI TTS with local fallback."""
+    if OPENAI_AVAILABLE and capabilities.usable("openai") and voice_config.get("openai_voice"):
         success = openai_tts.speak(
             text,
             voice=voice_config.get("openai_voice", "onyx"),
-            speed=voice_config.get("speed", 1.0)
+            speed=voice_config.get("speed", 1.0),
+            volume=voice_config.get("volume", 1.0)
         )
         if success:
             return True
-        print("OpenAI TTS failed, falling back to macOS", file=sys.stderr)
+        if rate_limiter.overflow_mode("openai") == "kokoro":
+            return _speak_kokoro(text, voice_config)
+        print("OpenAI TTS failed, falling back to local TTS", file=sys.stderr)
+
+    return _speak_fallback(text, voice_config)
 
-    return _speak_macos(text, voice_config)
+
+def _speak_fallback(text: str, voice_config: dict) -> bool:
+    """Final fallback: macOS say on macOS, espeak-ng elsewhere."""
+    if sys.platform == "darwin":
+        return _speak_macos(text, voice_config)
+    return espeak_tts.speak(
+        text,
+        voice=voice_config.get("espeak_voice", espeak_tts.DEFAULT_VOICE),
+        speed=voice_config.get("speed", 1.0),
+        volume=voice_config.get("volume", 1.0)
+    )
 
 
 def _speak_macos(text: str, voice_config: dict) -> bool:
-    """Speak using macOS say (final fallback)."""
+    """Speak using macOS say."""
     macos_voice = voice_config.get("macos_voice", "Samantha")
-    return macos_say.speak(text, macos_voice, voice_config.get("speed", 1.0))
+    return macos_say.speak(
+        text,
+        macos_voice,
+        voice_config.get("speed", 1.0),
+        volume=voice_config.get("volume", 1.0)
+    )
+
+
+def _stream(provider: str, text: str, voice_config: dict):
+    """A provider's synthesize() stream, or None if it can't be used.
+
+    Args:
+        provider: kokoro, elevenlabs, openai, or fallback
+    """
+    speed = voice_config.get("speed", 1.0)
+    if provider == "kokoro":
+        if KOKORO_AVAILABLE and capabilities.usable("kokoro") and voice_config.get("kokoro_voice"):
+            return kokoro_tts.synthesize(text, voice=voice_config["kokoro_voice"], speed=speed)
+    elif provider == "elevenlabs":
+        if ELEVENLABS_AVAILABLE and capabilities.usable("elevenlabs") and voice_config.get("voice_id"):
+            return elevenlabs_tts.synthesize(text, voice_config["voice_id"], speed=speed)
+    elif provider == "openai":
+        if OPENAI_AVAILABLE and capabilities.usable("openai") and voice_config.get("openai_voice"):
+            return openai_tts.synthesize(text, voice=voice_config["openai_voice"], speed=speed)
+    elif sys.platform == "darwin":
+        return macos_say.synthesize(text, voice_config.get("macos_voice", "Samantha"), speed)
+    else:
+        return espeak_tts.synthesize(
+            text, voice=voice_config.get("espeak_voice", espeak_tts.DEFAULT_VOICE), speed=speed
+        )
+    return None
+
+
+async def synthesize(voice_type: str, text: str, mode: str = None):
+    """
+    Synthesize text with the mode's provider, chunk by chunk.
+
+    Falls back like speak() when a provider produces nothing: cloud
+    requests over the rate limit go to Kokoro, other failures to the
+    local fallback. A provider that already produced audio is not
+    replaced halfway through.
+
+    Args:
+        voice_type: Voice type key ("assistant", "system")
+        text: Text to speak
+        mode: Override TTS mode (default: read from session_state)
+
+    Yields:
+        (samples, sample_rate, chunk_text)
+    """
+    if mode is None:
+        mode = get_tts_mode()
+    if mode == "off":
+        return
+
+    voice_config = get_voice(voice_type)
+    provider = mode if mode in ("kokoro", "elevenlabs", "openai") else "fallback"
+    while provider is not None:
+        stream = _stream(provider, text, voice_config)
+        produced = False
+        if stream is not None:
+            try:
+                async for chunk in stream:
+                    produced = True
+                    yield chunk
+            finally:
+                await stream.aclose()
+        if produced or playback_registry.cancelled():
+            return
+        if provider == "fallback":
+            provider = None
+        elif stream is not None and rate_limiter.overflow_mode(provider) == "kokoro":
+            provider = "kokoro"
+        else:
+            if stream is not None:
+                print(f"{provider} failed, falling back to local TTS", file=sys.stderr)
+            provider = "fallback"
+
+
+async def speak_async(voice_type: str, text: str, mode: str = None,
+                      session: str = None, prefetch: int = 1) -> bool:
+    """
+    Speak text like speak(), without blocking the event loop.
+
+    Later chunks are synthesized (or downloaded) while earlier ones play.
+    Calls for different sessions can run concurrently (asyncio.gather);
+    each registers its own utterance for barge-in.
+
+    Args:
+        voice_type: Voice type key ("assistant", "system")
+        text: Text to speak
+        mode: Override TTS mode (default: read from session_state)
+        session: Session ID for barge-in (default: current session)
+        prefetch: Chunks synthesized ahead of playback
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if mode is None:
+        mode = get_tts_mode()
+    if mode == "off":
+        return True
+
+    import audio_output
+
+    volume = get_voice(voice_type).get("volume", 1.0)
+    with playback_registry.utterance(text, session=session):
+        return await audio_output.play(synthesize(voice_type, text, mode), volume=volume, prefetch=prefetch)
 
 
 if __name__ == "__main__":
@@ -195,5 +338,5 @@ if __name__ == "__main__":
     print("\nTesting OpenAI...")
     speak("assistant", "Testing OpenAI mode.", mode="openai")
 
-    print("\nTesting macOS fallback...")
-    speak("system", "Testing macOS fallback mode.", mode="macos")
+    print("\nTesting local fallback...")
+    speak("system", "Testing local fallback mode.", mode="local")